@@ -0,0 +1,197 @@
+"""
+Measure how quickly each model assigns partial charges on CPU.
+
+Every model in ``KNOWN_HASHES`` (or those given with ``--models``) assigns
+charges to the molecules in ``data/molecules.smi``, first in a single process
+and then in a pool of processes. For each run this reports the throughput in
+molecules per second, percentiles of the time taken to assign charges to one
+molecule, and the peak resident memory of the worker processes.
+
+Each run starts new worker processes, which load the model and parse the
+molecules before timing starts, so that only charge assignment is timed and
+the memory used by one model does not count towards the next. This requires
+OpenFF NAGL and the OpenFF Toolkit::
+
+    $ python devtools/benchmarks/charge_throughput.py --processes 8 --output throughput.json
+
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import pathlib
+import sys
+import time
+
+import numpy as np
+
+from openff.nagl_models._dynamic_fetch import KNOWN_HASHES, get_model
+
+DATASET_PATH = pathlib.Path(__file__).parent / "data" / "molecules.smi"
+
+# Set up in each worker process by _initialize_worker
+_MODEL = None
+_MOLECULES: list = []
+_READOUT_NAME = ""
+
+
+def _peak_rss() -> int | None:
+    """Return the peak resident memory of this process in bytes, where it can be measured."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kibibytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _initialize_worker(model_path, smiles, readout_name, torch_threads, ready) -> None:
+    global _MODEL, _MOLECULES, _READOUT_NAME
+
+    # CPU only, even where a GPU is available
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+
+    import torch
+    from openff.nagl.nn._models import GNNModel
+    from openff.toolkit import Molecule
+
+    if torch_threads is not None:
+        torch.set_num_threads(torch_threads)
+
+    _MODEL = GNNModel.load(model_path, eval_mode=True)
+    _MOLECULES = [Molecule.from_smiles(smi, allow_undefined_stereo=True) for smi in smiles]
+    _READOUT_NAME = readout_name
+
+    # warm up, so that lazy initialization in PyTorch isn't timed
+    _MODEL.compute_property(_MOLECULES[0], readout_name=_READOUT_NAME, as_numpy=True)
+
+    # wait until every worker is ready, so that no worker starts early
+    ready.wait()
+
+
+def _assign_charges(indices: range) -> tuple[int, list[float], int | None]:
+    """Assign charges to some of the molecules, returning the process ID, time per molecule and peak memory."""
+    latencies = []
+    for index in indices:
+        start = time.perf_counter()
+        _MODEL.compute_property(_MOLECULES[index], readout_name=_READOUT_NAME, as_numpy=True)
+        latencies.append(time.perf_counter() - start)
+    return os.getpid(), latencies, _peak_rss()
+
+
+def run_benchmark(
+    model_path: str,
+    smiles: list[str],
+    processes: int,
+    chunk_size: int,
+    readout_name: str = "am1bcc_charges",
+    torch_threads: int | None = None,
+) -> dict:
+    """
+    Assign charges to every molecule with a pool of ``processes`` new processes.
+
+    Returns a dictionary of the throughput, latency percentiles in milliseconds
+    and peak memory in bytes, summed over and for the largest of the workers.
+    """
+    context = multiprocessing.get_context("spawn")
+    # with a timeout, so that a worker failing to start fails the benchmark instead of hanging
+    ready = context.Barrier(processes + 1, timeout=600)
+    chunks = [range(start, min(start + chunk_size, len(smiles))) for start in range(0, len(smiles), chunk_size)]
+
+    with context.Pool(
+        processes,
+        initializer=_initialize_worker,
+        initargs=(model_path, smiles, readout_name, torch_threads, ready),
+    ) as pool:
+        ready.wait()
+        start = time.perf_counter()
+        results = pool.map(_assign_charges, chunks, chunksize=1)
+        elapsed = time.perf_counter() - start
+
+    latencies = np.array([latency for _, chunk_latencies, _ in results for latency in chunk_latencies]) * 1e3
+    peak_rss: dict[int, int] = {}
+    for pid, _, rss in results:
+        if rss is not None:
+            peak_rss[pid] = max(rss, peak_rss.get(pid, 0))
+
+    return {
+        "processes": processes,
+        "n_molecules": len(smiles),
+        "wall_time": elapsed,
+        "molecules_per_second": len(smiles) / elapsed,
+        "latency_ms": {
+            "mean": float(latencies.mean()),
+            "p50": float(np.percentile(latencies, 50)),
+            "p90": float(np.percentile(latencies, 90)),
+            "p99": float(np.percentile(latencies, 99)),
+            "max": float(latencies.max()),
+        },
+        "peak_rss_total": sum(peak_rss.values()) if peak_rss else None,
+        "peak_rss_per_process": max(peak_rss.values()) if peak_rss else None,
+    }
+
+
+def _format_bytes(n_bytes: int | None) -> str:
+    return "n/a" if n_bytes is None else f"{n_bytes / 2**20:.0f} MiB"
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=list(KNOWN_HASHES), help="model file names")
+    parser.add_argument("--dataset", type=pathlib.Path, default=DATASET_PATH, help="file with one SMILES per line")
+    parser.add_argument("--n-molecules", type=int, help="only use the first N molecules of the dataset")
+    parser.add_argument(
+        "--processes", type=int, default=os.cpu_count(), help="number of processes in the pool (default: CPU count)"
+    )
+    parser.add_argument("--chunk-size", type=int, default=50, help="molecules sent to a process at a time")
+    parser.add_argument("--readout-name", default="am1bcc_charges")
+    parser.add_argument(
+        "--torch-threads",
+        type=int,
+        help="PyTorch threads per process (default: PyTorch's default in a single process, 1 in a pool)",
+    )
+    parser.add_argument("--output", type=pathlib.Path, help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    smiles = [line.split()[0] for line in args.dataset.read_text().splitlines() if line.strip()]
+    smiles = smiles[: args.n_molecules]
+
+    results = []
+    for model in args.models:
+        model_path = get_model(model)
+        for processes in sorted({1, args.processes}):
+            torch_threads = args.torch_threads
+            if torch_threads is None and processes > 1:
+                # otherwise each process uses every core
+                torch_threads = 1
+            result = run_benchmark(
+                model_path,
+                smiles,
+                processes=processes,
+                # a single process doesn't need its work split up
+                chunk_size=len(smiles) if processes == 1 else args.chunk_size,
+                readout_name=args.readout_name,
+                torch_threads=torch_threads,
+            )
+            result["model"] = model
+            result["torch_threads"] = torch_threads
+            results.append(result)
+
+            latency = result["latency_ms"]
+            print(
+                f"{model:<40} {processes:>3} process(es) "
+                f"{result['molecules_per_second']:>9.1f} mol/s  "
+                f"p50 {latency['p50']:>7.2f} ms  p90 {latency['p90']:>7.2f} ms  p99 {latency['p99']:>7.2f} ms  "
+                f"peak RSS {_format_bytes(result['peak_rss_per_process'])}/process, "
+                f"{_format_bytes(result['peak_rss_total'])} total",
+                flush=True,
+            )
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Generate the molecules used by ``charge_throughput.py``.
+
+The dataset is built from fixed lists of substituents, so that it is the same
+on every machine and can be regenerated without a cheminformatics toolkit:
+
+* benzenes with two substituents ortho, meta or para to each other
+* pyridines, thiophenes and furans with one substituent at each position
+* chains of 2-7 carbons with a substituent at each end
+* rings with one substituent
+
+The output is committed as ``data/molecules.smi``; regenerate it with::
+
+    $ python devtools/benchmarks/generate_molecules.py
+
+"""
+
+import pathlib
+
+OUTPUT_PATH = pathlib.Path(__file__).parent / "data" / "molecules.smi"
+
+ALKYLS = ["C", "CC", "C(C)C", "C(C)(C)C"]
+
+# Written as they would be inside a branch, starting at the atom that is attached to the scaffold
+SUBSTITUENTS = [
+    *ALKYLS,
+    "C(F)(F)F",
+    "F",
+    "Cl",
+    "Br",
+    "O",
+    "OC",
+    "N",
+    "N(C)C",
+    "C#N",
+    "C=O",
+    "C(=O)C",
+    "C(=O)O",
+    "C(=O)OC",
+    "C(=O)N",
+    "NC(=O)C",
+    "S",
+    "SC",
+    "S(=O)(=O)N",
+    "[N+](=O)[O-]",
+    "C(=O)[O-]",
+    "C[NH3+]",
+]
+
+# An alkyl group at either end of a chain, other than a branched one at the end, would only make it longer
+FUNCTIONAL_GROUPS = [substituent for substituent in SUBSTITUENTS if substituent not in ALKYLS]
+
+# Each position that is not equivalent to another by symmetry
+HETEROAROMATICS = [
+    "n1c{}cccc1",
+    "n1cc{}ccc1",
+    "n1ccc{}cc1",
+    "s1c{}ccc1",
+    "s1cc{}cc1",
+    "o1c{}ccc1",
+    "o1cc{}cc1",
+]
+
+RINGS = [
+    "C1{}CC1",
+    "C1{}CCC1",
+    "C1{}CCCC1",
+    "C1{}CCCCC1",
+    "C1{}CCOCC1",
+    "C1{}CCNCC1",
+    "N1{}CCOCC1",
+    "N1{}CCCCC1",
+]
+
+
+def _substituted(template: str, substituents: list[str]) -> str:
+    """Attach substituents to the first atoms of ``template`` with an explicit branch."""
+    for substituent in substituents:
+        template = template.replace("{}", f"({substituent})", 1)
+    return template
+
+
+def generate_molecules() -> list[str]:
+    molecules = []
+    pairs = [(a, b) for i, a in enumerate(SUBSTITUENTS) for b in SUBSTITUENTS[i:]]
+
+    for a, b in pairs:
+        molecules.append(_substituted("c1{}ccc{}cc1", [a, b]))
+        molecules.append(_substituted("c1{}cc{}ccc1", [a, b]))
+        molecules.append(_substituted("c1{}c{}cccc1", [a, b]))
+
+    for template in HETEROAROMATICS + RINGS:
+        for substituent in SUBSTITUENTS:
+            molecules.append(_substituted(template, [substituent]))
+
+    chain_pairs = [(a, b) for i, a in enumerate(FUNCTIONAL_GROUPS) for b in FUNCTIONAL_GROUPS[i:] + ALKYLS[2:]]
+    for n_carbons in range(2, 8):
+        for a, b in chain_pairs:
+            molecules.append(f"C({a}){'C' * (n_carbons - 2)}C{b}")
+
+    return sorted(set(molecules))
+
+
+if __name__ == "__main__":
+    molecules = generate_molecules()
+    OUTPUT_PATH.parent.mkdir(exist_ok=True)
+    OUTPUT_PATH.write_text("\n".join(molecules) + "\n")
+    print(f"Wrote {len(molecules)} molecules to {OUTPUT_PATH}")
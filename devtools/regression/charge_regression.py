@@ -0,0 +1,289 @@
+"""
+Compare the charges assigned by different models, or versions of a model.
+
+``compute`` assigns charges to a set of molecules with each model, in batches
+spread over a pool of processes, and stores them in one compressed NumPy file
+per model, named after the model. Each file holds:
+
+* ``smiles``: the SMILES of each molecule
+* ``charges``: the partial charge of every atom, as float32, molecule after molecule
+* ``offsets``: where the charges of each molecule start, followed by the total number of atoms
+* ``model`` and ``sha256``: the name and hash of the model file
+
+``compare`` compares the charges of one or more models with a reference, per
+atom and per molecule, and fails if any atom differs by more than
+``--tolerance``. Stored charges can be kept as references, so that a new
+release only needs its own charges computed::
+
+    $ python devtools/regression/charge_regression.py compute --output-dir charges/
+    $ python devtools/regression/charge_regression.py compute --models openff-gnn-am1bcc-1.1.0.pt --output-dir charges/
+    $ python devtools/regression/charge_regression.py compare charges/openff-gnn-am1bcc-1.0.0.npz charges/*.npz
+
+Computing charges requires OpenFF NAGL and the OpenFF Toolkit, but comparing them only requires NumPy.
+"""
+
+import argparse
+import csv
+import dataclasses
+import multiprocessing
+import os
+import pathlib
+import sys
+
+import numpy as np
+
+DATASET_PATH = pathlib.Path(__file__).parents[1] / "benchmarks" / "data" / "molecules.smi"
+
+# Set up in each worker process by _initialize_worker
+_MODEL = None
+_READOUT_NAME = ""
+
+
+@dataclasses.dataclass
+class ChargeSet:
+    """The charges assigned by a model to a set of molecules."""
+
+    smiles: np.ndarray
+    charges: np.ndarray
+    offsets: np.ndarray
+    """``charges[offsets[i]:offsets[i + 1]]`` are the charges of molecule ``i``."""
+    model: str = ""
+    sha256: str = ""
+
+    @property
+    def n_atoms(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def save(self, path: pathlib.Path) -> None:
+        np.savez_compressed(
+            path,
+            smiles=self.smiles,
+            charges=self.charges,
+            offsets=self.offsets,
+            model=np.array(self.model),
+            sha256=np.array(self.sha256),
+        )
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "ChargeSet":
+        with np.load(path) as data:
+            return cls(
+                smiles=data["smiles"],
+                charges=data["charges"],
+                offsets=data["offsets"],
+                model=str(data["model"]),
+                sha256=str(data["sha256"]),
+            )
+
+    def select(self, indices: np.ndarray) -> "ChargeSet":
+        """Return the charges of the molecules at ``indices``, in that order."""
+        n_atoms = self.n_atoms[indices]
+        offsets = np.concatenate([[0], np.cumsum(n_atoms)])
+        # the index of each selected atom in self.charges
+        atoms = np.repeat(self.offsets[:-1][indices] - offsets[:-1], n_atoms) + np.arange(offsets[-1])
+        return ChargeSet(self.smiles[indices], self.charges[atoms], offsets, self.model, self.sha256)
+
+
+def _initialize_worker(model_path: str, readout_name: str) -> None:
+    global _MODEL, _READOUT_NAME
+
+    # charges should not depend on whether a GPU is available
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+
+    import torch
+    from openff.nagl.nn._models import GNNModel
+
+    # the pool already uses every core
+    torch.set_num_threads(1)
+
+    _MODEL = GNNModel.load(model_path, eval_mode=True)
+    _READOUT_NAME = readout_name
+
+
+def _assign_charges(smiles: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Assign charges to a batch of molecules, returning them concatenated with the number of atoms of each."""
+    from openff.toolkit import Molecule
+
+    charges = [
+        _MODEL.compute_property(
+            Molecule.from_smiles(smi, allow_undefined_stereo=True), readout_name=_READOUT_NAME, as_numpy=True
+        ).astype(np.float32)
+        for smi in smiles
+    ]
+    return np.concatenate(charges), np.array([len(molecule_charges) for molecule_charges in charges])
+
+
+def compute_charges(
+    model: str,
+    smiles: list[str],
+    batch_size: int = 100,
+    processes: int | None = None,
+    readout_name: str = "am1bcc_charges",
+) -> ChargeSet:
+    """Assign charges to every molecule with a model, which is found or downloaded with ``get_model``."""
+    from openff.nagl_models._dynamic_fetch import _get_sha256, get_model
+
+    model_path = get_model(model)
+    batches = [smiles[start : start + batch_size] for start in range(0, len(smiles), batch_size)]
+
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes, initializer=_initialize_worker, initargs=(model_path, readout_name)) as pool:
+        results = pool.map(_assign_charges, batches, chunksize=1)
+
+    n_atoms = np.concatenate([batch_n_atoms for _, batch_n_atoms in results])
+    return ChargeSet(
+        smiles=np.array(smiles),
+        charges=np.concatenate([batch_charges for batch_charges, _ in results]),
+        offsets=np.concatenate([[0], np.cumsum(n_atoms)]),
+        model=model,
+        sha256=_get_sha256(model_path),
+    )
+
+
+@dataclasses.dataclass
+class Comparison:
+    """Differences between the charges of a candidate and a reference, for the molecules in both."""
+
+    reference: ChargeSet
+    candidate: ChargeSet
+    mismatched: np.ndarray
+    """SMILES in both sets whose number of atoms differ, which are left out."""
+
+    @classmethod
+    def from_charge_sets(cls, reference: ChargeSet, candidate: ChargeSet) -> "Comparison":
+        _, reference_indices, candidate_indices = np.intersect1d(
+            reference.smiles, candidate.smiles, assume_unique=True, return_indices=True
+        )
+        same_size = reference.n_atoms[reference_indices] == candidate.n_atoms[candidate_indices]
+        return cls(
+            reference=reference.select(reference_indices[same_size]),
+            candidate=candidate.select(candidate_indices[same_size]),
+            mismatched=reference.smiles[reference_indices[~same_size]],
+        )
+
+    @property
+    def smiles(self) -> np.ndarray:
+        return self.reference.smiles
+
+    @property
+    def deltas(self) -> np.ndarray:
+        """The change in the charge of every atom."""
+        return self.candidate.charges.astype(np.float64) - self.reference.charges
+
+    def _per_molecule(self, ufunc: np.ufunc, values: np.ndarray) -> np.ndarray:
+        if not len(self.smiles):
+            return np.zeros(0)
+        return ufunc.reduceat(values, self.reference.offsets[:-1])
+
+    @property
+    def molecule_rmse(self) -> np.ndarray:
+        return np.sqrt(self._per_molecule(np.add, self.deltas**2) / self.reference.n_atoms)
+
+    @property
+    def molecule_max_deviation(self) -> np.ndarray:
+        return self._per_molecule(np.maximum, np.abs(self.deltas))
+
+    @property
+    def molecule_net_charge_shift(self) -> np.ndarray:
+        """The change in the total charge of each molecule, which should be close to zero."""
+        return self._per_molecule(np.add, self.deltas)
+
+    def summary(self) -> dict:
+        deltas = self.deltas
+        max_deviation = self.molecule_max_deviation
+        worst = int(np.argmax(max_deviation)) if len(max_deviation) else None
+        return {
+            "reference": self.reference.model,
+            "candidate": self.candidate.model,
+            "n_molecules": len(self.smiles),
+            "n_atoms": len(deltas),
+            "n_mismatched": len(self.mismatched),
+            "rmse": float(np.sqrt(np.mean(deltas**2))) if len(deltas) else 0.0,
+            "mean_molecule_rmse": float(self.molecule_rmse.mean()) if len(deltas) else 0.0,
+            "p95_max_deviation": float(np.percentile(max_deviation, 95)) if len(deltas) else 0.0,
+            "max_deviation": float(max_deviation[worst]) if worst is not None else 0.0,
+            "max_net_charge_shift": float(np.abs(self.molecule_net_charge_shift).max()) if len(deltas) else 0.0,
+            "worst_molecule": str(self.smiles[worst]) if worst is not None else None,
+        }
+
+    def write_per_molecule(self, path: pathlib.Path) -> None:
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["smiles", "n_atoms", "rmse", "max_deviation", "net_charge_shift"])
+            writer.writerows(
+                zip(
+                    self.smiles,
+                    self.reference.n_atoms,
+                    self.molecule_rmse,
+                    self.molecule_max_deviation,
+                    self.molecule_net_charge_shift,
+                )
+            )
+
+
+def _compute(args: argparse.Namespace) -> int:
+    from openff.nagl_models._dynamic_fetch import KNOWN_HASHES
+
+    smiles = [line.split()[0] for line in args.dataset.read_text().splitlines() if line.strip()]
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    for model in args.models or list(KNOWN_HASHES):
+        charge_set = compute_charges(model, smiles, args.batch_size, args.processes, args.readout_name)
+        path = args.output_dir / f"{pathlib.Path(model).stem}.npz"
+        charge_set.save(path)
+        print(f"Wrote the charges of {len(smiles)} molecules from {model} to {path}", flush=True)
+    return 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    reference = ChargeSet.load(args.reference)
+    columns = ["n_molecules", "rmse", "mean_molecule_rmse", "p95_max_deviation", "max_deviation"]
+    print(f"{'candidate':<40}" + "".join(f"{column:>20}" for column in columns))
+
+    failed = False
+    for path in args.candidates:
+        comparison = Comparison.from_charge_sets(reference, ChargeSet.load(path))
+        summary = comparison.summary()
+        print(
+            f"{summary['candidate']:<40}"
+            + f"{summary['n_molecules']:>20}"
+            + "".join(f"{summary[column]:>20.6f}" for column in columns[1:])
+        )
+        if summary["n_mismatched"]:
+            print(f"  {summary['n_mismatched']} molecules have a different number of atoms and were left out")
+        if args.tolerance is not None and summary["max_deviation"] > args.tolerance:
+            print(f"  exceeds the tolerance of {args.tolerance}, most of all for {summary['worst_molecule']}")
+            failed = True
+        if args.per_molecule_dir is not None:
+            args.per_molecule_dir.mkdir(parents=True, exist_ok=True)
+            comparison.write_per_molecule(args.per_molecule_dir / f"{path.stem}.csv")
+    return 1 if failed else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(required=True)
+
+    compute = subparsers.add_parser("compute", help="assign and store charges")
+    compute.add_argument("--models", nargs="+", help="model file names (default: every model in KNOWN_HASHES)")
+    compute.add_argument("--dataset", type=pathlib.Path, default=DATASET_PATH, help="file with one SMILES per line")
+    compute.add_argument("--output-dir", type=pathlib.Path, required=True)
+    compute.add_argument("--batch-size", type=int, default=100, help="molecules sent to a process at a time")
+    compute.add_argument("--processes", type=int, help="number of processes (default: CPU count)")
+    compute.add_argument("--readout-name", default="am1bcc_charges")
+    compute.set_defaults(run=_compute)
+
+    compare = subparsers.add_parser("compare", help="compare stored charges with a reference")
+    compare.add_argument("reference", type=pathlib.Path)
+    compare.add_argument("candidates", type=pathlib.Path, nargs="+")
+    compare.add_argument("--tolerance", type=float, help="fail if any atom's charge changes by more than this")
+    compare.add_argument(
+        "--per-molecule-dir", type=pathlib.Path, help="write the differences for each molecule to CSV files here"
+    )
+    compare.set_defaults(run=_compare)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
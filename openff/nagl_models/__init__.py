@@ -3,24 +3,73 @@ OpenFF NAGL Models
 Models used with NAGL
 """
 
-from importlib.metadata import version
-
-from openff.nagl_models.openff_nagl_models import (
-    get_models_by_type,
-    get_nagl_model_dirs_paths,
-    list_available_nagl_models,
-    load_nagl_model_directory_entry_points,
-    validate_nagl_model_path,
-)
+import importlib
+from typing import TYPE_CHECKING
+
+# Attributes are only imported when they are first used, so that importing this package
+# (e.g. to call the ``get_nagl_model_dirs_paths`` entry point) stays cheap
+_LAZY_ATTRIBUTES = {
+    "ModelResolver": "openff.nagl_models.openff_nagl_models",
+    "clear_nagl_model_directory_cache": "openff.nagl_models.openff_nagl_models",
+    "get_latest_model": "openff.nagl_models.openff_nagl_models",
+    "get_models_by_type": "openff.nagl_models.openff_nagl_models",
+    "get_nagl_model_dirs_paths": "openff.nagl_models.openff_nagl_models",
+    "list_available_nagl_models": "openff.nagl_models.openff_nagl_models",
+    "load_nagl_model_directory_entry_points": "openff.nagl_models.openff_nagl_models",
+    "validate_nagl_model_path": "openff.nagl_models.openff_nagl_models",
+    "get_model": "openff.nagl_models._dynamic_fetch",
+    "get_model_buffer": "openff.nagl_models._dynamic_fetch",
+    "rebuild_model_catalog": "openff.nagl_models._dynamic_fetch",
+    "clear_loaded_model_cache": "openff.nagl_models._loading",
+    "load_model": "openff.nagl_models._loading",
+}
+
+if TYPE_CHECKING:
+    from openff.nagl_models._dynamic_fetch import get_model, get_model_buffer, rebuild_model_catalog
+    from openff.nagl_models._loading import clear_loaded_model_cache, load_model
+    from openff.nagl_models.openff_nagl_models import (
+        ModelResolver,
+        clear_nagl_model_directory_cache,
+        get_latest_model,
+        get_models_by_type,
+        get_nagl_model_dirs_paths,
+        list_available_nagl_models,
+        load_nagl_model_directory_entry_points,
+        validate_nagl_model_path,
+    )
+
+    __version__: str
 
 __all__ = (
+    "ModelResolver",
+    "clear_loaded_model_cache",
+    "clear_nagl_model_directory_cache",
+    "get_latest_model",
     "get_model",
+    "get_model_buffer",
     "get_models_by_type",
     "get_nagl_model_dirs_paths",
     "list_available_nagl_models",
+    "load_model",
     "load_nagl_model_directory_entry_points",
+    "rebuild_model_catalog",
     "validate_nagl_model_path",
 )
 
-__version__ = version("openff.nagl_models")
-from openff.nagl_models._dynamic_fetch import get_model
+
+def __getattr__(name: str):
+    if name == "__version__":
+        from importlib.metadata import version
+
+        value = version("openff.nagl_models")
+    elif name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_LAZY_ATTRIBUTES, "__version__"})
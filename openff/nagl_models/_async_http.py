@@ -0,0 +1,209 @@
+"""
+A minimal asynchronous HTTP/1.1 client, kept apart from :mod:`openff.nagl_models._http`
+so that only asynchronous downloads import :mod:`asyncio`.
+"""
+
+import asyncio
+import email.message
+import http.client
+import ssl
+import urllib.error
+import urllib.parse
+from collections.abc import AsyncIterator, Awaitable
+from typing import TypeVar
+
+from openff.nagl_models import _http
+from openff.nagl_models._http import _MAX_REDIRECTS, _REDIRECT_CODES, USER_AGENT
+
+_T = TypeVar("_T")
+
+
+async def _within(awaitable: Awaitable[_T], timeout: float | None) -> _T:  # noqa: UP047
+    """Wait for ``awaitable``, raising :class:`TimeoutError` if it takes longer than ``timeout`` seconds."""
+    return await asyncio.wait_for(awaitable, timeout)
+
+
+class AsyncResponse:
+    """The status, headers and streamed body of a response from :func:`async_request`."""
+
+    def __init__(
+        self,
+        url: str,
+        status: int,
+        reason: str,
+        headers: email.message.Message,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        timeout: float | None = None,
+    ):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self._reader = reader
+        self._writer = writer
+        self._timeout = timeout
+
+    async def _readline(self) -> bytes:
+        return await _within(self._reader.readline(), self._timeout)
+
+    async def _read(self, size: int) -> bytes:
+        return await _within(self._reader.read(size), self._timeout)
+
+    async def iter_chunks(self, chunk_size: int = 1 << 16) -> AsyncIterator[bytes]:
+        """Yield the body of the response as it arrives."""
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size_line = await self._readline()
+                size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+                if size == 0:
+                    # skip any trailers
+                    while (await self._readline()).strip():
+                        pass
+                    return
+                remaining = size
+                while remaining:
+                    chunk = await self._read(min(remaining, chunk_size))
+                    if not chunk:
+                        raise asyncio.IncompleteReadError(b"", remaining)
+                    remaining -= len(chunk)
+                    yield chunk
+                await self._readline()
+        elif "Content-Length" in self.headers:
+            remaining = int(self.headers["Content-Length"])
+            while remaining:
+                chunk = await self._read(min(remaining, chunk_size))
+                if not chunk:
+                    raise asyncio.IncompleteReadError(b"", remaining)
+                remaining -= len(chunk)
+                yield chunk
+        else:
+            while chunk := await self._read(chunk_size):
+                yield chunk
+
+    async def read(self) -> bytes:
+        """Read the whole body of the response."""
+        return b"".join([chunk async for chunk in self.iter_chunks()])
+
+    async def close(self) -> None:
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except (ConnectionError, ssl.SSLError):
+            pass
+
+    async def __aenter__(self) -> "AsyncResponse":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+
+class ThreadedResponse:
+    """
+    A response from :func:`openff.nagl_models._http.request`, read in the default
+    executor, with the same interface as :class:`AsyncResponse`.
+
+    :func:`async_request` returns these for requests that go through a proxy.
+    """
+
+    def __init__(self, response: "_http.PooledResponse | http.client.HTTPResponse"):
+        self._response = response
+        self.url = response.url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+
+    async def iter_chunks(self, chunk_size: int = 1 << 16) -> AsyncIterator[bytes]:
+        """Yield the body of the response as it arrives."""
+        loop = asyncio.get_running_loop()
+        while chunk := await loop.run_in_executor(None, self._response.read, chunk_size):
+            yield chunk
+
+    async def read(self) -> bytes:
+        """Read the whole body of the response."""
+        return b"".join([chunk async for chunk in self.iter_chunks()])
+
+    async def close(self) -> None:
+        self._response.close()
+
+    async def __aenter__(self) -> "ThreadedResponse":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+
+async def _open(url: str, headers: dict[str, str], timeout: float | None) -> AsyncResponse:
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in {"http", "https"}:
+        raise ValueError(f"Unsupported URL scheme in {url}")
+    use_ssl = parts.scheme == "https"
+    host = parts.hostname or ""
+    port = parts.port or (443 if use_ssl else 80)
+
+    reader, writer = await _within(
+        asyncio.open_connection(host, port, ssl=ssl.create_default_context() if use_ssl else None), timeout
+    )
+
+    target = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+    request_headers = {
+        "Host": parts.netloc,
+        "User-Agent": USER_AGENT,
+        "Accept-Encoding": "identity",
+        "Connection": "close",
+        **headers,
+    }
+    request = f"GET {target} HTTP/1.1\r\n" + "".join(f"{key}: {value}\r\n" for key, value in request_headers.items())
+    try:
+        writer.write(request.encode("latin-1") + b"\r\n")
+        await _within(writer.drain(), timeout)
+
+        status_line = (await _within(reader.readline(), timeout)).decode("latin-1").rstrip("\r\n")
+        try:
+            _, status, *reason = status_line.split(" ", 2)
+            status_code = int(status)
+        except ValueError:
+            raise ConnectionError(f"Malformed HTTP status line from {url}: {status_line!r}")
+
+        response_headers = email.message.Message()
+        while line := (await _within(reader.readline(), timeout)).decode("latin-1").rstrip("\r\n"):
+            key, _, value = line.partition(":")
+            response_headers[key.strip()] = value.strip()
+    except BaseException:
+        writer.close()
+        raise
+
+    return AsyncResponse(url, status_code, reason[0] if reason else "", response_headers, reader, writer, timeout)
+
+
+async def async_request(url: str, headers: dict[str, str] | None = None) -> "AsyncResponse | ThreadedResponse":
+    """
+    Make a GET request without blocking the event loop, following redirects.
+
+    Connecting, and each read, time out after the ``timeout`` of the shared
+    connection pool. Requests that should go through a proxy configured in the
+    environment are made with :func:`openff.nagl_models._http.request` in the default executor instead.
+
+    Raises
+    ------
+    urllib.error.HTTPError
+        If the server responds with an error status, as :func:`urllib.request.urlopen` would.
+    """
+    headers = dict(headers or {})
+    if _http.uses_proxy(url):
+        loop = asyncio.get_running_loop()
+        return ThreadedResponse(await loop.run_in_executor(None, _http.request, url, headers))
+
+    for _ in range(_MAX_REDIRECTS + 1):
+        response = await _open(url, headers, _http._CONNECTION_POOL.timeout)
+        if response.status in _REDIRECT_CODES and "Location" in response.headers:
+            await response.close()
+            url = urllib.parse.urljoin(url, response.headers["Location"])
+            continue
+        if response.status >= 400:
+            await response.close()
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+        return response
+
+    raise urllib.error.HTTPError(url, 310, "Too many redirects", email.message.Message(), None)
@@ -0,0 +1,902 @@
+"""
+Bookkeeping for the on-disk model cache.
+
+Everything in here is keyed on an explicit cache directory so that callers
+(mostly :mod:`openff.nagl_models._dynamic_fetch`) stay in control of where
+the cache lives.
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import pathlib
+import re
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from collections.abc import Iterable
+
+HASH_RECORD_FILENAME = "verified_hashes.json"
+CATALOG_FILENAME = "catalog.json"
+RELEASE_METADATA_FILENAME = "release_metadata.json"
+USAGE_FILENAME = "usage.json"
+GC_LOCK_FILENAME = "gc.lock"
+BLOB_DIRECTORY = pathlib.Path("blobs", "sha256")
+
+# Read model files in 1 MiB chunks, so hashing never holds a whole model in memory
+_CHUNK_SIZE = 1 << 20
+
+
+def _atomic_write_json(path: pathlib.Path, data) -> None:
+    """Write ``data`` as JSON to ``path`` so readers only ever see a complete file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def _read_json(path: pathlib.Path, default):
+    """Read JSON from ``path``, returning ``default`` if it is missing or unreadable."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _stream_sha256(filename: str | os.PathLike) -> str:
+    """Hash a file in fixed-size chunks rather than reading it into memory at once."""
+    with open(filename, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _stream_digests(filename: str | os.PathLike, algorithms: Iterable[str]) -> dict[str, str]:
+    """Compute several digests of a file while reading it once, in fixed-size chunks."""
+    hashers = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+    with open(filename, "rb") as f:
+        while chunk := f.read(_CHUNK_SIZE):
+            for hasher in hashers.values():
+                hasher.update(chunk)
+    return {algorithm: hasher.hexdigest() for algorithm, hasher in hashers.items()}
+
+
+def _file_key(stat: os.stat_result) -> list[int]:
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns, stat.st_ino]
+
+
+class CacheLockTimeoutError(TimeoutError):
+    """Exception raised when a lock on a file in the cache could not be acquired in time."""
+
+
+class FileLock:
+    """
+    An exclusive lock shared between processes, held by creating a lock file.
+
+    The lock file is created with ``O_CREAT | O_EXCL``, which is atomic on local
+    and network file systems alike, and records the host, process ID and a unique
+    token of its owner. While the lock is held, its modification time is refreshed
+    in the background. A lock is considered stale, and is broken, if its owner
+    was a process on this host that no longer exists, or if it has not been
+    refreshed for ``stale_after`` seconds (e.g. because its owner on another node
+    was killed).
+
+    Parameters
+    ----------
+    path
+        The path of the lock file.
+    timeout
+        How long to wait for the lock, in seconds, before raising a
+        :class:`CacheLockTimeoutError`.
+    stale_after
+        How long, in seconds, a lock file can go without being refreshed before it is
+        considered stale.
+    poll_interval
+        How often to check whether the lock has been released, in seconds.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        timeout: float = 600.0,
+        stale_after: float = 60.0,
+        poll_interval: float = 0.1,
+    ):
+        self.path = pathlib.Path(path)
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+        self._token: str | None = None
+        self._stop_heartbeat = threading.Event()
+        self._heartbeat: threading.Thread | None = None
+
+    def _owner(self) -> dict | None:
+        owner = _read_json(self.path, None)
+        return owner if isinstance(owner, dict) else None
+
+    def _is_stale(self, owner: dict | None) -> bool:
+        # os.kill terminates the process on Windows rather than probing it, so
+        # only the age of the lock is checked there
+        if os.name != "nt" and owner is not None and owner.get("host") == socket.gethostname():
+            try:
+                os.kill(owner["pid"], 0)
+            except ProcessLookupError:
+                return True
+            except (OSError, KeyError, TypeError):
+                pass
+        try:
+            age = time.time() - self.path.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        return age > self.stale_after
+
+    def _break(self, owner: dict | None) -> None:
+        # only remove the lock if it wasn't re-acquired since it was found to be stale
+        if self._owner() == owner:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _refresh(self) -> None:
+        while not self._stop_heartbeat.wait(self.stale_after / 4):
+            try:
+                os.utime(self.path)
+            except OSError:
+                return
+
+    def acquire(self) -> None:
+        """Wait until the lock is acquired, breaking it if it is stale."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                owner = self._owner()
+                if self._is_stale(owner):
+                    self._break(owner)
+                    continue
+                if time.monotonic() > deadline:
+                    raise CacheLockTimeoutError(
+                        f"Timed out after {self.timeout} seconds waiting for the lock {self.path}, held by {owner}"
+                    )
+                time.sleep(self.poll_interval)
+                continue
+
+            with os.fdopen(fd, "w") as f:
+                json.dump({"host": socket.gethostname(), "pid": os.getpid(), "token": token}, f)
+            break
+
+        self._token = token
+        self._stop_heartbeat.clear()
+        self._heartbeat = threading.Thread(target=self._refresh, daemon=True)
+        self._heartbeat.start()
+
+    def release(self) -> None:
+        """Release the lock, if it is still held by this object."""
+        if self._heartbeat is not None:
+            self._stop_heartbeat.set()
+            self._heartbeat.join()
+            self._heartbeat = None
+
+        owner = self._owner()
+        if owner is not None and owner.get("token") == self._token:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+        self._token = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.release()
+
+
+class _JSONStore:
+    """
+    A JSON object mirrored between memory and a file in the cache directory.
+
+    Reads are served from memory, reloading the file only when its modification
+    time changes. Updates re-read the file, apply a change and atomically replace
+    it, so that concurrent writers don't leave a partially written file behind.
+    """
+
+    def __init__(self, path: pathlib.Path):
+        self.path = pathlib.Path(path)
+        self._data: dict = {}
+        self._loaded_mtime_ns: int | None = None
+        self._lock = threading.RLock()
+        self.generation = 0
+        """Incremented whenever the contents may have changed, so that data derived from them can be cached."""
+
+    def _file_mtime_ns(self) -> int | None:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _reload_if_changed(self) -> None:
+        mtime_ns = self._file_mtime_ns()
+        if mtime_ns != self._loaded_mtime_ns:
+            data = _read_json(self.path, {}) if mtime_ns is not None else {}
+            self._data = data if isinstance(data, dict) else {}
+            self._loaded_mtime_ns = mtime_ns
+            self.generation += 1
+
+    def _update(self, change) -> None:
+        """Apply ``change`` to the latest contents of the file and write them back."""
+        with self._lock:
+            # keep the change in memory even if it can't be written
+            change(self._data)
+            try:
+                # other processes may be updating the same file
+                with FileLock(self.path.with_name(self.path.name + ".lock"), timeout=30):
+                    data = _read_json(self.path, {})
+                    if not isinstance(data, dict):
+                        data = {}
+                    change(data)
+                    _atomic_write_json(self.path, data)
+            except (OSError, CacheLockTimeoutError):
+                # the store is only an optimization, e.g. the cache may be read-only
+                self.generation += 1
+                return
+            self._data = data
+            self._loaded_mtime_ns = self._file_mtime_ns()
+            self.generation += 1
+
+
+class VerifiedHashRecord(_JSONStore):
+    """
+    A persistent record of the SHA256 hashes of files that have already been hashed.
+
+    Entries are keyed on the resolved path of a file together with its size,
+    modification/change times and inode, so an unchanged file is trusted without
+    being read again while any modification forces it to be re-hashed. Other
+    digests of a file, like the MD5 checksums published by Zenodo, are kept
+    alongside its SHA256 hash. The record is kept in memory and mirrored to a JSON
+    file so that it is shared between processes using the same cache directory.
+    """
+
+    def _entry(self, path: str, key: list[int]) -> list | None:
+        """Return the entry for ``path`` if it was recorded for a file with this key."""
+        with self._lock:
+            entry = self._data.get(path)
+            if entry is None or entry[: len(key)] != key:
+                # another process may have hashed it in the meantime
+                self._reload_if_changed()
+                entry = self._data.get(path)
+            if entry is not None and entry[: len(key)] == key:
+                return entry
+        return None
+
+    def get_sha256(self, filename: str | os.PathLike) -> str:
+        """Return the SHA256 hash of ``filename``, hashing it only if it is new or has changed."""
+        path = os.path.realpath(filename)
+        key = _file_key(os.stat(path))
+
+        entry = self._entry(path, key)
+        if entry is not None:
+            return entry[len(key)]
+
+        sha256 = _stream_sha256(path)
+        self.record(path, sha256)
+        return sha256
+
+    def recorded_sha256(self, filename: str | os.PathLike) -> str | None:
+        """Return the recorded SHA256 hash of ``filename`` if it is unchanged since it was hashed, or None."""
+        path = os.path.realpath(filename)
+        try:
+            key = _file_key(os.stat(path))
+        except OSError:
+            return None
+        entry = self._entry(path, key)
+        return None if entry is None else entry[len(key)]
+
+    def get_digest(self, filename: str | os.PathLike, algorithm: str) -> str:
+        """Return the hex digest of ``filename`` with ``algorithm``, hashing it only if it is new or has changed."""
+        if algorithm == "sha256":
+            return self.get_sha256(filename)
+        path = os.path.realpath(filename)
+        key = _file_key(os.stat(path))
+
+        entry = self._entry(path, key)
+        digests = entry[len(key) + 1] if entry is not None and len(entry) > len(key) + 1 else {}
+        if algorithm in digests:
+            return digests[algorithm]
+
+        # the SHA256 hash is needed for any new entry, so compute it in the same pass
+        computed = _stream_digests(path, {"sha256", algorithm})
+        digests = {**digests, algorithm: computed[algorithm]}
+        entry = [*key, computed["sha256"], digests]
+        self._update(lambda data: data.__setitem__(path, entry))
+        return computed[algorithm]
+
+    def record(self, filename: str | os.PathLike, sha256: str) -> None:
+        """Record the hash of ``filename``, e.g. if it was computed while the file was written."""
+        path = os.path.realpath(filename)
+        entry = [*_file_key(os.stat(path)), sha256]
+        self._update(lambda data: data.__setitem__(path, entry))
+
+    def forget(self, filename: str | os.PathLike) -> None:
+        """Drop any record of ``filename``, forcing it to be re-hashed next time."""
+        path = os.path.realpath(filename)
+        self._update(lambda data: data.pop(path, None))
+
+
+_MODEL_NAME_PATTERN = re.compile(r"openff-gnn-(?P<model_type>[^-]+)-(?P<version>.+)\.pt")
+
+
+def _parse_model_name(name: str) -> tuple[str | None, str | None]:
+    """Return the model type and version of a file named ``openff-gnn-<model_type>-<version>.pt``."""
+    from packaging.version import InvalidVersion, Version
+
+    match = _MODEL_NAME_PATTERN.fullmatch(name)
+    if match is None:
+        return None, None
+    try:
+        return match["model_type"], str(Version(match["version"]))
+    except InvalidVersion:
+        return None, None
+
+
+def _catalog_path(path: str | os.PathLike) -> str:
+    """Return the absolute path of a file, resolving symlinks in its directory but not the file itself."""
+    directory, name = os.path.split(os.path.abspath(path))
+    return pathlib.Path(os.path.realpath(directory), name).as_posix()
+
+
+@dataclasses.dataclass(frozen=True)
+class CatalogEntry:
+    """A model file recorded in the catalog."""
+
+    name: str
+    path: str
+    size: int
+    sha256: str | None
+    model_type: str | None
+    version: str | None
+    source: str
+    """Where the file lives: ``"cache"`` for downloads, ``"installed"`` for entry point directories."""
+
+    @classmethod
+    def from_file(cls, path: str | os.PathLike, source: str, sha256: str | None = None) -> "CatalogEntry":
+        # symlinked files keep their own name, e.g. cached models linked to a blob
+        path = pathlib.Path(_catalog_path(path))
+        model_type, version = _parse_model_name(path.name)
+        return cls(
+            name=path.name,
+            path=path.as_posix(),
+            size=path.stat().st_size,
+            sha256=sha256,
+            model_type=model_type,
+            version=version,
+            source=source,
+        )
+
+
+class ModelCatalog(_JSONStore):
+    """
+    A persistent catalog of the model files that are cached or installed.
+
+    Listing and querying models reads the catalog instead of walking the
+    cache directory, which is slow on network file systems. Cached files are
+    recorded in the catalog file as they are downloaded. If the catalog file
+    does not exist yet, it is populated by scanning the cache directory once.
+
+    Installed files are only kept in memory, synchronized from an already-indexed
+    listing of the entry point directories, because environments that share a
+    cache directory each have their own installed models.
+    """
+
+    def __init__(self, path: pathlib.Path, cache_dir: pathlib.Path):
+        super().__init__(path)
+        self.cache_dir = pathlib.Path(cache_dir)
+        self._installed: dict[str, dict] = {}
+
+    def _ensure_loaded(self) -> None:
+        with self._lock:
+            self._reload_if_changed()
+            if self._loaded_mtime_ns is None:
+                self.rebuild()
+
+    def refresh(self) -> None:
+        """Reload the catalog if its file was changed, e.g. by another process."""
+        self._ensure_loaded()
+
+    def rebuild(self) -> None:
+        """
+        Re-scan the cache directory, replacing every cached entry in the catalog.
+
+        The hashes of files that haven't changed since they were verified are kept.
+        """
+        hashes = get_hash_record(self.cache_dir)
+        entries = {}
+        for path in self.cache_dir.rglob("*.pt"):
+            entry = CatalogEntry.from_file(path, source="cache", sha256=hashes.recorded_sha256(path))
+            entries[entry.path] = dataclasses.asdict(entry)
+
+        def change(data):
+            data.clear()
+            data.update(entries)
+
+        self._update(change)
+
+    def entries(
+        self,
+        source: str | None = None,
+        model_type: str | None = None,
+    ) -> list[CatalogEntry]:
+        """Return catalog entries, optionally only those from ``source`` or of ``model_type``."""
+        self._ensure_loaded()
+        with self._lock:
+            # files written by older versions may also record installed models
+            values = [value for value in self._data.values() if value["source"] == "cache"]
+            values += self._installed.values()
+        return [
+            CatalogEntry(**value)
+            for value in values
+            if (source is None or value["source"] == source)
+            and (model_type is None or value["model_type"] == model_type)
+        ]
+
+    def snapshot(self) -> tuple[int, list[CatalogEntry]]:
+        """Return every catalog entry, along with the generation of the catalog they were read from."""
+        with self._lock:
+            entries = self.entries()
+            return self.generation, entries
+
+    def find(self, name: str) -> list[CatalogEntry]:
+        """Return every catalog entry for a model file with this name."""
+        return [entry for entry in self.entries() if entry.name == name]
+
+    def find_by_hash(self, sha256: str) -> list[CatalogEntry]:
+        """Return every catalog entry for a model file with this SHA256 hash."""
+        return [entry for entry in self.entries() if entry.sha256 == sha256]
+
+    def add(self, entry: CatalogEntry) -> None:
+        """Add or replace the entry for a file."""
+        self._ensure_loaded()
+        self._update(lambda data: data.__setitem__(entry.path, dataclasses.asdict(entry)))
+
+    def remove(self, path: str | os.PathLike) -> None:
+        """Remove the entry for a file, e.g. if it was deleted."""
+        key = _catalog_path(path)
+        self._ensure_loaded()
+        if key in self._data:
+            self._update(lambda data: data.pop(key, None))
+
+    def sync_installed(self, paths: Iterable[pathlib.Path], known_hashes: dict[str, str]) -> None:
+        """Make the installed entries, which are not written to the catalog file, match ``paths``."""
+        installed = {_catalog_path(path) for path in paths}
+        with self._lock:
+            if installed == set(self._installed):
+                return
+
+            entries = {}
+            for path in installed:
+                entry = CatalogEntry.from_file(path, source="installed")
+                entry = dataclasses.replace(entry, sha256=known_hashes.get(entry.name))
+                entries[entry.path] = dataclasses.asdict(entry)
+            self._installed = entries
+            self.generation += 1
+
+
+class ReleaseMetadataRecord(_JSONStore):
+    """
+    The release metadata last fetched from GitHub.
+
+    Along with the releases themselves, this keeps the ``ETag`` and
+    ``Last-Modified`` validators needed to refresh them with a conditional
+    request, and the time at which they were last known to be current.
+    """
+
+    def load(self) -> dict | None:
+        """Return the stored ``releases``, ``etag``, ``last_modified``, ``saved_at`` and ``fetched_at``, if any."""
+        with self._lock:
+            self._reload_if_changed()
+            return self._data if "releases" in self._data else None
+
+    def save(self, releases: list[dict], etag: str | None, last_modified: str | None) -> None:
+        """Replace the stored release metadata with a freshly fetched copy."""
+        now = time.time()
+        record = {
+            "releases": releases,
+            "etag": etag,
+            "last_modified": last_modified,
+            "saved_at": now,
+            "fetched_at": now,
+        }
+
+        def change(data):
+            data.clear()
+            data.update(record)
+
+        self._update(change)
+
+    def mark_current(self) -> None:
+        """Record that the stored release metadata was just confirmed to be current."""
+        self._update(lambda data: data.__setitem__("fetched_at", time.time()))
+
+
+class BlobStore:
+    """
+    Content-addressed storage for model files in a cache directory.
+
+    Each distinct file is stored once, under ``blobs/sha256/<first two characters
+    of its hash>/<hash>``, and cached models are aliases of their blob: hard links
+    where the file system supports them, or symbolic links (or, as a last resort,
+    copies) otherwise. Byte-identical models with different names, or fetched from
+    different places, therefore take up space once, and any file with a known hash
+    can be provided from its blob without downloading it again.
+
+    A blob can still be modified through a hard-linked alias, so its contents are
+    checked against its hash, through the cache's :class:`VerifiedHashRecord`,
+    before it is reused.
+    """
+
+    def __init__(self, cache_dir: pathlib.Path):
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.root = self.cache_dir / BLOB_DIRECTORY
+
+    def path(self, sha256: str) -> pathlib.Path:
+        """Return where the blob with this hash is, or would be, stored."""
+        return self.root / sha256[:2] / sha256
+
+    def get(self, sha256: str) -> pathlib.Path | None:
+        """Return the path of the blob with this hash, if it is stored."""
+        path = self.path(sha256)
+        return path if path.is_file() else None
+
+    def get_verified(self, sha256: str) -> pathlib.Path | None:
+        """
+        Return the path of the blob with this hash, if it is stored and its contents still have this hash.
+
+        A blob that no longer matches its hash is removed from the store.
+        """
+        blob = self.get(sha256)
+        if blob is None:
+            return None
+        hashes = get_hash_record(self.cache_dir)
+        try:
+            if hashes.get_sha256(blob) == sha256:
+                return blob
+        except FileNotFoundError:
+            return None
+        hashes.forget(blob)
+        blob.unlink(missing_ok=True)
+        return None
+
+    def add(self, source: str | os.PathLike, sha256: str, move: bool = False) -> pathlib.Path:
+        """
+        Store a file whose hash is already known as a blob, and return the blob's path.
+
+        If ``move`` is True, the source file is moved into the store (or removed if an
+        intact blob already exists); otherwise it is hard linked, or copied if that
+        fails. A stored blob that no longer matches its hash is replaced.
+        """
+        blob = self.get_verified(sha256)
+        if blob is not None:
+            if move:
+                os.unlink(source)
+            return blob
+
+        blob = self.path(sha256)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        if move:
+            os.replace(source, blob)
+        else:
+            _link_or_copy(pathlib.Path(source), blob, allow_symlink=False)
+        get_hash_record(self.cache_dir).record(blob, sha256)
+        return blob
+
+    def link(self, sha256: str, alias: str | os.PathLike) -> None:
+        """Make ``alias`` refer to the blob with this hash, replacing any existing file."""
+        _link_or_copy(self.path(sha256), pathlib.Path(alias), allow_symlink=True)
+
+    def is_alias(self, path: str | os.PathLike, sha256: str) -> bool:
+        """Return whether ``path`` refers to the blob with this hash."""
+        try:
+            return os.path.samefile(path, self.path(sha256))
+        except OSError:
+            return False
+
+    def blobs(self) -> list[pathlib.Path]:
+        """Return the paths of every stored blob."""
+        return [path for path in self.root.glob("*/*") if path.is_file()]
+
+
+def _link_or_copy(source: pathlib.Path, destination: pathlib.Path, allow_symlink: bool) -> None:
+    """Atomically make ``destination`` a hard link to, symbolic link to, or copy of ``source``."""
+    tmp_path = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        os.link(source, tmp_path)
+    except FileNotFoundError:
+        # e.g. the blob was evicted, which a symbolic link would hide
+        raise
+    except OSError:
+        if allow_symlink:
+            try:
+                os.symlink(os.path.relpath(source, destination.parent), tmp_path)
+            except OSError:
+                shutil.copyfile(source, tmp_path)
+        else:
+            shutil.copyfile(source, tmp_path)
+
+    try:
+        os.replace(tmp_path, destination)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class CacheUsageRecord(_JSONStore):
+    """
+    When each cached model was last used, and which models are pinned in the cache.
+
+    Access times are only written when they are more than ``resolution`` seconds
+    newer than the recorded time, so that using a model many times in quick
+    succession doesn't rewrite the record every time.
+    """
+
+    def __init__(self, path: pathlib.Path, resolution: float = 60.0):
+        super().__init__(path)
+        self.resolution = resolution
+
+    def last_access(self, path: str | os.PathLike) -> float | None:
+        """Return when a cached file was last used, as a Unix timestamp, if that was recorded."""
+        with self._lock:
+            self._reload_if_changed()
+            return self._data.get("accessed", {}).get(_catalog_path(path))
+
+    def record_access(self, path: str | os.PathLike) -> None:
+        """Record that a cached file was just used."""
+        key, now = _catalog_path(path), time.time()
+        with self._lock:
+            previous = self._data.get("accessed", {}).get(key)
+        if previous is not None and now - previous < self.resolution:
+            return
+        self._update(lambda data: data.setdefault("accessed", {}).__setitem__(key, now))
+
+    def forget(self, path: str | os.PathLike) -> None:
+        """Drop the access time of a cached file, e.g. because it was deleted."""
+        key = _catalog_path(path)
+        self._update(lambda data: data.get("accessed", {}).pop(key, None))
+
+    def pinned(self) -> set[str]:
+        """Return the names of the models pinned with :meth:`pin`."""
+        with self._lock:
+            self._reload_if_changed()
+            return set(self._data.get("pinned", []))
+
+    def pin(self, name: str) -> None:
+        """Never evict cached models with this file name."""
+
+        def change(data):
+            data["pinned"] = sorted({*data.get("pinned", []), name})
+
+        self._update(change)
+
+    def unpin(self, name: str) -> None:
+        """Allow cached models with this file name to be evicted again."""
+
+        def change(data):
+            data["pinned"] = sorted(set(data.get("pinned", [])) - {name})
+
+        self._update(change)
+
+
+@dataclasses.dataclass
+class GarbageCollectionResult:
+    """What :func:`collect_garbage` removed from a cache directory."""
+
+    evicted: list[str] = dataclasses.field(default_factory=list)
+    """The paths of the model files that were removed."""
+    freed: int = 0
+    """The number of bytes freed."""
+    size: int = 0
+    """The size of the cached models afterwards, in bytes."""
+
+
+@dataclasses.dataclass
+class _StoredModel:
+    """Model files in the cache that share storage, and so can only be evicted together."""
+
+    size: int
+    last_access: float
+    paths: list[str] = dataclasses.field(default_factory=list)
+    blob: pathlib.Path | None = None
+    pinned: bool = False
+
+
+def _stored_models(
+    cache_dir: pathlib.Path,
+    pinned_names: set[str],
+    pinned_hashes: set[str],
+) -> list[_StoredModel]:
+    catalog, usage, blobs = get_catalog(cache_dir), get_usage_record(cache_dir), BlobStore(cache_dir)
+
+    # files are grouped by the storage they share rather than by their recorded hash, which
+    # may be missing, e.g. after the catalog was rebuilt
+    blob_files: dict[tuple[int, int], tuple[pathlib.Path, os.stat_result]] = {}
+    for blob_path in blobs.blobs():
+        stat = blob_path.stat()
+        blob_files[stat.st_dev, stat.st_ino] = (blob_path, stat)
+
+    stored: dict[tuple[int, int], _StoredModel] = {}
+    for entry in catalog.entries(source="cache"):
+        try:
+            # symbolic links to a blob are grouped with it
+            stat = os.stat(entry.path)
+        except OSError:
+            # removed by hand
+            catalog.remove(entry.path)
+            continue
+
+        key = (stat.st_dev, stat.st_ino)
+        blob = blob_files[key][0] if key in blob_files else None
+        model = stored.setdefault(key, _StoredModel(size=stat.st_size, last_access=0.0, blob=blob))
+        model.paths.append(entry.path)
+        # files that were cached before access times were recorded were last used when they were downloaded
+        last_access = usage.last_access(entry.path)
+        model.last_access = max(model.last_access, stat.st_mtime if last_access is None else last_access)
+        model.pinned |= (
+            entry.name in pinned_names
+            or entry.sha256 in pinned_hashes
+            or (blob is not None and blob.name in pinned_hashes)
+        )
+
+    # blobs that no cached model refers to, e.g. because it was removed by hand
+    for key, (blob, stat) in blob_files.items():
+        if key not in stored:
+            stored[key] = _StoredModel(
+                size=stat.st_size,
+                last_access=stat.st_mtime,
+                blob=blob,
+                pinned=blob.name in pinned_hashes,
+            )
+
+    return list(stored.values())
+
+
+def _evict(cache_dir: pathlib.Path, model: _StoredModel) -> bool:
+    """Remove a stored model and every file name referring to it, unless one is being downloaded."""
+    locks = [FileLock(path + ".lock", timeout=0) for path in model.paths]
+    acquired: list[FileLock] = []
+    try:
+        for lock in locks:
+            lock.acquire()
+            acquired.append(lock)
+    except CacheLockTimeoutError:
+        for lock in acquired:
+            lock.release()
+        return False
+
+    catalog, usage, hashes = get_catalog(cache_dir), get_usage_record(cache_dir), get_hash_record(cache_dir)
+    try:
+        # processes that already opened the files can keep reading them after they are unlinked
+        for path in model.paths:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            catalog.remove(path)
+            usage.forget(path)
+            hashes.forget(path)
+        if model.blob is not None:
+            try:
+                os.unlink(model.blob)
+            except FileNotFoundError:
+                pass
+            hashes.forget(model.blob)
+    finally:
+        for lock in acquired:
+            lock.release()
+    return True
+
+
+def collect_garbage(
+    cache_dir: pathlib.Path,
+    max_size: int | None,
+    pinned_names: Iterable[str] = (),
+    pinned_hashes: Iterable[str] = (),
+    min_age: float = 300.0,
+    timeout: float = 600.0,
+) -> GarbageCollectionResult:
+    """
+    Evict the least recently used models from a cache directory until it fits in ``max_size`` bytes.
+
+    Hard-linked file names of the same blob are evicted together, and count
+    once towards the size of the cache. Models are never evicted if they are
+    pinned, by file name or hash, if they were used in the last ``min_age``
+    seconds, or if they are locked because they are being downloaded. Only one
+    process collects garbage in a cache directory at a time; others wait up to
+    ``timeout`` seconds for it before raising :class:`CacheLockTimeoutError`.
+    """
+    cache_dir = pathlib.Path(cache_dir)
+    result = GarbageCollectionResult()
+    with FileLock(cache_dir / GC_LOCK_FILENAME, timeout=timeout):
+        stored = _stored_models(
+            cache_dir,
+            set(pinned_names) | get_usage_record(cache_dir).pinned(),
+            set(pinned_hashes),
+        )
+        result.size = sum(model.size for model in stored)
+        if max_size is None:
+            return result
+
+        now = time.time()
+        # blobs without any file names are evicted first
+        for model in sorted(stored, key=lambda model: (bool(model.paths), model.last_access)):
+            if result.size <= max_size:
+                break
+            if model.pinned or now - model.last_access < min_age:
+                continue
+            if _evict(cache_dir, model):
+                result.evicted.extend(model.paths)
+                result.freed += model.size
+                result.size -= model.size
+    return result
+
+
+_STORES: dict[tuple[type, pathlib.Path], _JSONStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_hash_record(cache_dir: pathlib.Path) -> VerifiedHashRecord:
+    """Return the process-wide :class:`VerifiedHashRecord` of a cache directory."""
+    cache_dir = pathlib.Path(cache_dir)
+    with _STORES_LOCK:
+        key = (VerifiedHashRecord, cache_dir)
+        if key not in _STORES:
+            _STORES[key] = VerifiedHashRecord(cache_dir / HASH_RECORD_FILENAME)
+        return _STORES[key]  # type: ignore[return-value]
+
+
+def get_catalog(cache_dir: pathlib.Path) -> ModelCatalog:
+    """Return the process-wide :class:`ModelCatalog` of a cache directory."""
+    cache_dir = pathlib.Path(cache_dir)
+    with _STORES_LOCK:
+        key = (ModelCatalog, cache_dir)
+        if key not in _STORES:
+            _STORES[key] = ModelCatalog(cache_dir / CATALOG_FILENAME, cache_dir)
+        return _STORES[key]  # type: ignore[return-value]
+
+
+def get_release_metadata_record(cache_dir: pathlib.Path) -> ReleaseMetadataRecord:
+    """Return the process-wide :class:`ReleaseMetadataRecord` of a cache directory."""
+    cache_dir = pathlib.Path(cache_dir)
+    with _STORES_LOCK:
+        key = (ReleaseMetadataRecord, cache_dir)
+        if key not in _STORES:
+            _STORES[key] = ReleaseMetadataRecord(cache_dir / RELEASE_METADATA_FILENAME)
+        return _STORES[key]  # type: ignore[return-value]
+
+
+def get_usage_record(cache_dir: pathlib.Path) -> CacheUsageRecord:
+    """Return the process-wide :class:`CacheUsageRecord` of a cache directory."""
+    cache_dir = pathlib.Path(cache_dir)
+    with _STORES_LOCK:
+        key = (CacheUsageRecord, cache_dir)
+        if key not in _STORES:
+            _STORES[key] = CacheUsageRecord(cache_dir / USAGE_FILENAME)
+        return _STORES[key]  # type: ignore[return-value]
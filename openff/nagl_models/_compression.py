@@ -0,0 +1,81 @@
+"""
+Compressed variants of model files, which are decompressed as they are downloaded.
+
+A model ``name.pt`` may also be published compressed, as ``name.pt.xz``,
+``name.pt.zst`` or ``name.pt.gz``. Public releases aren't, so these are only
+tried if ``OPENFF_NAGL_MODELS_COMPRESSED_SUFFIXES`` lists them (separated by
+commas or whitespace, like ``".xz .zst"``), for instance for a mirror that
+serves compressed copies to a slow or air-gapped network. Downloads then try
+each suffix in that order before the uncompressed file. Zstandard needs
+Python 3.14 or the ``zstandard`` package, and is skipped without them.
+"""
+
+import importlib.util
+import lzma
+import os
+import re
+import zlib
+from typing import Protocol
+
+# The suffixes of the compressed variants of a file that can be decompressed
+COMPRESSED_SUFFIXES = (".xz", ".zst", ".gz")
+
+
+class Decompressor(Protocol):
+    @property
+    def eof(self) -> bool: ...
+
+    @property
+    def unused_data(self) -> bytes: ...
+
+    def decompress(self, data: bytes, /) -> bytes: ...
+
+
+def _has_zstd() -> bool:
+    for name in ("compression.zstd", "zstandard"):
+        try:
+            if importlib.util.find_spec(name) is not None:
+                return True
+        except ImportError:
+            # the parent package of compression.zstd doesn't exist before Python 3.14
+            continue
+    return False
+
+
+def is_supported(suffix: str) -> bool:
+    """Whether files compressed with this suffix can be decompressed."""
+    if suffix == ".zst":
+        return _has_zstd()
+    return suffix in COMPRESSED_SUFFIXES
+
+
+def get_compressed_suffixes() -> list[str]:
+    """Return the suffixes of the compressed variants to try, in order, leaving out any that aren't supported."""
+    suffixes = os.environ.get("OPENFF_NAGL_MODELS_COMPRESSED_SUFFIXES", "").strip()
+    requested = re.split(r"[,\s]+", suffixes) if suffixes else []
+
+    unknown = set(requested) - set(COMPRESSED_SUFFIXES)
+    if unknown:
+        raise ValueError(
+            f"Unknown compressed suffixes {sorted(unknown)} in OPENFF_NAGL_MODELS_COMPRESSED_SUFFIXES, "
+            f"expected some of {list(COMPRESSED_SUFFIXES)}"
+        )
+    return [suffix for suffix in requested if is_supported(suffix)]
+
+
+def decompressor(suffix: str) -> Decompressor:
+    """Return an incremental decompressor for a file with this suffix."""
+    if suffix == ".xz":
+        return lzma.LZMADecompressor()
+    if suffix == ".gz":
+        # gzip header and trailer
+        return zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    if suffix == ".zst":
+        try:
+            from compression import zstd  # type: ignore[import-not-found]
+        except ImportError:
+            import zstandard  # type: ignore[import-not-found]
+
+            return zstandard.ZstdDecompressor().decompressobj()
+        return zstd.ZstdDecompressor()
+    raise ValueError(f"Unknown compressed suffix {suffix!r}, expected one of {list(COMPRESSED_SUFFIXES)}")
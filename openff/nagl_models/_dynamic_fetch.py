@@ -1,12 +1,57 @@
+import concurrent.futures
+import dataclasses
 import hashlib
+import http.client
 import json
+import mmap
+import os
 import pathlib
 import re
+import threading
+import time
 import urllib.request
+import warnings
+import weakref
+from collections.abc import Callable, Hashable, Iterable, Mapping
+from typing import TypeVar
 
 import platformdirs
 
-from openff.nagl_models import validate_nagl_model_path
+from openff.nagl_models import _compression, _http, validate_nagl_model_path
+from openff.nagl_models._cache import (
+    _CHUNK_SIZE,
+    BlobStore,
+    CacheLockTimeoutError,
+    CatalogEntry,
+    FileLock,
+    GarbageCollectionResult,
+    ModelCatalog,
+    _atomic_write_json,
+    _file_key,
+    _read_json,
+    _stream_sha256,
+    collect_garbage,
+    get_catalog,
+    get_hash_record,
+    get_release_metadata_record,
+    get_usage_record,
+)
+from openff.nagl_models._instrumentation import (
+    BLOB_LOOKUP,
+    CACHE_LOOKUP,
+    DOI_PARSE,
+    DOWNLOAD,
+    HASH_VERIFICATION,
+    LOCK_WAIT,
+    PACKAGE_LOOKUP,
+    _Stage,
+)
+from openff.nagl_models._instrumentation import FetchEvent as FetchEvent
+from openff.nagl_models._instrumentation import FetchStatsCollector as FetchStatsCollector
+from openff.nagl_models._instrumentation import add_fetch_hook as add_fetch_hook
+from openff.nagl_models._instrumentation import get_fetch_stats as get_fetch_stats
+from openff.nagl_models._instrumentation import remove_fetch_hook as remove_fetch_hook
+from openff.nagl_models._mirrors import candidate_urls, record_failure, record_success
 
 RELEASES_URL = "https://api.github.com/repos/openforcefield/openff-nagl-models/releases"
 
@@ -20,6 +65,52 @@ KNOWN_HASHES = {
 
 CACHE_DIR = platformdirs.user_cache_path() / "OPENFF_NAGL_MODELS"
 
+_T = TypeVar("_T")
+
+# How long, in seconds, release metadata from GitHub is used before it is refreshed, unless
+# OPENFF_NAGL_MODELS_RELEASE_METADATA_TTL is set
+RELEASE_METADATA_TTL = 3600.0
+
+# How long get_model waits, in seconds, for another process to finish downloading the same file
+LOCK_TIMEOUT = 600.0
+
+
+def _parse_size(size: int | str | None) -> int | None:
+    """Parse a number of bytes, optionally with a binary unit suffix like ``"500M"`` or ``"10GB"``."""
+    if size is None or isinstance(size, int):
+        return size
+    match = re.fullmatch(r"\s*([0-9.]+)\s*([KMGT]?)i?B?\s*", size, flags=re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"Could not parse {size!r} as a size in bytes, e.g. 500M or 10G")
+    number, unit = match.groups()
+    return int(float(number) * 1024 ** " KMGT".index(unit.upper() or " "))
+
+
+def _env_setting(name: str, parse: Callable[[str], _T], default: _T) -> _T:  # noqa: UP047
+    """Return the value of an environment variable parsed with ``parse``, or ``default`` if it is unset or empty."""
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        return parse(value)
+    except ValueError as error:
+        raise ValueError(f"Could not parse the {name} environment variable, {value!r}: {error}") from None
+
+
+# The largest size the cache is allowed to grow to, in bytes, unless OPENFF_NAGL_MODELS_MAX_CACHE_SIZE
+# is set; if set, the least recently used models are evicted after each download until the cache fits
+MAX_CACHE_SIZE: int | None = None
+
+# Files at least this large are downloaded as DOWNLOAD_SEGMENTS concurrent range requests, if the
+# server supports them. OPENFF_NAGL_MODELS_DOWNLOAD_SEGMENTS overrides the number of segments; set it
+# to 1 to always use one stream
+SEGMENTED_DOWNLOAD_MIN_SIZE = 8 * 1024 * 1024
+DOWNLOAD_SEGMENTS = 4
+
+
+def _max_cache_size() -> int | None:
+    return _env_setting("OPENFF_NAGL_MODELS_MAX_CACHE_SIZE", _parse_size, MAX_CACHE_SIZE)
+
 
 class HashComparisonFailedException(Exception):
     """Exception raised when a NAGL file being loaded fails a comparison to a known or user-provided hash."""
@@ -35,14 +126,245 @@ class BadFileSuffixError(Exception):
     be requested from get_model due to toolkit precedence."""
 
 
-def get_release_metadata() -> list[dict]:
-    return json.loads(urllib.request.urlopen(RELEASES_URL).read().decode("utf-8"))
+class ModelResolutionError(Exception):
+    """Exception raised by :func:`resolve_models` when one or more models could not be resolved."""
+
+    def __init__(self, errors: Mapping[str, Exception]):
+        self.errors = dict(errors)
+        """The exception raised for each model that could not be resolved."""
+        details = "".join(
+            f"\n  {filename}: {type(error).__name__}: {error}" for filename, error in self.errors.items()
+        )
+        super().__init__(f"Could not resolve {len(self.errors)} model(s):{details}")
+
+
+def _is_offline() -> bool:
+    return os.environ.get("OPENFF_NAGL_MODELS_OFFLINE", "").lower() in {"1", "true", "yes", "on"}
+
+
+def _cached_release_metadata(ttl: float | None, offline: bool | None) -> tuple[dict | None, bool]:
+    """Return the stored release metadata, if any, and whether it can be used without asking GitHub."""
+    if ttl is None:
+        ttl = _env_setting("OPENFF_NAGL_MODELS_RELEASE_METADATA_TTL", float, RELEASE_METADATA_TTL)
+    if offline is None:
+        offline = _is_offline()
+
+    cached = get_release_metadata_record(CACHE_DIR).load()
+    if offline:
+        if cached is None:
+            raise FileNotFoundError(
+                "No release metadata has been cached yet, so it is not available in offline mode. "
+                "Fetch it once with network access, or unset OPENFF_NAGL_MODELS_OFFLINE."
+            )
+        return cached, True
+    return cached, cached is not None and time.time() - cached["fetched_at"] < ttl
+
+
+def _conditional_request_headers(cached: dict | None) -> dict[str, str]:
+    headers = {"Accept": "application/vnd.github+json"}
+    if cached is not None:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+    return headers
+
+
+def _serve_stale_release_metadata(cached: dict | None, error: Exception) -> dict:
+    if cached is None:
+        raise error
+    warnings.warn(
+        f"Could not refresh release metadata ({error}), using the copy cached on {time.ctime(cached['fetched_at'])}"
+    )
+    return cached
+
+
+def get_release_metadata(ttl: float | None = None, offline: bool | None = None) -> list[dict]:
+    """
+    Return the metadata of every ``openff-nagl-models`` release on GitHub.
+
+    The metadata is cached in the cache directory. Within ``ttl`` seconds of
+    being fetched, the cached copy is returned without contacting GitHub. After
+    that, it is refreshed with a conditional request, which doesn't count
+    against GitHub's rate limit if nothing has changed. If GitHub can't be
+    reached, the cached copy is used with a warning.
+
+    Parameters
+    ----------
+    ttl
+        How long, in seconds, cached metadata is used without being refreshed.
+        Defaults to ``RELEASE_METADATA_TTL``, which can be set with the
+        ``OPENFF_NAGL_MODELS_RELEASE_METADATA_TTL`` environment variable.
+    offline
+        Only use the cached metadata, and never contact GitHub. Defaults to
+        whether the ``OPENFF_NAGL_MODELS_OFFLINE`` environment variable is set
+        to a true value, like ``1``.
+
+    Raises
+    ------
+    FileNotFoundError
+        In offline mode, if no metadata has been cached yet.
+    """
+    return list(_load_release_metadata(ttl, offline)["releases"])
+
+
+def _load_release_metadata(ttl: float | None, offline: bool | None) -> dict:
+    # returns the stored record itself, so callers must not modify it
+    cached, is_current = _cached_release_metadata(ttl, offline)
+    if is_current:
+        return cached  # type: ignore[return-value]
+
+    request = urllib.request.Request(RELEASES_URL, headers=_conditional_request_headers(cached))
+    try:
+        with urllib.request.urlopen(request) as response:
+            releases = json.loads(response.read().decode("utf-8"))
+            etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+    except urllib.error.HTTPError as error:
+        if error.code == 304 and cached is not None:
+            get_release_metadata_record(CACHE_DIR).mark_current()
+            return cached
+        return _serve_stale_release_metadata(cached, error)
+    except urllib.error.URLError as error:
+        return _serve_stale_release_metadata(cached, error)
+
+    record = get_release_metadata_record(CACHE_DIR)
+    record.save(releases, etag, last_modified)
+    return record.load()  # type: ignore[return-value]
+
+
+async def get_release_metadata_async(ttl: float | None = None, offline: bool | None = None) -> list[dict]:
+    """The asynchronous equivalent of :func:`get_release_metadata`."""
+    from openff.nagl_models._async_http import async_request
+
+    cached, is_current = _cached_release_metadata(ttl, offline)
+    if is_current:
+        return list(cached["releases"])  # type: ignore[index]
+
+    try:
+        async with await async_request(RELEASES_URL, headers=_conditional_request_headers(cached)) as response:
+            if response.status == 304 and cached is not None:
+                get_release_metadata_record(CACHE_DIR).mark_current()
+                return list(cached["releases"])
+            releases = json.loads((await response.read()).decode("utf-8"))
+            etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+    except urllib.error.HTTPError as error:
+        # requests through a proxy are made with urllib, which raises on 304 responses
+        if error.code == 304 and cached is not None:
+            get_release_metadata_record(CACHE_DIR).mark_current()
+            return list(cached["releases"])
+        return list(_serve_stale_release_metadata(cached, error)["releases"])
+    except OSError as error:
+        return list(_serve_stale_release_metadata(cached, error)["releases"])
+
+    get_release_metadata_record(CACHE_DIR).save(releases, etag, last_modified)
+    return list(releases)
+
+
+@dataclasses.dataclass(frozen=True)
+class ReleaseAsset:
+    """A file attached to a GitHub release of ``openff-nagl-models``."""
+
+    name: str
+    url: str
+    """The URL the file can be downloaded from."""
+    size: int
+    digest: str | None
+    """The digest reported by GitHub, like ``"sha256:<hash>"``, if any."""
+    release: str
+    """The tag of the release the file is attached to."""
+
+
+_ASSET_INDEX: tuple[float, dict[str, ReleaseAsset]] | None = None
+
+
+def _build_asset_index(releases: list[dict]) -> dict[str, ReleaseAsset]:
+    index: dict[str, ReleaseAsset] = {}
+    # releases are listed newest first, so keep the newest copy of each file
+    for release in releases:
+        for asset in release.get("assets", []):
+            index.setdefault(
+                asset["name"],
+                ReleaseAsset(
+                    name=asset["name"],
+                    url=asset["browser_download_url"],
+                    size=asset["size"],
+                    digest=asset.get("digest"),
+                    release=release["tag_name"],
+                ),
+            )
+    return index
+
+
+def get_release_asset_index(ttl: float | None = None, offline: bool | None = None) -> dict[str, ReleaseAsset]:
+    """
+    Return the files attached to ``openff-nagl-models`` releases, by file name.
+
+    The index is built once from the release metadata returned by
+    :func:`get_release_metadata` (with the same ``ttl`` and ``offline``
+    arguments), and only rebuilt when that metadata changes.
+
+    Examples
+    --------
+    ::
+
+        >>> from openff.nagl_models._dynamic_fetch import get_release_asset_index
+        >>> get_release_asset_index()["openff-gnn-am1bcc-0.1.0-rc.3.pt"].size
+        16805851
+
+    """
+    global _ASSET_INDEX
+
+    record = _load_release_metadata(ttl, offline)
+    # only rebuild the index if new metadata was saved, not just re-validated
+    if _ASSET_INDEX is None or _ASSET_INDEX[0] != record["saved_at"]:
+        _ASSET_INDEX = (record["saved_at"], _build_asset_index(record["releases"]))
+    return _ASSET_INDEX[1]
+
+
+class _SingleFlight:
+    """
+    De-duplicate concurrent calls within a process.
+
+    The first thread to make a call with a given key runs it, and every other
+    thread making a call with the same key while it is running waits for, and
+    shares, its result or exception. Results are not kept once the call finishes.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, concurrent.futures.Future] = {}
+
+    def do(self, key: Hashable, function: Callable[..., _T], *args) -> _T:
+        with self._lock:
+            future = self._calls.get(key)
+            is_leader = future is None
+            if future is None:
+                future = self._calls[key] = concurrent.futures.Future()
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = function(*args)
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+_GET_MODEL_CALLS = _SingleFlight()
 
 
 def get_model(
     filename: str,
     doi: None | str = None,
     file_hash: None | str = None,
+    check_freshness: bool = False,
 ) -> str:
     """
     Return the path of a model as cached on disk, downloading if necessary. The lookup order of this implementation is:
@@ -50,6 +372,12 @@ def get_model(
     2. Try to retrieve the file from the local cache
     3. Try to fetch the file from the Zenodo DOI, if provided
 
+    Concurrent calls for the same model from several threads are only resolved once, and every caller
+    receives the same path (or exception).
+
+    The duration and outcome of each stage of the lookup are reported to any hooks registered with
+    :func:`add_fetch_hook`; :func:`get_fetch_stats` aggregates them for the whole process.
+
     This method will raise an HashComparisonFailedException as soon as a hash mismatch is encountered. So if
     there's a file with a matching name but a non-matching hash in the local cache, an exception will be raised
     immediately, even if a file with a matching name that WOULD satisfy the hash check exists in release
@@ -70,6 +398,11 @@ def get_model(
         not provided or has a value of `None`, then no hash check is performed. Raises HashComparisonFailedException
         if unsuccessful. If a user provides a hash value here that disagrees with the known hash for the same file
         name, the user-provided hash takes precedence.
+    check_freshness
+        If a DOI is given and the model is found in the cache, compare the size and checksum of the cached
+        file with the metadata of the Zenodo record (see :func:`get_zenodo_record`), without downloading
+        the file, and download it again if they differ. Skipped in offline mode, and with a
+        warning if the record can't be fetched.
 
     Returns
     -------
@@ -80,7 +413,82 @@ def get_model(
     ------
     HashComparisonFailedException
     FileNotFoundError
+    openff.nagl_models._cache.CacheLockTimeoutError
+        If another process has been downloading the same file for longer than ``LOCK_TIMEOUT`` seconds.
     """
+    file_hash = _prepare_model_request(filename, file_hash)
+
+    # Threads asking for the same model at the same time share a single lookup
+    if check_freshness and doi and not _is_offline():
+        return _GET_MODEL_CALLS.do((filename, doi, file_hash, True), _get_fresh_model, filename, doi, file_hash)
+    return _GET_MODEL_CALLS.do((filename, doi, file_hash), _get_model, filename, doi, file_hash)
+
+
+# The read-only mappings of model files made by get_model_buffer, by resolved path and the size,
+# modification/change times and inode of the file that was mapped. Views of a mapping keep it
+# alive, and it is unmapped once none are left
+_MAPPED_MODELS: "weakref.WeakValueDictionary[tuple[str, tuple[int, ...]], mmap.mmap]" = weakref.WeakValueDictionary()
+_MAPPED_MODELS_LOCK = threading.Lock()
+
+
+def get_model_buffer(
+    filename: str,
+    doi: str | None = None,
+    file_hash: str | None = None,
+) -> memoryview:
+    """
+    Return a read-only, memory-mapped view of a model, downloading it if necessary.
+
+    The model is found and verified exactly as with :func:`get_model`, and
+    takes the same arguments. Its file is then mapped into memory rather than
+    read, so its pages are loaded lazily and shared, through the operating
+    system's page cache, between every process that maps the same model.
+    Within a process, repeated calls for an unchanged file share one mapping
+    for as long as any view of it is referenced.
+
+    Libraries that can only map a file themselves should be given the path
+    from :func:`get_model` instead, e.g. ``torch.load(get_model(filename), mmap=True)``,
+    which shares the page cache in the same way.
+
+    Returns
+    -------
+    memoryview
+        A read-only view of the contents of the model file. The mapping stays
+        open as long as any view of it is referenced.
+
+    Raises
+    ------
+    HashComparisonFailedException
+    FileNotFoundError
+
+    Examples
+    --------
+    ::
+
+        >>> from openff.nagl_models import get_model_buffer
+        >>> buffer = get_model_buffer("openff-gnn-am1bcc-1.0.0.pt")
+        >>> bytes(buffer[:2])
+        b'PK'
+
+    """
+    path = os.path.realpath(get_model(filename, doi=doi, file_hash=file_hash))
+
+    with open(path, "rb") as f:
+        # the descriptor, not the path, is mapped, so a file replaced in the meantime is detected
+        key = (path, tuple(_file_key(os.fstat(f.fileno()))))
+        if key[1][0] == 0:
+            # empty files can't be mapped
+            return memoryview(b"")
+        with _MAPPED_MODELS_LOCK:
+            mapped = _MAPPED_MODELS.get(key)
+            if mapped is None:
+                mapped = _MAPPED_MODELS[key] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return memoryview(mapped)
+
+
+def _prepare_model_request(filename: str, file_hash: str | None) -> str | None:
+    """Check the requested file name, make sure the cache exists, and return the hash to check against."""
     # Cast to str to temporarily preserve old behavior, see https://github.com/openforcefield/openff-toolkit/issues/2095
     if not (str(filename).endswith(".pt")):
         raise BadFileSuffixError(
@@ -92,78 +500,1167 @@ def get_model(
     # See if the file has a known hash
     if file_hash is None and filename in KNOWN_HASHES:
         file_hash = KNOWN_HASHES[filename]
+    return file_hash
+
+
+def _find_installed_model(filename: str) -> pathlib.Path | None:
+    """Look for a model in the directories provided through entry points, or the current directory."""
+    with _Stage(PACKAGE_LOOKUP, filename) as stage:
+        try:
+            file_path = validate_nagl_model_path(filename)
+        except FileNotFoundError:
+            stage.outcome = "miss"
+            return None
+        stage.outcome = "hit"
+        return file_path
+
 
+def _find_installed_models(filenames: Iterable[str]) -> dict[str, pathlib.Path | None]:
+    """Look for several models, as :func:`_find_installed_model` would, checking the model directories once."""
+    from openff.nagl_models import openff_nagl_models
+
+    filenames = list(filenames)
+    found: dict[str, pathlib.Path | None] = {}
+    start = time.perf_counter()
+    # the current working directory, or an absolute path, takes precedence as in validate_nagl_model_path
+    local_paths = {filename: openff_nagl_models.search_file_path(filename) for filename in filenames}
+    indexed_paths = openff_nagl_models._DEFAULT_RESOLVER.resolve_many(
+        filename for filename, path in local_paths.items() if path is None
+    )
+    # the directories are only scanned once, so share the time between the models
+    duration = (time.perf_counter() - start) / max(len(filenames), 1)
+    for filename in filenames:
+        with _Stage(PACKAGE_LOOKUP, filename, duration=duration) as stage:
+            found[filename] = local_paths[filename] or indexed_paths[filename]
+            stage.outcome = "miss" if found[filename] is None else "hit"
+    return found
+
+
+def _find_cached_model(filename: str) -> pathlib.Path | None:
+    with _Stage(CACHE_LOOKUP, filename) as stage:
+        cached_path = CACHE_DIR / filename
+        stage.outcome = "hit" if cached_path.exists() else "miss"
+        return cached_path if stage.outcome == "hit" else None
+
+
+def _get_model(filename: str, doi: str | None, file_hash: str | None) -> str:
     # See if it's available in the openff-nagl-models python package
-    try:
-        file_path = validate_nagl_model_path(filename)
+    return _get_model_from(_find_installed_model(filename), filename, doi, file_hash)
+
+
+def _get_model_from(installed_path: pathlib.Path | None, filename: str, doi: str | None, file_hash: str | None) -> str:
+    """Finish resolving a model once it has been looked up in the installed model directories."""
+    if installed_path is not None:
         # If filename happens to be an absolute path (not guaranteed this is in scope, but is temporarily supported,
         # see https://github.com/openforcefield/openff-nagl-models/issues/68) the hash check will be skipped.
         # This isn't a final decision on any behaviors, just a temporary workaround.
         if file_hash is not None:
-            assert_hash_equal(file_path, file_hash)
-        return file_path.as_posix()
-    except FileNotFoundError:
-        pass
+            assert_hash_equal(installed_path, file_hash)
+        return installed_path.as_posix()
 
     # Then check if it's in the cache
-    cached_path = CACHE_DIR / filename
-    if cached_path.exists():
+    cached_path = _find_cached_model(filename)
+    if cached_path is not None:
         if file_hash:
             assert_hash_equal(cached_path, file_hash)
 
+        get_usage_record(CACHE_DIR).record_access(cached_path)
+        return cached_path.as_posix()
+
+    # Then see if the same file is already stored, under any name
+    cached_path = CACHE_DIR / filename
+    if file_hash and _link_existing_copy(cached_path, file_hash):
         return cached_path.as_posix()
 
     # Otherwise try to fetch from DOI
     if doi:
+        file_url = _zenodo_file_url(filename, doi)
         try:
-            match = re.search(r"10\.(5072|5281)/zenodo\.([0-9]+)", doi)
-            if not match:
-                raise IndexError
-            prefix, zenodo_id = match.groups()
-        except (IndexError, AttributeError):
-            raise UnableToParseDOIException(
-                f"Unable to parse Zenodo DOI {doi}. DOI values are expected to look "
-                f"like '10.5281/zenodo.278300' (production) or '10.5072/zenodo.278300' (sandbox)"
+            return _fetch_into_cache(file_url, cached_path, file_hash, _compression.get_compressed_suffixes())
+        except urllib.error.HTTPError:
+            raise FileNotFoundError(f"No file at {file_url}")
+
+    raise FileNotFoundError(f"Could not find asset with name '{filename}' in any release")
+
+
+# catalog path -> (resolver, resolver generation, catalog generation) when installed models were last synced
+_SYNCED_CATALOGS: dict[pathlib.Path, tuple[object, int, int]] = {}
+
+
+def _synced_catalog() -> ModelCatalog:
+    """Return the catalog of the cache directory, with its installed models brought up to date."""
+    from openff.nagl_models import openff_nagl_models
+
+    resolver = openff_nagl_models._DEFAULT_RESOLVER
+    resolver.refresh()
+    catalog = get_catalog(CACHE_DIR)
+    catalog.refresh()
+    resolver_generation = resolver.generation
+
+    # only compare the installed models with the catalog if either has changed since they were last synced
+    if _SYNCED_CATALOGS.get(catalog.path) != (resolver, resolver_generation, catalog.generation):
+        catalog.sync_installed(
+            [path for path in resolver.files() if path.suffix == ".pt"],
+            KNOWN_HASHES,
+        )
+        _SYNCED_CATALOGS[catalog.path] = (resolver, resolver_generation, catalog.generation)
+    return catalog
+
+
+def _link_existing_copy(cached_path: pathlib.Path, file_hash: str) -> bool:
+    """
+    Provide a model from a stored file with the same hash, without downloading it.
+
+    The blob with this hash is used if there is one and it still has this hash. Otherwise, any
+    cached or installed model recorded in the catalog with this hash is added to the blob store
+    first. Returns whether ``cached_path`` now refers to a file with this hash.
+    """
+    with _Stage(BLOB_LOOKUP, cached_path.name) as stage:
+        blobs = BlobStore(CACHE_DIR)
+        if blobs.get_verified(file_hash) is None:
+            for entry in _synced_catalog().find_by_hash(file_hash):
+                try:
+                    # catalog entries can be stale, so check the file itself
+                    if get_hash_record(CACHE_DIR).get_sha256(entry.path) == file_hash:
+                        blobs.add(entry.path, file_hash)
+                        break
+                except OSError:
+                    continue
+            else:
+                stage.outcome = "miss"
+                return False
+
+        try:
+            blobs.link(file_hash, cached_path)
+        except FileNotFoundError:
+            # the blob was evicted in the meantime
+            stage.outcome = "miss"
+            return False
+        get_hash_record(CACHE_DIR).record(cached_path, file_hash)
+        get_catalog(CACHE_DIR).add(CatalogEntry.from_file(cached_path, source="cache", sha256=file_hash))
+        get_usage_record(CACHE_DIR).record_access(cached_path)
+        stage.outcome = "hit"
+        return True
+
+
+def _store_in_cache(partial_path: pathlib.Path, cached_path: pathlib.Path, sha256: str) -> None:
+    """Move a verified download into the blob store, and make ``cached_path`` an alias of it."""
+    blobs = BlobStore(CACHE_DIR)
+    blobs.add(partial_path, sha256, move=True)
+    blobs.link(sha256, cached_path)
+
+    get_hash_record(CACHE_DIR).record(cached_path, sha256)
+    get_catalog(CACHE_DIR).add(CatalogEntry.from_file(cached_path, source="cache", sha256=sha256))
+    get_usage_record(CACHE_DIR).record_access(cached_path)
+
+    if _max_cache_size() is not None:
+        try:
+            gc(timeout=0)
+        except CacheLockTimeoutError:
+            # another process is already enforcing the limit
+            pass
+
+
+def _zenodo_record_url(doi: str) -> str:
+    """Return the API URL of the Zenodo record with this DOI."""
+    match = re.search(r"10\.(5072|5281)/zenodo\.([0-9]+)", doi)
+    if not match:
+        raise UnableToParseDOIException(
+            f"Unable to parse Zenodo DOI {doi}. DOI values are expected to look "
+            f"like '10.5281/zenodo.278300' (production) or '10.5072/zenodo.278300' (sandbox)"
+        )
+    prefix, zenodo_id = match.groups()
+
+    if prefix == "5072":
+        return f"https://sandbox.zenodo.org/api/records/{zenodo_id}"
+    return f"https://zenodo.org/api/records/{zenodo_id}"
+
+
+def _zenodo_file_url(filename: str, doi: str) -> str:
+    """Return the URL of a file in the Zenodo record with this DOI."""
+    with _Stage(DOI_PARSE, filename):
+        record_url = _zenodo_record_url(doi)
+    return f"{record_url}/files/{filename}"
+
+
+@dataclasses.dataclass(frozen=True)
+class ZenodoFile:
+    """A file in a Zenodo record, as described by the record's metadata."""
+
+    key: str
+    """The name of the file."""
+    url: str
+    """The URL the file can be downloaded from."""
+    size: int
+    checksum: str
+    """The checksum computed by Zenodo, like ``"md5:<hash>"``."""
+
+    def matches(self, path: str | os.PathLike) -> bool:
+        """Whether the file at ``path`` has this file's size and checksum."""
+        if os.path.getsize(path) != self.size:
+            return False
+        algorithm, _, expected = self.checksum.partition(":")
+        # the checksum is recorded alongside the file's SHA256 hash, so it is only computed once
+        return get_hash_record(CACHE_DIR).get_digest(path, algorithm) == expected
+
+
+@dataclasses.dataclass(frozen=True)
+class ZenodoRecord:
+    """The metadata of a Zenodo record and the files in it."""
+
+    url: str
+    """The API URL of the record."""
+    files: dict[str, ZenodoFile]
+    """The files in the record, by name."""
+
+    @classmethod
+    def from_json(cls, url: str, metadata: dict) -> "ZenodoRecord":
+        files = {
+            file["key"]: ZenodoFile(
+                key=file["key"],
+                url=file.get("links", {}).get("self", f"{url}/files/{file['key']}"),
+                size=file["size"],
+                checksum=file["checksum"],
             )
+            for file in metadata.get("files", [])
+        }
+        return cls(url=url, files=files)
+
+
+# The records fetched by get_zenodo_record in this process, by API URL
+_ZENODO_RECORDS: dict[str, ZenodoRecord] = {}
+_ZENODO_RECORD_CALLS = _SingleFlight()
+
+
+def _fetch_zenodo_record(url: str) -> ZenodoRecord:
+    if url in _ZENODO_RECORDS:
+        return _ZENODO_RECORDS[url]
+
+    # try each mirror in turn, raising the error from the last one if they all fail
+    last_error: Exception | None = None
+    for candidate in candidate_urls(url):
+        try:
+            with _http.request(candidate, {"Accept": "application/json"}) as response:
+                metadata = json.load(response)
+        except (*_FAILOVER_ERRORS, ValueError) as error:
+            _record_failed_download(candidate, error)
+            last_error = error
+            continue
+        record_success(candidate)
+        _ZENODO_RECORDS[url] = ZenodoRecord.from_json(url, metadata)
+        return _ZENODO_RECORDS[url]
+    assert last_error is not None
+    raise last_error
+
+
+def get_zenodo_record(doi: str) -> ZenodoRecord:
+    """
+    Return the metadata of the Zenodo record with this DOI, including the size and checksum of each file.
+
+    The metadata is fetched once per process, from the first of the mirrors (see
+    :func:`openff.nagl_models._mirrors.candidate_urls`) or Zenodo itself that
+    responds, and concurrent calls for the same record share a single request.
+
+    Examples
+    --------
+    ::
+
+        >>> from openff.nagl_models._dynamic_fetch import get_zenodo_record
+        >>> get_zenodo_record("10.5072/zenodo.278300").files["my_favorite_model.pt"].checksum
+        'md5:...'
+
+    """
+    url = _zenodo_record_url(doi)
+    return _ZENODO_RECORD_CALLS.do(url, _fetch_zenodo_record, url)
+
+
+def _discard_if_stale(cached_path: pathlib.Path, record_file: ZenodoFile) -> None:
+    """Remove a cached file if it differs from its Zenodo record, while no other process is downloading it."""
+    lock = FileLock(cached_path.with_name(cached_path.name + ".lock"), timeout=LOCK_TIMEOUT)
+    with _Stage(LOCK_WAIT, cached_path.name):
+        lock.acquire()
+    try:
+        if cached_path.exists() and not record_file.matches(cached_path):
+            cached_path.unlink()
+    finally:
+        lock.release()
+
+
+def _get_fresh_model(filename: str, doi: str, file_hash: str | None) -> str:
+    """Resolve a model as :func:`_get_model` does, after discarding a cached copy that differs from its record."""
+    cached_path = CACHE_DIR / filename
+    if cached_path.exists():
+        try:
+            record_file = get_zenodo_record(doi).files.get(filename)
+        except (*_FAILOVER_ERRORS, ValueError) as error:
+            # the check is optional, so use the cached copy as if it hadn't been asked for
+            warnings.warn(f"Could not check whether {filename} is up to date ({error}), using the cached copy")
+            record_file = None
+        if record_file is not None:
+            _discard_if_stale(cached_path, record_file)
+    return _get_model(filename, doi, file_hash)
+
+
+ModelSpec = str | tuple[str, str | None, str | None] | Mapping[str, str | None]
+"""A model to fetch: a file name, a ``(filename, doi, file_hash)`` tuple, or a mapping with those keys."""
+
+
+@dataclasses.dataclass
+class PrefetchResult:
+    """The outcome of fetching a single model with :func:`prefetch_models`."""
+
+    filename: str
+    path: str | None = None
+    error: Exception | None = None
+    duration: float = 0.0
+    """Wall time in seconds spent resolving, downloading and verifying the model."""
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _normalize_model_spec(spec: ModelSpec) -> tuple[str, str | None, str | None]:
+    if isinstance(spec, str):
+        return spec, None, None
+    if isinstance(spec, Mapping):
+        return spec["filename"], spec.get("doi"), spec.get("file_hash")  # type: ignore[return-value]
+    filename, doi, file_hash = spec
+    return filename, doi, file_hash
+
+
+def _timed_get_model(filename: str, doi: str | None, file_hash: str | None) -> PrefetchResult:
+    start = time.perf_counter()
+    try:
+        path = get_model(filename, doi=doi, file_hash=file_hash)
+    except Exception as error:
+        return PrefetchResult(filename, error=error, duration=time.perf_counter() - start)
+    return PrefetchResult(filename, path=path, duration=time.perf_counter() - start)
+
+
+def prefetch_models(
+    specs: Iterable[ModelSpec],
+    max_workers: int = 8,
+) -> dict[str, PrefetchResult]:
+    """
+    Fetch several models into the cache concurrently.
+
+    Each model is looked up with :func:`get_model` in a bounded thread pool, so
+    downloads and hash verification of different models overlap and the total
+    time is close to that of the slowest model. Failures don't stop the other
+    models from being fetched; they are reported in the returned results instead.
+
+    Parameters
+    ----------
+    specs
+        The models to fetch. Each is either a file name, a ``(filename, doi, file_hash)``
+        tuple, or a mapping with ``"filename"`` and optional ``"doi"`` and ``"file_hash"`` keys.
+        These have the same meaning as the arguments of :func:`get_model`. If a file
+        name is given more than once, only the first spec is used.
+    max_workers
+        The maximum number of models to fetch at the same time.
+
+    Returns
+    -------
+    dict[str, PrefetchResult]
+        The result for each file name, in the order they were given.
+
+    Examples
+    --------
+    ::
 
-        if prefix == "5072":
-            file_url = f"https://sandbox.zenodo.org/api/records/{zenodo_id}/files/{filename}"
+        >>> from openff.nagl_models._dynamic_fetch import prefetch_models
+        >>> results = prefetch_models(
+        ...     [
+        ...         "openff-gnn-am1bcc-1.0.0.pt",
+        ...         ("my_favorite_model.pt", "10.5072/zenodo.278300", None),
+        ...     ]
+        ... )
+        >>> [result.filename for result in results.values() if not result.ok]
+        []
+
+    """
+    unique_specs: dict[str, tuple[str, str | None, str | None]] = {}
+    for spec in specs:
+        filename, doi, file_hash = _normalize_model_spec(spec)
+        unique_specs.setdefault(filename, (filename, doi, file_hash))
+
+    if not unique_specs:
+        return {}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(unique_specs))) as executor:
+        futures = {filename: executor.submit(_timed_get_model, *spec) for filename, spec in unique_specs.items()}
+        return {filename: future.result() for filename, future in futures.items()}
+
+
+def resolve_models(
+    specs: Iterable[ModelSpec],
+    max_workers: int = 8,
+) -> dict[str, str]:
+    """
+    Return the paths of several models, as :func:`get_model` would for each of them.
+
+    The installed model directories are checked for changes once for all of
+    the models, and then hashes are verified and missing models downloaded
+    concurrently in a bounded thread pool. Every model is tried before any
+    error is raised, so a single exception reports every model that is
+    missing or fails its hash check.
+
+    Parameters
+    ----------
+    specs
+        The models to resolve, in the same forms accepted by :func:`prefetch_models`.
+        If a file name is given more than once, only the first spec is used.
+    max_workers
+        The maximum number of models to verify or download at the same time.
+
+    Returns
+    -------
+    dict[str, str]
+        The path of each model, by file name, in the order they were given.
+
+    Raises
+    ------
+    ModelResolutionError
+        If any model could not be resolved. Its ``errors`` attribute holds the
+        exception, e.g. a FileNotFoundError or HashComparisonFailedException,
+        raised for each of those models.
+
+    Examples
+    --------
+    ::
+
+        >>> from openff.nagl_models._dynamic_fetch import resolve_models
+        >>> resolve_models(["openff-gnn-am1bcc-0.1.0-rc.3.pt", "openff-gnn-am1bcc-1.0.0.pt"])
+        {'openff-gnn-am1bcc-0.1.0-rc.3.pt': '/.../openff-gnn-am1bcc-0.1.0-rc.3.pt',
+        'openff-gnn-am1bcc-1.0.0.pt': '/.../openff-gnn-am1bcc-1.0.0.pt'}
+
+    """
+    requests: dict[str, tuple[str | None, str | None]] = {}
+    errors: dict[str, Exception] = {}
+    for spec in specs:
+        filename, doi, file_hash = _normalize_model_spec(spec)
+        if filename in requests or filename in errors:
+            continue
+        try:
+            requests[filename] = (doi, _prepare_model_request(filename, file_hash))
+        except BadFileSuffixError as error:
+            errors[filename] = error
+
+    installed_paths = _find_installed_models(requests)
+
+    paths: dict[str, str] = {}
+    if requests:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(requests))) as executor:
+            futures = {
+                filename: executor.submit(_get_model_from, installed_paths[filename], filename, doi, file_hash)
+                for filename, (doi, file_hash) in requests.items()
+            }
+            for filename, future in futures.items():
+                try:
+                    paths[filename] = future.result()
+                except Exception as error:
+                    errors[filename] = error
+
+    if errors:
+        raise ModelResolutionError(errors)
+    return paths
+
+
+def _fetch_record_file(record_file: ZenodoFile) -> PrefetchResult:
+    start = time.perf_counter()
+    cached_path = CACHE_DIR / record_file.key
+    try:
+        if cached_path.exists():
+            _discard_if_stale(cached_path, record_file)
+        path = _fetch_into_cache(record_file.url, cached_path, KNOWN_HASHES.get(record_file.key))
+        if not record_file.matches(path):
+            cached_path.unlink()
+            raise HashComparisonFailedException(
+                f"{record_file.key} downloaded from {record_file.url} does not match the size "
+                f"({record_file.size} bytes) and checksum ({record_file.checksum}) in its Zenodo record"
+            )
+    except Exception as error:
+        return PrefetchResult(record_file.key, error=error, duration=time.perf_counter() - start)
+    return PrefetchResult(record_file.key, path=path, duration=time.perf_counter() - start)
+
+
+def fetch_zenodo_record(
+    doi: str,
+    filenames: Iterable[str] | None = None,
+    max_workers: int = 8,
+) -> dict[str, PrefetchResult]:
+    """
+    Download the files of a Zenodo record into the cache concurrently.
+
+    The record's metadata is fetched once with :func:`get_zenodo_record`. Cached
+    files that already match the size and checksum in the metadata are not
+    downloaded again, and downloaded files are checked against it. Failures
+    don't stop the other files from being fetched; they are reported in the
+    returned results instead.
+
+    Parameters
+    ----------
+    doi
+        The DOI of the Zenodo record, for example "10.5072/zenodo.278300".
+    filenames
+        The files to fetch. Defaults to every file in the record.
+    max_workers
+        The maximum number of files to download at the same time.
+
+    Returns
+    -------
+    dict[str, PrefetchResult]
+        The result for each file name, in the order they were given. A file
+        name that isn't in the record is reported with a FileNotFoundError.
+
+    Examples
+    --------
+    ::
+
+        >>> from openff.nagl_models._dynamic_fetch import fetch_zenodo_record
+        >>> results = fetch_zenodo_record("10.5072/zenodo.278300")
+        >>> [result.filename for result in results.values() if not result.ok]
+        []
+
+    """
+    record = get_zenodo_record(doi)
+    filenames = list(dict.fromkeys(record.files if filenames is None else filenames))
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+    results: dict[str, PrefetchResult] = {}
+    record_files: dict[str, ZenodoFile] = {}
+    for filename in filenames:
+        if filename in record.files:
+            record_files[filename] = record.files[filename]
         else:
-            file_url = f"https://zenodo.org/api/records/{zenodo_id}/files/{filename}"
+            results[filename] = PrefetchResult(
+                filename, error=FileNotFoundError(f"No file {filename} in {record.url}")
+            )
+
+    if record_files:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(record_files))) as executor:
+            futures = {filename: executor.submit(_fetch_record_file, file) for filename, file in record_files.items()}
+            results.update((filename, future.result()) for filename, future in futures.items())
+    return {filename: results[filename] for filename in filenames}
+
+
+async def get_model_async(
+    filename: str,
+    doi: str | None = None,
+    file_hash: str | None = None,
+) -> str:
+    """
+    Return the path of a model as cached on disk, downloading if necessary, without blocking the event loop.
+
+    This is the asynchronous equivalent of :func:`get_model`, with the same lookup order, arguments and
+    exceptions. Downloads use non-blocking sockets, unless they go through a proxy, while hashing and waiting
+    for other processes to finish downloading the same file run in the default executor.
+
+    Examples
+    --------
+    ::
+
+        >>> import asyncio
+        >>> from openff.nagl_models._dynamic_fetch import get_model_async
+        >>> asyncio.run(get_model_async("my_favorite_model.pt", doi="10.5072/zenodo.278300"))
+        '/home/.../OPENFF_NAGL_MODELS/my_favorite_model.pt'
+
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    file_hash = _prepare_model_request(filename, file_hash)
+
+    # See if it's available in the openff-nagl-models python package, which scans the entry points on first use
+    file_path = await loop.run_in_executor(None, _find_installed_model, filename)
+    if file_path is not None:
+        if file_hash is not None:
+            await loop.run_in_executor(None, assert_hash_equal, file_path, file_hash)
+        return file_path.as_posix()
+
+    # Then check if it's in the cache
+    cached_path = _find_cached_model(filename)
+    if cached_path is not None:
+        if file_hash:
+            await loop.run_in_executor(None, assert_hash_equal, cached_path, file_hash)
+        # may wait for another process's lock on the usage record
+        await loop.run_in_executor(None, get_usage_record(CACHE_DIR).record_access, cached_path)
+        return cached_path.as_posix()
+
+    # Then see if the same file is already stored, under any name
+    cached_path = CACHE_DIR / filename
+    if file_hash:
+        if await loop.run_in_executor(None, _link_existing_copy, cached_path, file_hash):
+            return cached_path.as_posix()
 
+    # Otherwise try to fetch from DOI
+    if doi:
+        file_url = _zenodo_file_url(filename, doi)
         try:
-            return _download_and_verify_file(file_url, cached_path, file_hash)
+            return await _async_fetch_into_cache(file_url, cached_path, file_hash)
         except urllib.error.HTTPError:
             raise FileNotFoundError(f"No file at {file_url}")
 
     raise FileNotFoundError(f"Could not find asset with name '{filename}' in any release")
 
 
+async def _async_fetch_into_cache(url: str, cached_path: pathlib.Path, file_hash: str | None = None) -> str:
+    """The asynchronous equivalent of :func:`_fetch_into_cache`."""
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    lock = FileLock(cached_path.with_name(cached_path.name + ".lock"), timeout=LOCK_TIMEOUT)
+    with _Stage(LOCK_WAIT, cached_path.name):
+        await loop.run_in_executor(None, lock.acquire)
+    try:
+        if cached_path.exists():
+            if file_hash:
+                await loop.run_in_executor(None, assert_hash_equal, cached_path, file_hash)
+            return cached_path.as_posix()
+
+        # try each mirror in turn, raising the error from the last one if they all fail
+        last_error: Exception | None = None
+        for candidate in candidate_urls(url):
+            try:
+                path = await _async_download_and_verify_file(candidate, cached_path, file_hash)
+            except _FAILOVER_ERRORS as error:
+                _record_failed_download(candidate, error)
+                last_error = error
+                continue
+            record_success(candidate)
+            return path
+        assert last_error is not None
+        raise last_error
+    finally:
+        lock.release()
+
+
+async def _async_download_and_verify_file(url: str, cached_path: pathlib.Path, file_hash: str | None = None) -> str:
+    """The asynchronous equivalent of :func:`_download_and_verify_file`, without resuming partial downloads."""
+    import asyncio
+
+    from openff.nagl_models._async_http import async_request
+
+    loop = asyncio.get_running_loop()
+    partial_path = _partial_path(cached_path)
+    hasher = hashlib.sha256()
+
+    with _Stage(DOWNLOAD, cached_path.name) as stage:
+        stage.n_bytes = 0
+        async with await async_request(url) as response:
+            with open(partial_path, "wb") as f:
+                async for chunk in response.iter_chunks(_CHUNK_SIZE):
+                    hasher.update(chunk)
+                    f.write(chunk)
+                    stage.n_bytes += len(chunk)
+
+        sha256 = hasher.hexdigest()
+        if file_hash:
+            try:
+                _check_hash(sha256, file_hash)
+            except HashComparisonFailedException:
+                stage.outcome = "mismatch"
+                partial_path.unlink()
+                raise
+
+        # moves the file into the blob store, updates the records and may collect garbage
+        await loop.run_in_executor(None, _store_in_cache, partial_path, cached_path, sha256)
+
+    return cached_path.as_posix()
+
+
+async def _timed_get_model_async(filename: str, doi: str | None, file_hash: str | None) -> PrefetchResult:
+    start = time.perf_counter()
+    try:
+        path = await get_model_async(filename, doi=doi, file_hash=file_hash)
+    except Exception as error:
+        return PrefetchResult(filename, error=error, duration=time.perf_counter() - start)
+    return PrefetchResult(filename, path=path, duration=time.perf_counter() - start)
+
+
+async def prefetch_models_async(
+    specs: Iterable[ModelSpec],
+    max_concurrency: int = 8,
+) -> dict[str, PrefetchResult]:
+    """
+    Fetch several models into the cache concurrently, without blocking the event loop.
+
+    This is the asynchronous equivalent of :func:`prefetch_models`, with at most
+    ``max_concurrency`` models being fetched at once.
+    """
+    import asyncio
+
+    unique_specs: dict[str, tuple[str, str | None, str | None]] = {}
+    for spec in specs:
+        filename, doi, file_hash = _normalize_model_spec(spec)
+        unique_specs.setdefault(filename, (filename, doi, file_hash))
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(spec):
+        async with semaphore:
+            return await _timed_get_model_async(*spec)
+
+    results = await asyncio.gather(*(fetch(spec) for spec in unique_specs.values()))
+    return dict(zip(unique_specs, results))
+
+
 def assert_hash_equal(cached_path, expected_hash):
-    actual_hash = _get_sha256(cached_path)
+    with _Stage(HASH_VERIFICATION, pathlib.Path(cached_path).name) as stage:
+        # Files that were already hashed and haven't changed since are not read again
+        actual_hash = get_hash_record(CACHE_DIR).get_sha256(cached_path)
+        if actual_hash != expected_hash:
+            stage.outcome = "mismatch"
+        _check_hash(actual_hash, expected_hash)
+
+
+def _check_hash(actual_hash: str, expected_hash: str) -> None:
     if actual_hash != expected_hash:
         raise HashComparisonFailedException(
             f"NAGL model file hash check failed. Expected hash is {expected_hash} but actual hash is {actual_hash}"
         )
 
 
-def _download_and_verify_file(url: str, cached_path: pathlib.Path, file_hash: None | str = None) -> str:
-    """Download a file from URL to cached_path and optionally verify its hash."""
-    path_to_file, _ = urllib.request.urlretrieve(url, filename=cached_path.as_posix())
+# Errors part-way through a transfer, after which the download is resumed
+_RESUMABLE_ERRORS = (http.client.IncompleteRead, ConnectionError, TimeoutError)
 
-    assert cached_path.exists()
-    assert path_to_file == cached_path.as_posix()
 
-    if file_hash:
-        assert_hash_equal(cached_path, file_hash)
+# Errors downloading from one mirror, after which the next one is tried
+_FAILOVER_ERRORS = (OSError, EOFError, http.client.HTTPException, HashComparisonFailedException)
+
+
+def _record_failed_download(url: str, error: Exception) -> None:
+    """Mark the host of ``url`` as unhealthy, unless it responded but didn't have the file."""
+    if isinstance(error, HashComparisonFailedException):
+        return
+    if isinstance(error, urllib.error.HTTPError) and error.code < 500 and error.code != 429:
+        return
+    record_failure(url)
+
+
+def _partial_path(cached_path: pathlib.Path) -> pathlib.Path:
+    return cached_path.with_name(cached_path.name + ".part")
+
+
+def _validator_path(partial_path: pathlib.Path) -> pathlib.Path:
+    """Where the URL, validators and size of the file being downloaded into ``partial_path`` are kept."""
+    return partial_path.with_name(partial_path.name + ".json")
+
+
+def _discard_partial(partial_path: pathlib.Path) -> None:
+    partial_path.unlink(missing_ok=True)
+    _validator_path(partial_path).unlink(missing_ok=True)
+
+
+def _resumes_at(response, offset: int, validator: dict) -> bool:
+    """Whether a response to a range request continues the file of ``validator`` from ``offset``."""
+    match = re.fullmatch(r"bytes (\d+)-\d+/(\d+|\*)", response.headers.get("Content-Range", ""))
+    if response.status != 206 or match is None or int(match.group(1)) != offset:
+        return False
+    return validator.get("size") is None or match.group(2) in ("*", str(validator["size"]))
+
+
+class _SegmentRangeError(Exception):
+    """Raised when a server does not answer a segment's range request with that range."""
+
+
+# Errors downloading in segments, after which the file is downloaded again as one stream
+_SEGMENT_ERRORS = (_SegmentRangeError, urllib.error.HTTPError, *_RESUMABLE_ERRORS)
+
+
+def _can_download_in_segments(response) -> bool:
+    """Whether the server advertised range support for a whole file large enough to split."""
+    length = response.headers.get("Content-Length")
+    return (
+        response.status == 200
+        and response.headers.get("Accept-Ranges") == "bytes"
+        and length is not None
+        and int(length) >= SEGMENTED_DOWNLOAD_MIN_SIZE
+    )
+
+
+def _write_segment(response, path: pathlib.Path, start: int, end: int, cancelled: threading.Event) -> None:
+    with open(path, "r+b") as f:
+        f.seek(start)
+        position = start
+        while position < end and not cancelled.is_set():
+            chunk = response.read(min(_CHUNK_SIZE, end - position))
+            if not chunk:
+                raise http.client.IncompleteRead(b"", end - position)
+            f.write(chunk)
+            position += len(chunk)
+
+
+def _download_segments(url: str, response, partial_path: pathlib.Path, segments: int) -> tuple[str, int]:
+    """
+    Download a file in ``segments`` concurrent parts into a preallocated ``partial_path``,
+    reading the first part from ``response`` and requesting the others with range requests,
+    and return the SHA256 hash of the file and its size.
+    """
+    length = int(response.headers["Content-Length"])
+    bounds = [length * i // segments for i in range(segments + 1)]
+    with open(partial_path, "wb") as f:
+        f.truncate(length)
+    cancelled = threading.Event()
+
+    def fetch(index: int) -> None:
+        start, end = bounds[index], bounds[index + 1]
+        if index == 0:
+            _write_segment(response, partial_path, start, end, cancelled)
+            return
+        with _http.request(url, {"Range": f"bytes={start}-{end - 1}"}) as segment:
+            if segment.status != 206 or segment.headers.get("Content-Range") != f"bytes {start}-{end - 1}/{length}":
+                raise _SegmentRangeError(f"{url} did not return bytes {start}-{end - 1} of {length}")
+            _write_segment(segment, partial_path, start, end, cancelled)
+
+    with concurrent.futures.ThreadPoolExecutor(segments) as executor:
+        futures = [executor.submit(fetch, index) for index in range(segments)]
+        try:
+            for future in futures:
+                future.result()
+        except BaseException:
+            # stop the other segments early
+            cancelled.set()
+            raise
+
+    return _stream_sha256(partial_path), length
+
+
+def _stream_to_partial_file(url: str, partial_path: pathlib.Path, segments: int = 1) -> tuple[str, int]:
+    """
+    Stream ``url`` into ``partial_path``, resuming from the end of an existing partial file
+    if the server supports range requests, and return the SHA256 hash of the complete file
+    and the number of bytes received.
+
+    A new download of a large enough file is split into ``segments`` concurrent range
+    requests if the server supports them, falling back to a single stream if any fail.
+
+    The ``ETag`` or ``Last-Modified`` validator and size of a streamed file are kept next
+    to the partial file. A partial file is only resumed if they were recorded for the same
+    URL, with an ``If-Range`` request, and if the response continues the same file from
+    the end of the partial file. Otherwise the download starts over.
+    """
+    hasher = hashlib.sha256()
+    offset = partial_path.stat().st_size if partial_path.exists() else 0
+    validator = _read_json(_validator_path(partial_path), None)
+    if not offset or not isinstance(validator, dict) or validator.get("url") != url:
+        # there is no telling which version of the file a partial file is from
+        _discard_partial(partial_path)
+        offset, validator = 0, None
+
+    headers = {}
+    if validator is not None:
+        headers["Range"] = f"bytes={offset}-"
+        if validator.get("etag") or validator.get("last_modified"):
+            headers["If-Range"] = validator.get("etag") or validator["last_modified"]
+
+    try:
+        response = _http.request(url, headers)
+    except urllib.error.HTTPError as error:
+        if error.code == 416 and offset:
+            # the partial file doesn't match the remote file, so start over
+            _discard_partial(partial_path)
+            return _stream_to_partial_file(url, partial_path, segments)
+        raise
+
+    if not offset and segments > 1 and _can_download_in_segments(response):
+        try:
+            with response:
+                return _download_segments(url, response, partial_path, segments)
+        except _SEGMENT_ERRORS:
+            # the preallocated file has gaps, so it can't be resumed
+            _discard_partial(partial_path)
+            return _stream_to_partial_file(url, partial_path)
+
+    with response:
+        if validator is not None and _resumes_at(response, offset, validator):
+            with open(partial_path, "rb") as f:
+                while chunk := f.read(_CHUNK_SIZE):
+                    hasher.update(chunk)
+            mode = "ab"
+        elif response.status == 206:
+            # a range of a different version of the file
+            response.close()
+            _discard_partial(partial_path)
+            return _stream_to_partial_file(url, partial_path, segments)
+        else:
+            # the server ignored the range request, or the file changed, and is sending the whole file
+            offset = 0
+            mode = "wb"
+            length = response.headers.get("Content-Length")
+            _atomic_write_json(
+                _validator_path(partial_path),
+                {
+                    "url": url,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "size": int(length) if length is not None else None,
+                },
+            )
+
+        expected_length = response.headers.get("Content-Length")
+        n_bytes = 0
+        with open(partial_path, mode) as f:
+            while chunk := response.read(_CHUNK_SIZE):
+                hasher.update(chunk)
+                f.write(chunk)
+                n_bytes += len(chunk)
+
+        if expected_length is not None and n_bytes < int(expected_length):
+            raise http.client.IncompleteRead(b"", int(expected_length) - n_bytes)
+
+    return hasher.hexdigest(), n_bytes
+
+
+class _CorruptCompressedFileError(Exception):
+    """Raised when a compressed variant of a file can't be decompressed."""
+
+
+def _decompress_to_partial_file(url: str, partial_path: pathlib.Path, suffix: str) -> tuple[str, int]:
+    """
+    Stream a compressed file from ``url``, decompressing it into ``partial_path``, and
+    return the SHA256 hash of the decompressed file and the number of bytes received.
+    """
+    hasher = hashlib.sha256()
+    decompressor = _compression.decompressor(suffix)
+    n_bytes = 0
+    try:
+        with _http.request(url) as response, open(partial_path, "wb") as f:
+            expected_length = response.headers.get("Content-Length")
+            while chunk := response.read(_CHUNK_SIZE):
+                n_bytes += len(chunk)
+                data = b""
+                try:
+                    # a file can be several compressed streams one after another (as
+                    # written by ``cat a.gz b.gz``), each needing a new decompressor
+                    while chunk:
+                        if decompressor.eof:
+                            decompressor = _compression.decompressor(suffix)
+                        data += decompressor.decompress(chunk)
+                        chunk = decompressor.unused_data if decompressor.eof else b""
+                except Exception as error:
+                    # each library raises its own exception for corrupt data
+                    raise _CorruptCompressedFileError(f"Could not decompress {url}: {error}") from error
+                hasher.update(data)
+                f.write(data)
+
+            if expected_length is not None and n_bytes < int(expected_length):
+                raise http.client.IncompleteRead(b"", int(expected_length) - n_bytes)
+            if not decompressor.eof:
+                raise _CorruptCompressedFileError(f"{url} ended before the end of its compressed data")
+    except BaseException:
+        # decompression can't be resumed part-way through
+        partial_path.unlink(missing_ok=True)
+        raise
+
+    return hasher.hexdigest(), n_bytes
+
+
+def _is_unusable_variant(error: Exception) -> bool:
+    """Whether a compressed variant is missing or broken, so that the next variant should be tried."""
+    if isinstance(error, urllib.error.HTTPError):
+        return 400 <= error.code < 500
+    return isinstance(error, (_CorruptCompressedFileError, HashComparisonFailedException))
+
+
+def _download_preferring_compressed(
+    url: str, cached_path: pathlib.Path, file_hash: str | None, compressed_suffixes: Iterable[str]
+) -> str:
+    """Download a file from the first of its compressed variants that works, or else the file itself."""
+    # resume a partial download of the file itself instead of starting over
+    if not _partial_path(cached_path).exists():
+        for suffix in compressed_suffixes:
+            try:
+                return _download_and_verify_file(url + suffix, cached_path, file_hash, compression=suffix)
+            except Exception as error:
+                if not _is_unusable_variant(error):
+                    raise
+    return _download_and_verify_file(url, cached_path, file_hash)
+
+
+def _fetch_into_cache(
+    url: str,
+    cached_path: pathlib.Path,
+    file_hash: str | None = None,
+    compressed_suffixes: Iterable[str] = (),
+) -> str:
+    """
+    Download a file into the cache unless another process already has.
+
+    Only one process downloads a given file at a time: the others wait for its
+    lock and then reuse the file it downloaded.
+
+    Compressed variants of the file at ``url`` with each of ``compressed_suffixes``
+    appended are tried first, on each mirror, and decompressed as they arrive.
+    """
+    lock = FileLock(cached_path.with_name(cached_path.name + ".lock"), timeout=LOCK_TIMEOUT)
+    with _Stage(LOCK_WAIT, cached_path.name):
+        lock.acquire()
+    try:
+        if cached_path.exists():
+            if file_hash:
+                assert_hash_equal(cached_path, file_hash)
+            return cached_path.as_posix()
+
+        # try each mirror in turn, raising the error from the last one if they all fail
+        last_error: Exception | None = None
+        compressed_suffixes = list(compressed_suffixes)
+        for candidate in candidate_urls(url):
+            try:
+                path = _download_preferring_compressed(candidate, cached_path, file_hash, compressed_suffixes)
+            except _FAILOVER_ERRORS as error:
+                _record_failed_download(candidate, error)
+                last_error = error
+                continue
+            record_success(candidate)
+            return path
+        assert last_error is not None
+        raise last_error
+    finally:
+        lock.release()
+
+
+def _download_and_verify_file(
+    url: str,
+    cached_path: pathlib.Path,
+    file_hash: None | str = None,
+    retries: int = 3,
+    segments: int | None = None,
+    compression: str | None = None,
+) -> str:
+    """
+    Download a file from URL to cached_path and optionally verify its hash.
+
+    The file is streamed into a ``.part`` file next to ``cached_path`` while it is
+    hashed, and only renamed to ``cached_path`` once it is complete and verified, so
+    an interrupted download never leaves a truncated model in the cache. Transfers
+    that fail part-way through are retried up to ``retries`` times, resuming from
+    where they stopped.
+
+    Files of at least ``SEGMENTED_DOWNLOAD_MIN_SIZE`` bytes are downloaded as ``segments``
+    (by default ``DOWNLOAD_SEGMENTS``) concurrent range requests if the server advertises
+    support for them, and otherwise as a single stream.
+
+    If ``compression`` is the suffix of a compressed file, like ``".xz"``, the file at ``url``
+    is decompressed as it arrives, and the hash is that of the decompressed file. These
+    downloads start over instead of resuming.
+    """
+    partial_path = _partial_path(cached_path)
+    if segments is None:
+        segments = _env_setting("OPENFF_NAGL_MODELS_DOWNLOAD_SEGMENTS", int, DOWNLOAD_SEGMENTS)
+
+    with _Stage(DOWNLOAD, cached_path.name) as stage:
+        stage.n_bytes = 0
+        may_restart = not compression
+        while True:
+            resumed = False
+            for attempt in range(retries + 1):
+                resumed = resumed or (partial_path.exists() and _validator_path(partial_path).exists())
+                try:
+                    if compression:
+                        sha256, n_bytes = _decompress_to_partial_file(url, partial_path, compression)
+                    else:
+                        sha256, n_bytes = _stream_to_partial_file(url, partial_path, segments)
+                    stage.n_bytes += n_bytes
+                    break
+                except _RESUMABLE_ERRORS:
+                    if attempt == retries:
+                        raise
+                    time.sleep(0.5 * 2**attempt)
+
+            if file_hash:
+                try:
+                    _check_hash(sha256, file_hash)
+                except HashComparisonFailedException:
+                    _discard_partial(partial_path)
+                    if resumed and may_restart:
+                        # the partial file may have held part of another version of the file
+                        may_restart = False
+                        continue
+                    stage.outcome = "mismatch"
+                    raise
+            break
+
+        _validator_path(partial_path).unlink(missing_ok=True)
+        _store_in_cache(partial_path, cached_path, sha256)
 
     return cached_path.as_posix()
 
 
-def _get_sha256(filename: str) -> str:
-    """Get the SHA256 hash of a file from its path, assuming it's a binary file like a PyTorch model."""
-    hash = hashlib.sha256()
+def gc(
+    max_size: int | str | None = None,
+    min_age: float = 300.0,
+    timeout: float = LOCK_TIMEOUT,
+) -> GarbageCollectionResult:
+    """
+    Evict the least recently used models from the cache until it fits in ``max_size``.
+
+    Models are ordered by when they were last returned by :func:`get_model`.
+    Models named in ``KNOWN_HASHES``, models pinned with :func:`pin_model`,
+    models used in the last ``min_age`` seconds and models that are being
+    downloaded are never evicted. It is safe to run this while other processes
+    use the cache: files that are already open stay readable after they are
+    removed.
+
+    Parameters
+    ----------
+    max_size
+        The size to shrink the cache to, in bytes or with a binary unit suffix
+        like ``"10G"``. Defaults to ``MAX_CACHE_SIZE``, which can be set with
+        the ``OPENFF_NAGL_MODELS_MAX_CACHE_SIZE`` environment variable. If
+        neither is set, nothing is evicted.
+    min_age
+        How long, in seconds, a model is protected from eviction after it was
+        last used.
+    timeout
+        How long, in seconds, to wait for another process that is already
+        collecting garbage in the cache.
 
-    hash.update(open(filename, "rb").read())
+    Returns
+    -------
+    GarbageCollectionResult
+        The files that were evicted, the space freed and the resulting size of the cache.
+
+    Examples
+    --------
+    ::
+
+        >>> from openff.nagl_models._dynamic_fetch import gc
+        >>> gc("1G").freed
+        16891392
+
+    """
+    return collect_garbage(
+        CACHE_DIR,
+        _parse_size(max_size) if max_size is not None else _max_cache_size(),
+        pinned_names=KNOWN_HASHES,
+        pinned_hashes=KNOWN_HASHES.values(),
+        min_age=min_age,
+        timeout=timeout,
+    )
 
-    return hash.hexdigest()
+
+def pin_model(filename: str) -> None:
+    """Never evict cached models with this file name from the cache."""
+    get_usage_record(CACHE_DIR).pin(filename)
+
+
+def unpin_model(filename: str) -> None:
+    """Allow cached models with this file name to be evicted again, undoing :func:`pin_model`."""
+    get_usage_record(CACHE_DIR).unpin(filename)
+
+
+def rebuild_model_catalog() -> None:
+    """
+    Rebuild the catalog of cached models by scanning the cache directory.
+
+    This is only needed if files in the cache directory were added or removed
+    by something other than :func:`get_model`.
+    """
+    get_catalog(CACHE_DIR).rebuild()
+
+
+def _get_sha256(filename: str) -> str:
+    """Get the SHA256 hash of a file from its path, assuming it's a binary file like a PyTorch model."""
+    return _stream_sha256(filename)
@@ -0,0 +1,179 @@
+"""
+Minimal HTTP/1.1 client helpers that don't depend on anything outside the standard library.
+
+The asynchronous client is in :mod:`openff.nagl_models._async_http`, so that
+synchronous downloads don't import :mod:`asyncio`.
+"""
+
+import email.message
+import http.client
+import ssl
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+USER_AGENT = "openff-nagl-models"
+
+_REDIRECT_CODES = {301, 302, 303, 307, 308}
+_MAX_REDIRECTS = 10
+
+
+def uses_proxy(url: str) -> bool:
+    """Whether a request to ``url`` should go through a proxy configured in the environment."""
+    parts = urllib.parse.urlsplit(url)
+    return parts.scheme in urllib.request.getproxies() and not urllib.request.proxy_bypass(parts.hostname or "")
+
+
+class PooledResponse:
+    """
+    A response from :meth:`ConnectionPool.request`.
+
+    Its connection is returned to the pool when it is closed, if the body was
+    read to the end and the server allows the connection to be kept alive.
+    """
+
+    def __init__(self, url: str, response: http.client.HTTPResponse, release):
+        self.url = url
+        self._response = response
+        self._release = release
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+
+    def read(self, amount: int | None = None) -> bytes:
+        return self._response.read(amount)
+
+    def close(self) -> None:
+        if self._release is not None:
+            release, self._release = self._release, None
+            release(reusable=self._response.isclosed() and not self._response.will_close)
+        self._response.close()
+
+    def __enter__(self) -> "PooledResponse":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+# Errors that mean a reused connection was closed by the server while it was idle
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP/1.1 connections, reused between requests to the same host.
+
+    Fetching several files from the same host then only pays for connecting
+    (and the TLS handshake) once per concurrent request, rather than once per
+    file. Connections are only used by one request at a time, so the pool can
+    be shared between threads.
+
+    Requests to hosts that should go through a proxy configured in the
+    environment are made with :mod:`urllib` instead, without pooling.
+    """
+
+    def __init__(self, max_idle_per_host: int = 4, timeout: float = 60.0):
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self._idle: dict[tuple[str, str, int], list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def _connect(self, key: tuple[str, str, int]) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout, context=ssl.create_default_context())
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _checkout(self, key: tuple[str, str, int]) -> tuple[http.client.HTTPConnection, bool]:
+        """Return an idle connection to a host, or a new one, and whether it was reused."""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(key), False
+
+    def _checkin(self, key: tuple[str, str, int], connection: http.client.HTTPConnection, reusable: bool) -> None:
+        if reusable:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_idle_per_host:
+                    idle.append(connection)
+                    return
+        connection.close()
+
+    def _open(self, url: str, headers: dict[str, str]) -> PooledResponse:
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in {"http", "https"}:
+            raise ValueError(f"Unsupported URL scheme in {url}")
+        key = (parts.scheme, parts.hostname or "", parts.port or (443 if parts.scheme == "https" else 80))
+        target = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        request_headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "identity", **headers}
+
+        connection, reused = self._checkout(key)
+        try:
+            try:
+                connection.request("GET", target, headers=request_headers)
+                response = connection.getresponse()
+            except _STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                # the server closed the idle connection, so try once more on a new one
+                connection.close()
+                connection = self._connect(key)
+                connection.request("GET", target, headers=request_headers)
+                response = connection.getresponse()
+        except BaseException:
+            connection.close()
+            raise
+
+        def release(reusable: bool) -> None:
+            self._checkin(key, connection, reusable)
+
+        return PooledResponse(url, response, release)
+
+    def request(self, url: str, headers: dict[str, str] | None = None) -> "PooledResponse | http.client.HTTPResponse":
+        """
+        Make a GET request, following redirects.
+
+        Raises
+        ------
+        urllib.error.HTTPError
+            If the server responds with an error status, as :func:`urllib.request.urlopen` would.
+        """
+        headers = dict(headers or {})
+        if uses_proxy(url):
+            return urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=self.timeout)
+
+        for _ in range(_MAX_REDIRECTS + 1):
+            response = self._open(url, headers)
+            if response.status in _REDIRECT_CODES and "Location" in response.headers:
+                # read the rest of the response, so that the connection can be reused
+                response.read()
+                response.close()
+                url = urllib.parse.urljoin(url, response.headers["Location"])
+                continue
+            if response.status >= 400:
+                response.read()
+                response.close()
+                raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+            return response
+
+        raise urllib.error.HTTPError(url, 310, "Too many redirects", email.message.Message(), None)
+
+    def clear(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+
+_CONNECTION_POOL = ConnectionPool()
+
+
+def request(url: str, headers: dict[str, str] | None = None) -> "PooledResponse | http.client.HTTPResponse":
+    """Make a GET request with the connection pool shared by this process, following redirects."""
+    return _CONNECTION_POOL.request(url, headers)
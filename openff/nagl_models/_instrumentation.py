@@ -0,0 +1,233 @@
+"""
+Hooks reporting how long each stage of finding a model takes.
+
+:mod:`openff.nagl_models._dynamic_fetch` reports a :class:`FetchEvent` for
+every stage of :func:`~openff.nagl_models._dynamic_fetch.get_model` to the
+functions registered with :func:`add_fetch_hook`. When no hooks are
+registered, reporting costs a single check of an empty list.
+"""
+
+import bisect
+import dataclasses
+import threading
+import time
+import warnings
+from collections.abc import Callable
+
+PACKAGE_LOOKUP = "package_lookup"
+"""Looking for the model in the directories provided through entry points."""
+CACHE_LOOKUP = "cache_lookup"
+"""Looking for the model in the cache directory."""
+HASH_VERIFICATION = "hash_verification"
+"""Checking the hash of a model found in a package or in the cache."""
+BLOB_LOOKUP = "blob_lookup"
+"""Looking for a stored file with the hash of the model, under any name."""
+DOI_PARSE = "doi_parse"
+"""Finding the download URL of the model from a Zenodo DOI."""
+LOCK_WAIT = "lock_wait"
+"""Waiting for the lock on a model, while another process may be downloading it."""
+DOWNLOAD = "download"
+"""Downloading the model into the cache and checking its hash."""
+
+STAGES = (PACKAGE_LOOKUP, CACHE_LOOKUP, HASH_VERIFICATION, BLOB_LOOKUP, DOI_PARSE, LOCK_WAIT, DOWNLOAD)
+
+
+@dataclasses.dataclass(frozen=True)
+class FetchEvent:
+    """A stage of finding a model, as reported to fetch hooks."""
+
+    stage: str
+    """One of ``STAGES``."""
+    filename: str
+    duration: float
+    """Wall time of the stage in seconds."""
+    outcome: str
+    """
+    ``"hit"`` or ``"miss"`` for lookups, ``"mismatch"`` for a failed hash check,
+    ``"error"`` if the stage raised any other exception, and ``"ok"`` otherwise.
+    """
+    n_bytes: int | None = None
+    """The number of bytes downloaded, for the download stage."""
+    error: BaseException | None = None
+
+
+FetchHook = Callable[[FetchEvent], object]
+
+_FETCH_HOOKS: list[FetchHook] = []
+_FETCH_HOOKS_LOCK = threading.RLock()
+
+
+def add_fetch_hook(hook: FetchHook) -> None:
+    """
+    Call ``hook`` with a :class:`FetchEvent` after every stage of finding a model.
+
+    Hooks are called in the thread that ran the stage, so they should be quick
+    and thread-safe. Exceptions raised by a hook are turned into warnings.
+    """
+    global _FETCH_HOOKS
+    with _FETCH_HOOKS_LOCK:
+        # replaced rather than appended to, so that emitting never needs the lock
+        _FETCH_HOOKS = [*_FETCH_HOOKS, hook]
+
+
+def remove_fetch_hook(hook: FetchHook) -> None:
+    """Stop calling a hook added with :func:`add_fetch_hook`."""
+    global _FETCH_HOOKS
+    with _FETCH_HOOKS_LOCK:
+        hooks = list(_FETCH_HOOKS)
+        hooks.remove(hook)
+        _FETCH_HOOKS = hooks
+
+
+def _emit(event: FetchEvent) -> None:
+    for hook in _FETCH_HOOKS:
+        try:
+            hook(event)
+        except Exception as error:
+            warnings.warn(f"Fetch hook {hook!r} raised {error!r}")
+
+
+class _Stage:
+    """
+    Time a stage and report it to the fetch hooks when it finishes.
+
+    The outcome defaults to ``"ok"``, or ``"error"`` if the stage raised, and
+    can be set while the stage runs. A ``duration`` measured elsewhere, e.g.
+    for work shared between several models, is reported instead of timing
+    the stage.
+    """
+
+    __slots__ = ("_start", "duration", "filename", "n_bytes", "outcome", "stage")
+
+    def __init__(self, stage: str, filename: str, duration: float | None = None):
+        self.stage = stage
+        self.filename = filename
+        self.duration = duration
+        self.outcome: str | None = None
+        self.n_bytes: int | None = None
+
+    def __enter__(self) -> "_Stage":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, error, traceback) -> None:
+        if not _FETCH_HOOKS:
+            return
+        duration = time.perf_counter() - self._start if self.duration is None else self.duration
+        outcome = self.outcome or ("ok" if error is None else "error")
+        _emit(FetchEvent(self.stage, self.filename, duration, outcome, self.n_bytes, error))
+
+
+# Latency histogram bucket upper bounds in seconds, two per decade from 1 µs to 100 s
+LATENCY_BUCKETS = tuple(round(10 ** (exponent / 2), 12) for exponent in range(-12, 5))
+
+
+@dataclasses.dataclass
+class LatencyHistogram:
+    """Counts of durations in the buckets bounded by ``LATENCY_BUCKETS``."""
+
+    counts: list[int] = dataclasses.field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    """The number of durations up to each bound, with a final bucket for anything longer."""
+    count: int = 0
+    total: float = 0.0
+    min: float = float("inf")
+    max: float = 0.0
+
+    def add(self, duration: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, duration)] += 1
+        self.count += 1
+        self.total += duration
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket it falls in."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class FetchStatsCollector:
+    """
+    A fetch hook that aggregates counters and latency histograms.
+
+    Examples
+    --------
+    ::
+
+        >>> from openff.nagl_models._dynamic_fetch import FetchStatsCollector, add_fetch_hook, get_model
+        >>> stats = FetchStatsCollector()
+        >>> add_fetch_hook(stats)
+        >>> get_model("openff-gnn-am1bcc-1.0.0.pt")
+        '/.../openff/nagl_models/models/am1bcc/openff-gnn-am1bcc-1.0.0.pt'
+        >>> stats.counts[("package_lookup", "hit")]
+        1
+        >>> stats.histograms["hash_verification"].quantile(0.99)
+        0.0001
+
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counts: dict[tuple[str, str], int] = {}
+        """The number of events of each (stage, outcome)."""
+        self.histograms: dict[str, LatencyHistogram] = {}
+        """The durations of each stage."""
+        self.bytes_downloaded = 0
+
+    def __call__(self, event: FetchEvent) -> None:
+        with self._lock:
+            key = (event.stage, event.outcome)
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.histograms.setdefault(event.stage, LatencyHistogram()).add(event.duration)
+            self.bytes_downloaded += event.n_bytes or 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = {}
+            self.histograms = {}
+            self.bytes_downloaded = 0
+
+    def summary(self) -> dict[str, dict]:
+        """Return the count, outcomes and latency percentiles of each stage, e.g. for logging as JSON."""
+        with self._lock:
+            return {
+                stage: {
+                    "count": histogram.count,
+                    "outcomes": {outcome: n for (s, outcome), n in sorted(self.counts.items()) if s == stage},
+                    "mean": histogram.mean,
+                    "p50": histogram.quantile(0.5),
+                    "p90": histogram.quantile(0.9),
+                    "p99": histogram.quantile(0.99),
+                    "max": histogram.max,
+                }
+                for stage, histogram in self.histograms.items()
+            }
+
+
+_FETCH_STATS: FetchStatsCollector | None = None
+
+
+def get_fetch_stats() -> FetchStatsCollector:
+    """
+    Return the collector of fetch statistics for this process.
+
+    It is registered as a fetch hook the first time this is called, and only
+    collects events from then on.
+    """
+    global _FETCH_STATS
+    with _FETCH_HOOKS_LOCK:
+        if _FETCH_STATS is None:
+            _FETCH_STATS = FetchStatsCollector()
+            add_fetch_hook(_FETCH_STATS)
+        return _FETCH_STATS
@@ -0,0 +1,142 @@
+"""
+Loading models with OpenFF NAGL, keeping recently used models in memory.
+"""
+
+import collections
+import os
+import threading
+from typing import TYPE_CHECKING
+
+from openff.nagl_models import _dynamic_fetch
+from openff.nagl_models._cache import get_hash_record
+
+if TYPE_CHECKING:
+    from openff.nagl.nn._models import GNNModel
+
+# The most models kept loaded at once, unless OPENFF_NAGL_MODELS_MAX_LOADED_MODELS is set
+MAX_LOADED_MODELS = 8
+
+# The most memory, in bytes, that loaded models are allowed to use, as estimated from the size of their files,
+# unless OPENFF_NAGL_MODELS_MAX_LOADED_MODELS_SIZE is set
+MAX_LOADED_MODELS_SIZE = 1 << 30
+
+
+def _load_gnn_model(path: str) -> "GNNModel":
+    """Deserialize a model file with OpenFF NAGL, in evaluation mode."""
+    try:
+        from openff.nagl.nn._models import GNNModel
+    except ImportError as error:
+        raise ImportError(
+            "Loading models requires OpenFF NAGL, which can be installed with "
+            "`mamba install -c conda-forge openff-nagl-base`"
+        ) from error
+
+    return GNNModel.load(path, eval_mode=True)
+
+
+class _LoadedModels:
+    """Loaded models by the SHA256 hash of their file, evicting the least recently used ones."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # SHA256 hash -> (model, size of its file)
+        self._models: collections.OrderedDict[str, tuple[GNNModel, int]] = collections.OrderedDict()
+        self._loads = _dynamic_fetch._SingleFlight()
+
+    def get(self, path: str, sha256: str) -> "GNNModel":
+        with self._lock:
+            if sha256 in self._models:
+                self._models.move_to_end(sha256)
+                return self._models[sha256][0]
+
+        # threads asking for the same model at the same time only load it once
+        return self._loads.do(sha256, self._load, path, sha256)
+
+    def _load(self, path: str, sha256: str) -> "GNNModel":
+        model = _load_gnn_model(path)
+        with self._lock:
+            self._models[sha256] = (model, os.path.getsize(path))
+            self._evict()
+        return model
+
+    def _evict(self) -> None:
+        max_models = _dynamic_fetch._env_setting("OPENFF_NAGL_MODELS_MAX_LOADED_MODELS", int, MAX_LOADED_MODELS)
+        max_size = _dynamic_fetch._env_setting(
+            "OPENFF_NAGL_MODELS_MAX_LOADED_MODELS_SIZE", int, MAX_LOADED_MODELS_SIZE
+        )
+        total = sum(size for _, size in self._models.values())
+        # the model that was just loaded is always kept, even if it is too big on its own
+        while len(self._models) > 1 and (len(self._models) > max_models or total > max_size):
+            _, (_, size) = self._models.popitem(last=False)
+            total -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+    def __contains__(self, sha256: str) -> bool:
+        with self._lock:
+            return sha256 in self._models
+
+
+_LOADED_MODELS = _LoadedModels()
+
+
+def load_model(
+    filename: str,
+    doi: str | None = None,
+    file_hash: str | None = None,
+) -> "GNNModel":
+    """
+    Load a model with OpenFF NAGL, reusing it if it was loaded recently in this process.
+
+    The model file is found, downloaded if necessary, and verified with
+    :func:`~openff.nagl_models.get_model`, which takes the same arguments.
+    Loaded models are kept in memory by the SHA256 hash of their file, so
+    identical files with different names share a model, and a file that
+    changes is loaded again. The least recently used models are dropped once
+    more than ``MAX_LOADED_MODELS`` are loaded, or their files add up to more
+    than ``MAX_LOADED_MODELS_SIZE`` bytes. These can be set with the
+    ``OPENFF_NAGL_MODELS_MAX_LOADED_MODELS`` and
+    ``OPENFF_NAGL_MODELS_MAX_LOADED_MODELS_SIZE`` environment variables.
+
+    The same model instance, in evaluation mode, is returned to every caller,
+    so it must not be modified, e.g. by training it. To get an independent
+    copy, load the file from :func:`~openff.nagl_models.get_model` directly.
+
+    This requires OpenFF NAGL to be installed.
+
+    Returns
+    -------
+    openff.nagl.nn._models.GNNModel
+
+    Raises
+    ------
+    HashComparisonFailedException
+    FileNotFoundError
+    ImportError
+        If OpenFF NAGL is not installed.
+
+    Examples
+    --------
+    ::
+
+        >>> from openff.nagl_models import load_model
+        >>> from openff.toolkit import Molecule
+        >>> model = load_model("openff-gnn-am1bcc-1.0.0.pt")
+        >>> model.compute_property(Molecule.from_smiles("CCO"), readout_name="am1bcc_charges", as_numpy=True)
+        array([-0.09629,  0.13245, -0.60293,  0.04465,  0.04465,  0.04465,  0.01728,
+                0.01728,  0.39826], dtype=float32)
+        >>> load_model("openff-gnn-am1bcc-1.0.0.pt") is model
+        True
+
+    """
+    path = _dynamic_fetch.get_model(filename, doi=doi, file_hash=file_hash)
+    # already recorded if the file was verified or downloaded, so this doesn't read the file again
+    sha256 = get_hash_record(_dynamic_fetch.CACHE_DIR).get_sha256(path)
+    return _LOADED_MODELS.get(path, sha256)
+
+
+def clear_loaded_model_cache() -> None:
+    """Drop every model kept in memory by :func:`load_model`."""
+    _LOADED_MODELS.clear()
@@ -0,0 +1,125 @@
+"""
+Mirrors of the hosts that models are downloaded from, tried in order with failover.
+
+Mirrors are configured as an ordered list of base URLs, either in the
+``OPENFF_NAGL_MODELS_MIRRORS`` environment variable (separated by commas or
+whitespace) or in a file with one URL per line, at ``MIRRORS_FILE`` or the path
+in ``OPENFF_NAGL_MODELS_MIRRORS_FILE``. A file is downloaded from each mirror
+in turn, with the path of its original URL appended to the mirror's URL, and
+finally from its original URL. A ``{host}`` placeholder in a mirror's URL is
+replaced with the host of the original URL, for mirrors of several hosts:
+
+.. code-block:: text
+
+    # mirrors.txt
+    https://artifacts.example.com/zenodo
+    https://backup.example.com/{host}
+
+With this file, ``https://zenodo.org/api/records/1/files/model.pt`` is tried
+at ``https://artifacts.example.com/zenodo/api/records/1/files/model.pt``,
+then ``https://backup.example.com/zenodo.org/api/records/1/files/model.pt``,
+then at its original URL.
+
+Hosts that fail to respond are tried after the others until they have
+recovered, for a cool-down period that doubles with each consecutive failure.
+"""
+
+import dataclasses
+import os
+import pathlib
+import re
+import threading
+import time
+import urllib.parse
+
+import platformdirs
+
+MIRRORS_FILE = platformdirs.user_config_path() / "OPENFF_NAGL_MODELS" / "mirrors.txt"
+
+# How long, in seconds, a host is tried after the others once it has failed, doubling with each failure in a row
+HOST_COOLDOWN = 30.0
+MAX_HOST_COOLDOWN = 600.0
+
+
+def get_mirrors() -> list[str]:
+    """Return the configured mirror URLs, in the order they are tried."""
+    mirrors = os.environ.get("OPENFF_NAGL_MODELS_MIRRORS")
+    if mirrors is not None:
+        return re.split(r"[,\s]+", mirrors.strip()) if mirrors.strip() else []
+
+    path = pathlib.Path(os.environ.get("OPENFF_NAGL_MODELS_MIRRORS_FILE", MIRRORS_FILE))
+    try:
+        lines = path.read_text().splitlines()
+    except FileNotFoundError:
+        return []
+    return [line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#")]
+
+
+def mirror_url(mirror: str, url: str) -> str:
+    """Return the URL of the file at ``url`` on a mirror."""
+    parts = urllib.parse.urlsplit(url)
+    base = mirror.replace("{host}", parts.netloc).rstrip("/")
+    return base + urllib.parse.urlunsplit(("", "", parts.path, parts.query, ""))
+
+
+@dataclasses.dataclass
+class _HostHealth:
+    failures: int = 0
+    """Consecutive failures."""
+    retry_after: float = 0.0
+    """The ``time.monotonic()`` until which the host is tried after healthy hosts."""
+
+
+class HostHealth:
+    """The recent failures of each host, shared by the downloads in a process."""
+
+    def __init__(self, cooldown: float = HOST_COOLDOWN, max_cooldown: float = MAX_HOST_COOLDOWN):
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._hosts: dict[str, _HostHealth] = {}
+        self._lock = threading.Lock()
+
+    def is_healthy(self, host: str) -> bool:
+        with self._lock:
+            health = self._hosts.get(host)
+            return health is None or health.retry_after <= time.monotonic()
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            self._hosts.pop(host, None)
+
+    def record_failure(self, host: str) -> None:
+        with self._lock:
+            health = self._hosts.setdefault(host, _HostHealth())
+            health.failures += 1
+            cooldown = min(self.cooldown * 2 ** (health.failures - 1), self.max_cooldown)
+            health.retry_after = time.monotonic() + cooldown
+
+    def order(self, urls: list[str]) -> list[str]:
+        """Sort URLs so that healthy hosts come first, keeping their order otherwise."""
+        return sorted(urls, key=lambda url: not self.is_healthy(_host(url)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._hosts.clear()
+
+
+def _host(url: str) -> str:
+    return urllib.parse.urlsplit(url).netloc
+
+
+_HOST_HEALTH = HostHealth()
+
+
+def candidate_urls(url: str) -> list[str]:
+    """Return the URLs to try downloading ``url`` from: each mirror and then ``url`` itself, healthiest first."""
+    urls = [mirror_url(mirror, url) for mirror in get_mirrors()] + [url]
+    return _HOST_HEALTH.order(list(dict.fromkeys(urls)))
+
+
+def record_success(url: str) -> None:
+    _HOST_HEALTH.record_success(_host(url))
+
+
+def record_failure(url: str) -> None:
+    _HOST_HEALTH.record_failure(_host(url))
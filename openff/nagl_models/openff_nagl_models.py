@@ -3,11 +3,23 @@ This module only contains the function that will be the entry point that
 will be used to find the model files.
 """
 
+import dataclasses
+import functools
+import importlib
 import importlib.resources
 import os
 import pathlib
+import sys
+import threading
 import warnings
-from typing import Literal, overload
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Literal, overload
+
+if TYPE_CHECKING:
+    from packaging.specifiers import SpecifierSet
+    from packaging.version import Version
+
+    from openff.nagl_models._cache import CatalogEntry
 
 
 def get_nagl_model_dirs_paths() -> list[pathlib.Path]:
@@ -28,22 +40,44 @@ def get_nagl_model_dirs_paths() -> list[pathlib.Path]:
     return [base / "models" / model_type for model_type in model_types]  # type: ignore[misc]
 
 
+@functools.lru_cache(maxsize=1)
+def _discover_nagl_model_directories(sys_path: tuple[str, ...]) -> tuple[pathlib.Path, ...]:
+    # sys_path is only part of the cache key, so that changes to sys.path trigger rediscovery
+    from importlib.metadata import entry_points
+
+    return tuple(
+        path
+        for entry_point in entry_points(group="openforcefield.nagl_model_directory")
+        for path in entry_point.load()()
+    )
+
+
 def load_nagl_model_directory_entry_points() -> list[pathlib.Path]:
     """
     Load the entry points for the NAGL model directories.
 
+    Scanning installed distributions for entry points is slow, so the result
+    is cached for the lifetime of the process. The cache is invalidated
+    automatically when ``sys.path`` changes, and can be cleared explicitly
+    with :func:`clear_nagl_model_directory_cache`, e.g. after installing a
+    package that provides models at runtime.
+
     Returns
     -------
     dir_paths
         The list of directory paths containing the NAGL model files.
     """
-    from importlib.metadata import entry_points
+    return list(_discover_nagl_model_directories(tuple(sys.path)))
 
-    return [
-        path
-        for entry_point in entry_points(group="openforcefield.nagl_model_directory")
-        for path in entry_point.load()()
-    ]
+
+def clear_nagl_model_directory_cache() -> None:
+    """
+    Clear the cached NAGL model directories found through entry points.
+
+    The next lookup will scan installed distributions again.
+    """
+    importlib.invalidate_caches()
+    _discover_nagl_model_directories.cache_clear()
 
 
 def search_file_path(
@@ -70,9 +104,8 @@ def search_file_path(
     if isinstance(search_paths, str | pathlib.Path):
         search_paths = [search_paths]
 
-    search_paths.insert(0, ".")
-
-    for path in search_paths:
+    # don't modify the caller's list
+    for path in [".", *search_paths]:
         file_path = pathlib.Path(path) / file_name
         if file_path.exists():
             return file_path.resolve()
@@ -80,6 +113,143 @@ def search_file_path(
     return None
 
 
+class ModelResolver:
+    """
+    Resolve NAGL model file names against an index of model directories.
+
+    The contents of every directory are listed once and kept in a
+    name-to-path index, so resolving a name is a dictionary lookup rather
+    than probing each directory for the file. Before each lookup the
+    modification time of every directory is checked, and only directories
+    that have changed since they were last listed are listed again.
+
+    Parameters
+    ----------
+    directories
+        The directories to search, in order of precedence. By default, the
+        directories found in the ``openforcefield.nagl_model_directory``
+        entry point are used, and are kept up to date with
+        :func:`load_nagl_model_directory_entry_points`.
+
+    Examples
+    --------
+    ::
+
+        >>> from openff.nagl_models import ModelResolver
+        >>> resolver = ModelResolver()
+        >>> resolver.resolve("openff-gnn-am1bcc-1.0.0.pt")
+        PosixPath('/home/.../openff-nagl-models/openff/nagl_models/models/am1bcc/openff-gnn-am1bcc-1.0.0.pt')
+        >>> resolver.resolve("does-not-exist.pt") is None
+        True
+
+    """
+
+    def __init__(self, directories: Iterable[str | os.PathLike] | None = None):
+        self._fixed_directories = None if directories is None else [pathlib.Path(d) for d in directories]
+        self._directories: list[pathlib.Path] = []
+        # directory -> (modification time, {file name: resolved path})
+        self._listings: dict[pathlib.Path, tuple[int | None, dict[str, pathlib.Path]]] = {}
+        self._index: dict[str, pathlib.Path] = {}
+        self._lock = threading.Lock()
+        self.generation = 0
+        """Incremented whenever the indexed files change, so that data derived from them can be cached."""
+
+    @property
+    def directories(self) -> list[pathlib.Path]:
+        """The directories searched by this resolver, in order of precedence."""
+        if self._fixed_directories is not None:
+            return list(self._fixed_directories)
+        return load_nagl_model_directory_entry_points()
+
+    @staticmethod
+    def _list_directory(directory: pathlib.Path) -> dict[str, pathlib.Path]:
+        try:
+            with os.scandir(directory) as entries:
+                return {entry.name: pathlib.Path(entry.path).resolve() for entry in entries}
+        except OSError:
+            return {}
+
+    def refresh(self) -> None:
+        """List any directories that are new or have been modified since they were last listed."""
+        with self._lock:
+            directories = self.directories
+            changed = directories != self._directories
+
+            for directory in directories:
+                try:
+                    mtime: int | None = os.stat(directory).st_mtime_ns
+                except OSError:
+                    mtime = None
+                listing = self._listings.get(directory)
+                if listing is None or listing[0] != mtime:
+                    self._listings[directory] = (mtime, self._list_directory(directory))
+                    changed = True
+
+            if changed:
+                for directory in set(self._listings) - set(directories):
+                    del self._listings[directory]
+                index: dict[str, pathlib.Path] = {}
+                for directory in directories:
+                    for name, path in self._listings[directory][1].items():
+                        index.setdefault(name, path)
+                self._directories = directories
+                self._index = index
+                self.generation += 1
+
+    def files(self) -> list[pathlib.Path]:
+        """
+        Return the absolute paths of every file in the resolver's directories.
+
+        Files that are shadowed by a file with the same name in a directory of
+        higher precedence are included.
+        """
+        self.refresh()
+        with self._lock:
+            return [path for directory in self._directories for path in self._listings[directory][1].values()]
+
+    def resolve(self, model: str | os.PathLike) -> pathlib.Path | None:
+        """
+        Return the absolute path to a model file in the resolver's directories.
+
+        Parameters
+        ----------
+        model
+            The name of the model file. Names including directory components
+            are looked up relative to each directory.
+
+        Returns
+        -------
+        The absolute path to the model file if it was found, otherwise None.
+        """
+        self.refresh()
+        return self._lookup(model)
+
+    def resolve_many(self, models: Iterable[str | os.PathLike]) -> dict[str, pathlib.Path | None]:
+        """
+        Resolve several model file names, checking the directories for changes only once.
+
+        Returns
+        -------
+        A dictionary of each name to its absolute path, or None if it was not found.
+        """
+        self.refresh()
+        return {os.fspath(model): self._lookup(model) for model in models}
+
+    def _lookup(self, model: str | os.PathLike) -> pathlib.Path | None:
+        name = os.fspath(model)
+        if os.path.basename(name) == name:
+            return self._index.get(name)
+
+        for directory in self._directories:
+            file_path = directory / name
+            if file_path.exists():
+                return file_path.resolve()
+        return None
+
+
+_DEFAULT_RESOLVER = ModelResolver()
+
+
 def validate_nagl_model_path(model: str) -> pathlib.Path:
     """
     Validate and return the absolute path to a NAGL model file.
@@ -118,8 +288,10 @@ def validate_nagl_model_path(model: str) -> pathlib.Path:
         PosixPath('/home/.../my-local-gnn.pt')
 
     """
-    model_paths = [path.as_posix() for path in load_nagl_model_directory_entry_points()]
-    full_path = search_file_path(model, model_paths)
+    # the current working directory, or an absolute path, takes precedence
+    full_path = search_file_path(model)
+    if full_path is None:
+        full_path = _DEFAULT_RESOLVER.resolve(model)
     if full_path is None:
         raise FileNotFoundError(f"Could not find {model}")
     return full_path
@@ -141,6 +313,10 @@ def list_available_nagl_models(with_path=True) -> list[pathlib.Path] | list[str]
       * Python's `entry_points` mechanism
       * This package's dynamic fetching and caching of GitHub release assets
 
+    Models are listed from a catalog kept in the cache directory rather than
+    by walking the cache, so files placed in the cache by hand are only listed
+    once the catalog is rebuilt with :func:`rebuild_model_catalog`.
+
     Identical models found with each method will be listed multiple times if
     ``with_path is True``.
 
@@ -169,18 +345,18 @@ def list_available_nagl_models(with_path=True) -> list[pathlib.Path] | list[str]
         ['openff-gnn-am1bcc-0.1.0-rc.1.pt', 'openff-gnn-am1bcc-0.0.1-alpha.1.pt', ...]
 
     """
-    from openff.nagl_models._dynamic_fetch import CACHE_DIR, KNOWN_HASHES
+    from openff.nagl_models._dynamic_fetch import KNOWN_HASHES, _synced_catalog
 
-    model_paths = load_nagl_model_directory_entry_points()
-    model_files: list[pathlib.Path] = list()
-    for path in model_paths:
-        model_files.extend(path.glob("*.pt"))
+    # the catalog avoids walking the cache directory, which can be slow on network file systems
+    catalog = _synced_catalog()
 
-    entry_point_paths = sorted([f.resolve() for f in model_files])
+    entry_point_paths = sorted(pathlib.Path(entry.path) for entry in catalog.entries(source="installed"))
 
-    # look for all .pt files in the cache directory, but only those that are
+    # list all .pt files in the cache directory, but only those that are
     # expected to also be found in release assets
-    cached_paths = [cached_file for cached_file in CACHE_DIR.rglob("*.pt") if cached_file.name in KNOWN_HASHES]
+    cached_paths = [
+        pathlib.Path(entry.path) for entry in catalog.entries(source="cache") if entry.name in KNOWN_HASHES
+    ]
     if not with_path:
         entry_point_files = set([x.name for x in entry_point_paths])
         cached_files = set([x.name for x in cached_paths])
@@ -195,15 +371,210 @@ def list_available_nagl_models(with_path=True) -> list[pathlib.Path] | list[str]
         return entry_point_paths + cached_paths
 
 
+@dataclasses.dataclass(frozen=True)
+class ModelVersion:
+    """A model file, with the type and version parsed from its name."""
+
+    model_type: str
+    version: "Version"
+    path: pathlib.Path
+    source: str
+    """``"installed"`` for models in entry point directories, ``"cache"`` for downloaded models."""
+
+
+class ModelVersionIndex:
+    """
+    Installed and cached models of each type, sorted by version.
+
+    Only files named ``openff-gnn-<model_type>-<version>.pt``, with a valid
+    version, are indexed. If the same version of a model is both installed
+    and cached, the installed file is used, as it would be by ``get_model``,
+    and if it is installed in several directories, the file in the directory
+    that ``resolver`` searches first is used. Versions are parsed once, when
+    the index is built, and the latest version of each type is looked up in
+    constant time.
+
+    Use :func:`get_model_version_index` to get an index that is kept up to date
+    with the installed and cached models.
+    """
+
+    def __init__(self, entries: Iterable["CatalogEntry"], resolver: ModelResolver | None = None):
+        from packaging.version import Version
+
+        # the position of each installed file in the order the resolver searches them
+        precedence = {path.as_posix(): i for i, path in enumerate((resolver or _DEFAULT_RESOLVER).files())}
+
+        models: dict[tuple[str, Version], ModelVersion] = {}
+        # installed models take precedence, as they do in get_model and validate_nagl_model_path
+        for entry in sorted(
+            entries,
+            key=lambda entry: (entry.source != "installed", precedence.get(entry.path, len(precedence)), entry.path),
+        ):
+            if entry.model_type is None or entry.version is None:
+                continue
+            version = Version(entry.version)
+            models.setdefault(
+                (entry.model_type, version),
+                ModelVersion(entry.model_type, version, pathlib.Path(entry.path), entry.source),
+            )
+
+        self._versions: dict[str, list[ModelVersion]] = {}
+        for model in sorted(models.values(), key=lambda model: model.version):
+            self._versions.setdefault(model.model_type, []).append(model)
+
+        self._latest = {model_type: versions[-1] for model_type, versions in self._versions.items()}
+        self._latest_release: dict[str, ModelVersion] = {}
+        for model_type, versions in self._versions.items():
+            releases = [model for model in versions if not model.version.is_prerelease]
+            if releases:
+                self._latest_release[model_type] = releases[-1]
+
+    @property
+    def model_types(self) -> list[str]:
+        """The types of the indexed models."""
+        return sorted(self._versions)
+
+    def query(
+        self,
+        model_type: str | None = None,
+        specifier: "str | SpecifierSet" = "",
+        prereleases: bool | None = True,
+        source: str | None = None,
+    ) -> list[ModelVersion]:
+        """
+        Return the models matching a version specifier, sorted from earliest to latest version.
+
+        Parameters
+        ----------
+        model_type
+            Only return models of this type. By default, models of every type are returned.
+        specifier
+            A version specifier, e.g. ``">=0.1,<2"``. By default, every version matches.
+        prereleases
+            Whether to include pre-releases. If None, pre-releases are only
+            included if the specifier explicitly allows them, e.g. ``">=0.1.0rc1"``,
+            or if no final release matches, as when installing packages with pip.
+        source
+            Only return models from this source, ``"installed"`` or ``"cache"``.
+        """
+        from packaging.specifiers import SpecifierSet
+
+        specifiers = SpecifierSet(specifier) if isinstance(specifier, str) else specifier
+        model_types = self.model_types if model_type is None else [model_type]
+        models: list[ModelVersion] = []
+        for model_type in model_types:
+            candidates = [model for model in self._versions.get(model_type, []) if source in (None, model.source)]
+            # filtered together, as whether pre-releases are included can depend on the other versions
+            matching = set(specifiers.filter([model.version for model in candidates], prereleases=prereleases))
+            models.extend(model for model in candidates if model.version in matching)
+        return models
+
+    def latest(self, model_type: str, prereleases: bool = True) -> ModelVersion | None:
+        """Return the latest version of a model type, or None if there are no models of that type."""
+        return (self._latest if prereleases else self._latest_release).get(model_type)
+
+
+# ((catalog path, catalog generation), index built from that catalog)
+_VERSION_INDEX: tuple[tuple[pathlib.Path, int], ModelVersionIndex] | None = None
+# ((resolver, resolver generation), index of the installed models listed by that resolver)
+_INSTALLED_VERSION_INDEX: tuple[tuple[ModelResolver, int], ModelVersionIndex] | None = None
+_VERSION_INDEX_LOCK = threading.Lock()
+
+
+def _get_installed_model_version_index() -> ModelVersionIndex:
+    """Return an index of the installed models only, built from the model directories without touching the cache."""
+    global _INSTALLED_VERSION_INDEX
+    from openff.nagl_models._cache import CatalogEntry
+
+    resolver = _DEFAULT_RESOLVER
+    resolver.refresh()
+    with _VERSION_INDEX_LOCK:
+        if _INSTALLED_VERSION_INDEX is None or _INSTALLED_VERSION_INDEX[0] != (resolver, resolver.generation):
+            generation = resolver.generation
+            entries = [
+                CatalogEntry.from_file(path, source="installed") for path in resolver.files() if path.suffix == ".pt"
+            ]
+            _INSTALLED_VERSION_INDEX = ((resolver, generation), ModelVersionIndex(entries, resolver=resolver))
+        return _INSTALLED_VERSION_INDEX[1]
+
+
+def get_model_version_index() -> ModelVersionIndex:
+    """
+    Return an index of the versions of the installed and cached models.
+
+    The index is built from the catalog of models in the cache directory, which
+    also records installed models. It is built once and only rebuilt when the
+    catalog changes, e.g. when a model is downloaded or an entry point directory
+    is modified, so checking that it is up to date costs a few ``stat`` calls.
+
+    Examples
+    --------
+    ::
+
+        >>> from openff.nagl_models.openff_nagl_models import get_model_version_index
+        >>> index = get_model_version_index()
+        >>> [model.path.name for model in index.query("am1bcc", ">0.0.1,<1")]
+        ['openff-gnn-am1bcc-0.1.0-rc.1.pt', 'openff-gnn-am1bcc-0.1.0-rc.2.pt', 'openff-gnn-am1bcc-0.1.0-rc.3.pt']
+
+    """
+    global _VERSION_INDEX
+    from openff.nagl_models._dynamic_fetch import _synced_catalog
+
+    catalog = _synced_catalog()
+    with _VERSION_INDEX_LOCK:
+        if _VERSION_INDEX is None or _VERSION_INDEX[0] != (catalog.path, catalog.generation):
+            generation, entries = catalog.snapshot()
+            _VERSION_INDEX = ((catalog.path, generation), ModelVersionIndex(entries))
+        return _VERSION_INDEX[1]
+
+
+def get_latest_model(model_type: str, production_only: bool = False) -> pathlib.Path:
+    """
+    Get the latest installed or cached model of a given type.
+
+    Parameters
+    ----------
+    model_type
+        The type of model to search for.
+    production_only
+        Whether to only consider production models, by default False.
+
+    Returns
+    -------
+    pathlib.Path
+        The path to the model file.
+
+    Raises
+    ------
+    ValueError
+        If there is no model of this type.
+
+    Examples
+    --------
+    ::
+
+        >>> from openff.nagl_models import get_latest_model
+        >>> get_latest_model("am1bcc", production_only=True)
+        PosixPath('/.../openff-nagl-models/openff/nagl_models/models/am1bcc/openff-gnn-am1bcc-1.0.0.pt')
+
+    """
+    model = get_model_version_index().latest(model_type, prereleases=not production_only)
+    if model is None:
+        raise ValueError(f"No {'production ' if production_only else ''}models of type {model_type} were found.")
+    return model.path
+
+
 def get_models_by_type(
     model_type: str,
     production_only: bool = False,
+    specifier: "str | SpecifierSet" = "",
 ) -> list[pathlib.Path]:
     """
-    Get all models of a given type released by OpenFF. This will not
-    search for custom models that are not included in the openff-nagl-models
-    package. Results will be sorted by version number, with the latest
-    version last.
+    Get all installed models of a given type, such as those released with
+    the openff-nagl-models package. Models are found in the directories
+    provided through entry points; use :func:`get_model_version_index` to also
+    query downloaded models. Results will be sorted by version number, with
+    the latest version last.
 
     Parameters
     ----------
@@ -211,6 +582,8 @@ def get_models_by_type(
         The type of model to search for.
     production_only
         Whether to only search for production models, by default False.
+    specifier
+        Only return models whose version matches this specifier, e.g. ``">=0.1,<2"``.
 
     Returns
     -------
@@ -234,22 +607,14 @@ def get_models_by_type(
         PosixPath('/.../openff-nagl-models/openff/nagl_models/models/am1bcc/openff-gnn-am1bcc-0.1.0-rc.1.pt')]
 
     """
-    from packaging.version import Version
-
-    base_dir: pathlib.Path = importlib.resources.files("openff.nagl_models") / "models" / model_type  # type: ignore
-    if not os.path.isdir(base_dir):
+    # installed models only, so the cache isn't touched
+    index = _get_installed_model_version_index()
+    if not index.query(model_type, source="installed"):
         raise ValueError(
             f"Model type {model_type} not found in openff-nagl-models. "
             "If you are using a custom model, "
             "please manually specify the path to the model file."
         )
 
-    model_files = pathlib.Path(base_dir).glob("*.pt")
-
-    # assume everything follows the openff-gnn-<model_type>-<version>.pt format
-    n_name = len(f"openff-gnn-{model_type}-")
-    versions_to_paths = {Version(f.stem[n_name:]): f for f in model_files}
-    versions = sorted(versions_to_paths.keys())
-    if production_only:
-        versions = [v for v in versions if not v.is_prerelease]
-    return [versions_to_paths[v] for v in versions]
+    models = index.query(model_type, specifier, prereleases=not production_only, source="installed")
+    return [model.path for model in models]
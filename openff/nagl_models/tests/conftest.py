@@ -0,0 +1,196 @@
+import http.server
+import re
+import threading
+import time
+
+import pytest
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark", "performance benchmarks")
+    group.addoption("--benchmark", action="store_true", help="Run the performance benchmarks.")
+    group.addoption(
+        "--update-benchmark-baselines",
+        action="store_true",
+        help="Store the measured benchmark timings as the new baselines instead of comparing against them.",
+    )
+    group.addoption(
+        "--benchmark-threshold",
+        type=float,
+        default=2.0,
+        help="Fail a benchmark if it is this many times slower than its baseline (default: 2.0).",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: a performance benchmark, only run with --benchmark")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark") or config.getoption("--update-benchmark-baselines"):
+        return
+    skip = pytest.mark.skip(reason="benchmarks only run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+class _ModelRequestHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, dict(self.headers)))
+        server.connections.add(self.client_address)
+
+        name = self.path.rsplit("/", 1)[-1]
+        if self.path.startswith("/redirect/"):
+            self.send_response(302)
+            self.send_header("Location", f"/files/{name}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if name not in server.files:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        data = server.files[name]
+        etag = server.etags.get(name)
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start, end, status = 0, len(data), 200
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        # a range is only sent if the file still has the validator it was requested with
+        if_range = self.headers.get("If-Range")
+        if match and server.support_ranges and if_range in (None, etag):
+            start, status = int(match.group(1)), 206
+            if match.group(2):
+                end = min(int(match.group(2)) + 1, len(data))
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+        body = data[start:end]
+        time.sleep(server.delay)
+        self.send_response(status)
+        if server.chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Content-Length", str(len(body)))
+        if server.support_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        if etag is not None:
+            self.send_header("ETag", etag)
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{len(data)}")
+        self.end_headers()
+
+        if name in server.truncate_once:
+            # simulate a dropped connection half-way through the transfer
+            server.truncate_once.discard(name)
+            self.wfile.write(body[: len(body) // 2])
+            self.close_connection = True
+            return
+        if server.chunked:
+            for i in range(0, len(body), 4096):
+                chunk = body[i : i + 4096]
+                self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        self.wfile.write(body)
+
+
+class ModelServer(http.server.ThreadingHTTPServer):
+    """A local HTTP server standing in for Zenodo in tests."""
+
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _ModelRequestHandler)
+        self.files: dict[str, bytes] = {}
+        self.etags: dict[str, str] = {}
+        self.requests: list[tuple[str, dict]] = []
+        # the client address of every connection that made a request
+        self.connections: set[tuple[str, int]] = set()
+        self.truncate_once: set[str] = set()
+        self.support_ranges = True
+        self.chunked = False
+        # seconds to wait before responding, to keep a download in flight
+        self.delay = 0.0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def url(self, name: str, redirect: bool = False) -> str:
+        return f"{self.base_url}/{'redirect' if redirect else 'files'}/{name}"
+
+
+def _start_model_server():
+    server = ModelServer()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    return server
+
+
+def _stop_model_server(server):
+    from openff.nagl_models import _http
+
+    server.shutdown()
+    server.server_close()
+    # don't leave pooled connections to the server behind
+    _http._CONNECTION_POOL.clear()
+
+
+@pytest.fixture
+def model_server():
+    server = _start_model_server()
+    yield server
+    _stop_model_server(server)
+
+
+@pytest.fixture
+def mirror_server():
+    """A second model server, standing in for a mirror."""
+    server = _start_model_server()
+    yield server
+    _stop_model_server(server)
+
+
+@pytest.fixture
+def tmp_cache(tmp_path, monkeypatch):
+    """Point the model cache at a fresh, empty directory."""
+    from openff.nagl_models import _dynamic_fetch
+
+    cache_dir = tmp_path / "OPENFF_NAGL_MODELS"
+    monkeypatch.setattr(_dynamic_fetch, "CACHE_DIR", cache_dir)
+    return cache_dir
+
+
+@pytest.fixture
+def zenodo_server(model_server, monkeypatch):
+    """Serve files that ``get_model`` would download from Zenodo from the local model server."""
+    from openff.nagl_models import _dynamic_fetch
+
+    original = _dynamic_fetch._zenodo_file_url
+
+    def file_url(filename, doi):
+        # still parse the DOI, as get_model would
+        original(filename, doi)
+        return model_server.url(filename)
+
+    monkeypatch.setattr(_dynamic_fetch, "_zenodo_file_url", file_url)
+    return model_server
@@ -0,0 +1,232 @@
+"""
+Performance benchmarks for model resolution, caching and hashing.
+
+These are skipped unless pytest is run with ``--benchmark``. Each benchmark is
+compared against the timing stored in ``data/benchmark_baselines.json`` and
+fails if it is more than ``--benchmark-threshold`` times slower. Timings depend
+on the machine, so regenerate the baselines on the machine used for releases
+with ``--update-benchmark-baselines``.
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+import sys
+import time
+from collections.abc import Callable
+
+import pytest
+
+from openff.nagl_models import _dynamic_fetch, openff_nagl_models
+from openff.nagl_models._cache import get_catalog, get_hash_record
+from openff.nagl_models._dynamic_fetch import _fetch_into_cache, _get_sha256, get_model
+from openff.nagl_models.openff_nagl_models import (
+    ModelResolver,
+    clear_nagl_model_directory_cache,
+    get_models_by_type,
+    list_available_nagl_models,
+    load_nagl_model_directory_entry_points,
+    validate_nagl_model_path,
+)
+
+pytestmark = pytest.mark.benchmark
+
+BASELINES_PATH = pathlib.Path(__file__).parent / "data" / "benchmark_baselines.json"
+
+LARGE_MODEL_SIZE = 16 * 1024 * 1024
+
+
+@pytest.fixture(scope="session")
+def benchmark_baselines(pytestconfig):
+    baselines = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+    yield baselines
+    if pytestconfig.getoption("--update-benchmark-baselines"):
+        BASELINES_PATH.write_text(json.dumps(dict(sorted(baselines.items())), indent=2) + "\n")
+
+
+@pytest.fixture
+def benchmark(request, pytestconfig, benchmark_baselines):
+    """
+    Time a function and compare it to its stored baseline.
+
+    The function is called ``number`` times per round, and the fastest of
+    ``rounds`` rounds is kept to reduce noise. ``setup`` is called before each
+    call and is not timed.
+    """
+    name = request.node.name
+
+    def run(
+        function: Callable[[], object],
+        setup: Callable[[], object] | None = None,
+        number: int = 10,
+        rounds: int = 5,
+    ) -> float:
+        timings = []
+        for _ in range(rounds):
+            elapsed = 0.0
+            for _ in range(number):
+                if setup is not None:
+                    setup()
+                start = time.perf_counter()
+                function()
+                elapsed += time.perf_counter() - start
+            timings.append(elapsed / number)
+        best = min(timings)
+
+        baseline = benchmark_baselines.get(name)
+        if pytestconfig.getoption("--update-benchmark-baselines") or baseline is None:
+            benchmark_baselines[name] = best
+            return best
+
+        threshold = pytestconfig.getoption("--benchmark-threshold")
+        assert best <= baseline * threshold, (
+            f"{name} took {best * 1e3:.3f} ms, more than {threshold}x its baseline of {baseline * 1e3:.3f} ms"
+        )
+        return best
+
+    return run
+
+
+@pytest.fixture
+def large_model(tmp_cache):
+    tmp_cache.mkdir(parents=True)
+    path = tmp_cache / "benchmark-model.pt"
+    path.write_bytes(os.urandom(LARGE_MODEL_SIZE))
+    return path
+
+
+@pytest.fixture
+def many_entry_points(tmp_path, monkeypatch):
+    """
+    Install 500 distributions on ``sys.path``, 50 of which provide model directories.
+
+    Returns the model directories in order of precedence.
+    """
+    site = tmp_path / "site-packages"
+    site.mkdir()
+    model_directories = []
+    for i in range(500):
+        dist_info = site / f"benchmark_package_{i}-1.0.dist-info"
+        dist_info.mkdir()
+        (dist_info / "METADATA").write_text(f"Metadata-Version: 2.1\nName: benchmark-package-{i}\nVersion: 1.0\n")
+        if i % 10:
+            (dist_info / "entry_points.txt").write_text(
+                f"[console_scripts]\nbenchmark-{i} = benchmark_package_{i}:main\n"
+            )
+            continue
+
+        model_directory = tmp_path / "models" / str(i)
+        model_directory.mkdir(parents=True)
+        for j in range(20):
+            (model_directory / f"model-{i}-{j}.pt").write_bytes(b"weights")
+        model_directories.append(model_directory)
+        (site / f"benchmark_package_{i}.py").write_text(
+            f"import pathlib\n\ndef model_dirs():\n    return [pathlib.Path({str(model_directory)!r})]\n"
+        )
+        (dist_info / "entry_points.txt").write_text(
+            f"[openforcefield.nagl_model_directory]\nmodel_dirs = benchmark_package_{i}:model_dirs\n"
+        )
+
+    monkeypatch.syspath_prepend(str(site))
+    clear_nagl_model_directory_cache()
+    yield model_directories
+    for i in range(0, 500, 10):
+        sys.modules.pop(f"benchmark_package_{i}", None)
+    clear_nagl_model_directory_cache()
+
+
+@pytest.fixture
+def large_cache(tmp_cache):
+    """A cache holding 2000 models, catalogued as they would be after being downloaded."""
+    tmp_cache.mkdir(parents=True)
+    for i in range(2000):
+        path = tmp_cache / f"openff-gnn-am1bcc-{i // 100}.{i % 100}.0.pt"
+        path.write_bytes(b"weights")
+    for name in _dynamic_fetch.KNOWN_HASHES:
+        (tmp_cache / "known").mkdir(exist_ok=True)
+        (tmp_cache / "known" / name).write_bytes(b"weights")
+    get_catalog(tmp_cache).rebuild()
+    return tmp_cache
+
+
+def test_entry_point_discovery_cold(benchmark, many_entry_points):
+    def discover():
+        assert len(load_nagl_model_directory_entry_points()) >= len(many_entry_points)
+
+    benchmark(discover, setup=clear_nagl_model_directory_cache, number=1)
+
+
+def test_entry_point_discovery_warm(benchmark, many_entry_points):
+    load_nagl_model_directory_entry_points()
+    benchmark(load_nagl_model_directory_entry_points, number=1000)
+
+
+def test_validate_nagl_model_path_many_entry_points(benchmark, many_entry_points, monkeypatch):
+    monkeypatch.setattr(openff_nagl_models, "_DEFAULT_RESOLVER", ModelResolver())
+    # the lowest-precedence directory
+    assert validate_nagl_model_path("model-490-19.pt").parent == many_entry_points[-1]
+
+    benchmark(lambda: validate_nagl_model_path("model-490-19.pt"), number=100)
+
+
+def test_validate_nagl_model_path_cold_resolver(benchmark, many_entry_points, monkeypatch):
+    load_nagl_model_directory_entry_points()
+
+    def reset_resolver():
+        monkeypatch.setattr(openff_nagl_models, "_DEFAULT_RESOLVER", ModelResolver())
+
+    benchmark(lambda: validate_nagl_model_path("model-490-19.pt"), setup=reset_resolver, number=5)
+
+
+def test_list_available_nagl_models_large_cache(benchmark, large_cache):
+    assert len(list_available_nagl_models()) >= len(_dynamic_fetch.KNOWN_HASHES)
+    benchmark(list_available_nagl_models, number=10)
+
+
+def test_rebuild_catalog_large_cache(benchmark, large_cache):
+    benchmark(get_catalog(large_cache).rebuild, number=1)
+
+
+def test_get_models_by_type(benchmark):
+    benchmark(lambda: get_models_by_type("am1bcc"), number=100)
+
+
+def test_get_sha256(benchmark, large_model):
+    benchmark(lambda: _get_sha256(large_model), number=1)
+
+
+def test_get_model_warm_cache(benchmark, large_model):
+    file_hash = _get_sha256(large_model)
+    get_model(large_model.name, file_hash=file_hash)
+
+    benchmark(lambda: get_model(large_model.name, file_hash=file_hash), number=100)
+
+
+def test_get_model_unverified_cache(benchmark, large_model):
+    """A cached model whose hash has not been recorded, e.g. after the hash record was lost."""
+    file_hash = _get_sha256(large_model)
+    record = get_hash_record(_dynamic_fetch.CACHE_DIR)
+
+    benchmark(
+        lambda: get_model(large_model.name, file_hash=file_hash),
+        setup=lambda: record.forget(large_model),
+        number=1,
+    )
+
+
+def test_download_from_local_server(benchmark, tmp_cache, model_server):
+    data = os.urandom(LARGE_MODEL_SIZE)
+    model_server.files["benchmark-model.pt"] = data
+    cached_path = tmp_cache / "benchmark-model.pt"
+    file_hash = hashlib.sha256(data).hexdigest()
+    tmp_cache.mkdir(parents=True)
+
+    def remove_cached_model():
+        cached_path.unlink(missing_ok=True)
+
+    benchmark(
+        lambda: _fetch_into_cache(model_server.url("benchmark-model.pt"), cached_path, file_hash),
+        setup=remove_cached_model,
+        number=1,
+    )
@@ -0,0 +1,382 @@
+import hashlib
+import json
+import os
+import pathlib
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from openff.nagl_models import _cache
+from openff.nagl_models._cache import (
+    CATALOG_FILENAME,
+    HASH_RECORD_FILENAME,
+    BlobStore,
+    CacheLockTimeoutError,
+    CacheUsageRecord,
+    CatalogEntry,
+    FileLock,
+    ModelCatalog,
+    VerifiedHashRecord,
+    collect_garbage,
+    get_catalog,
+)
+
+
+@pytest.fixture
+def count_hashes(monkeypatch):
+    calls = []
+    original = _cache._stream_sha256
+
+    def counting_sha256(filename):
+        calls.append(filename)
+        return original(filename)
+
+    monkeypatch.setattr(_cache, "_stream_sha256", counting_sha256)
+    return calls
+
+
+def test_stream_sha256_matches_hashlib(tmp_path):
+    data = os.urandom(3 * _cache._CHUNK_SIZE + 17)
+    model = tmp_path / "model.pt"
+    model.write_bytes(data)
+
+    assert _cache._stream_sha256(model) == hashlib.sha256(data).hexdigest()
+
+
+def test_unchanged_file_is_not_rehashed(tmp_path, count_hashes):
+    model = tmp_path / "model.pt"
+    model.write_bytes(b"weights")
+    record = VerifiedHashRecord(tmp_path / HASH_RECORD_FILENAME)
+
+    expected = hashlib.sha256(b"weights").hexdigest()
+    assert record.get_sha256(model) == expected
+    assert record.get_sha256(model) == expected
+    assert len(count_hashes) == 1
+
+    # A fresh record (e.g. in another process) trusts what is on disk
+    assert VerifiedHashRecord(tmp_path / HASH_RECORD_FILENAME).get_sha256(model) == expected
+    assert len(count_hashes) == 1
+
+
+def test_modified_file_is_rehashed(tmp_path, count_hashes):
+    model = tmp_path / "model.pt"
+    model.write_bytes(b"weights")
+    record = VerifiedHashRecord(tmp_path / HASH_RECORD_FILENAME)
+    record.get_sha256(model)
+
+    # same size, and restore the old modification time
+    stat = model.stat()
+    model.write_bytes(b"WEIGHTS")
+    os.utime(model, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert record.get_sha256(model) == hashlib.sha256(b"WEIGHTS").hexdigest()
+    assert len(count_hashes) == 2
+
+
+def test_other_digests_are_recorded(tmp_path, count_hashes):
+    model = tmp_path / "model.pt"
+    model.write_bytes(b"weights")
+    record = VerifiedHashRecord(tmp_path / HASH_RECORD_FILENAME)
+
+    expected = hashlib.md5(b"weights").hexdigest()
+    assert record.get_digest(model, "md5") == expected
+
+    # the SHA256 hash was computed in the same pass, and both are shared with other processes
+    fresh_record = VerifiedHashRecord(tmp_path / HASH_RECORD_FILENAME)
+    assert fresh_record.get_sha256(model) == hashlib.sha256(b"weights").hexdigest()
+    assert fresh_record.get_digest(model, "md5") == expected
+    assert count_hashes == []
+
+
+def test_forget_forces_rehash(tmp_path, count_hashes):
+    model = tmp_path / "model.pt"
+    model.write_bytes(b"weights")
+    record = VerifiedHashRecord(tmp_path / HASH_RECORD_FILENAME)
+    record.get_sha256(model)
+    record.forget(model)
+    record.get_sha256(model)
+
+    assert len(count_hashes) == 2
+
+
+def test_catalog_bootstraps_from_cache_directory(tmp_path):
+    (tmp_path / "openff-gnn-am1bcc-1.0.0.pt").write_bytes(b"weights")
+    (tmp_path / "custom.pt").write_bytes(b"custom")
+    catalog = ModelCatalog(tmp_path / CATALOG_FILENAME, tmp_path)
+
+    entries = {entry.name: entry for entry in catalog.entries()}
+    assert set(entries) == {"openff-gnn-am1bcc-1.0.0.pt", "custom.pt"}
+    assert entries["openff-gnn-am1bcc-1.0.0.pt"].model_type == "am1bcc"
+    assert entries["openff-gnn-am1bcc-1.0.0.pt"].version == "1.0.0"
+    assert entries["openff-gnn-am1bcc-1.0.0.pt"].size == len(b"weights")
+    assert entries["custom.pt"].model_type is None
+    assert (tmp_path / CATALOG_FILENAME).exists()
+
+
+def test_catalog_does_not_walk_cache_once_built(tmp_path, monkeypatch):
+    catalog = ModelCatalog(tmp_path / CATALOG_FILENAME, tmp_path)
+    assert catalog.entries() == []
+
+    model = tmp_path / "openff-gnn-am1bcc-0.1.0-rc.3.pt"
+    model.write_bytes(b"weights")
+    catalog.add(CatalogEntry.from_file(model, source="cache", sha256="abc"))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the cache directory should not be walked")
+
+    monkeypatch.setattr(type(tmp_path), "rglob", fail)
+
+    # another process reads the same catalog
+    other = ModelCatalog(tmp_path / CATALOG_FILENAME, tmp_path)
+    [entry] = other.entries(source="cache", model_type="am1bcc")
+    assert entry.sha256 == "abc"
+    assert entry.version == "0.1.0rc3"
+
+    other.remove(model)
+    assert catalog.entries() == []
+
+
+def test_catalog_sync_installed(tmp_path):
+    cache_dir, installed_dir = tmp_path / "cache", tmp_path / "installed"
+    installed_dir.mkdir()
+    model = installed_dir / "openff-gnn-am1bcc-1.0.0.pt"
+    model.write_bytes(b"weights")
+    catalog = ModelCatalog(cache_dir / CATALOG_FILENAME, cache_dir)
+
+    catalog.sync_installed([model], {"openff-gnn-am1bcc-1.0.0.pt": "abc"})
+    [entry] = catalog.entries(source="installed")
+    assert entry.path == model.resolve().as_posix()
+    assert entry.sha256 == "abc"
+
+    catalog.sync_installed([], {})
+    assert catalog.entries(source="installed") == []
+
+
+def test_catalog_installed_entries_are_not_shared(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    first_model, second_model = tmp_path / "first" / "model.pt", tmp_path / "second" / "model.pt"
+    for model in first_model, second_model:
+        model.parent.mkdir()
+        model.write_bytes(b"weights")
+
+    # two environments sharing a cache directory
+    first = ModelCatalog(cache_dir / CATALOG_FILENAME, cache_dir)
+    second = ModelCatalog(cache_dir / CATALOG_FILENAME, cache_dir)
+    first.entries()
+    mtime_ns = first.path.stat().st_mtime_ns
+
+    for _ in range(3):
+        first.sync_installed([first_model], {})
+        second.sync_installed([second_model], {})
+
+    assert [entry.path for entry in first.entries()] == [first_model.resolve().as_posix()]
+    assert [entry.path for entry in second.entries()] == [second_model.resolve().as_posix()]
+    assert first.path.stat().st_mtime_ns == mtime_ns
+
+
+def test_catalog_keeps_name_of_symlinked_file(tmp_path):
+    blob = tmp_path / "blob"
+    blob.write_bytes(b"weights")
+    alias = tmp_path / "openff-gnn-am1bcc-1.0.0.pt"
+    alias.symlink_to(blob)
+
+    entry = CatalogEntry.from_file(alias, source="cache")
+    assert entry.name == "openff-gnn-am1bcc-1.0.0.pt"
+    assert entry.version == "1.0.0"
+
+
+def test_blob_store_deduplicates(tmp_path):
+    blobs = BlobStore(tmp_path)
+    sha256 = hashlib.sha256(b"weights").hexdigest()
+    assert blobs.get(sha256) is None
+
+    for name in ["first.pt", "second.pt"]:
+        download = tmp_path / f"{name}.part"
+        download.write_bytes(b"weights")
+        blobs.add(download, sha256, move=True)
+        blobs.link(sha256, tmp_path / name)
+        assert not download.exists()
+
+    assert blobs.blobs() == [blobs.path(sha256)]
+    assert blobs.get(sha256).read_bytes() == b"weights"
+    assert blobs.is_alias(tmp_path / "first.pt", sha256)
+    assert os.path.samefile(tmp_path / "first.pt", tmp_path / "second.pt")
+
+
+def test_blob_store_falls_back_to_symlinks(tmp_path, monkeypatch):
+    def no_hard_links(source, destination):
+        raise OSError("hard links are not supported")
+
+    monkeypatch.setattr(os, "link", no_hard_links)
+    blobs = BlobStore(tmp_path)
+    sha256 = hashlib.sha256(b"weights").hexdigest()
+    model = tmp_path / "model.pt"
+    model.write_bytes(b"weights")
+
+    # the source is copied into the store, since it may be removed later
+    blobs.add(model, sha256)
+    assert not os.path.samefile(model, blobs.path(sha256))
+
+    blobs.link(sha256, model)
+    assert model.is_symlink()
+    assert blobs.is_alias(model, sha256)
+
+
+def test_usage_record_throttles_writes(tmp_path):
+    model = tmp_path / "model.pt"
+    model.write_bytes(b"weights")
+    usage = CacheUsageRecord(tmp_path / "usage.json", resolution=3600)
+
+    usage.record_access(model)
+    first = usage.last_access(model)
+    mtime_ns = (tmp_path / "usage.json").stat().st_mtime_ns
+    usage.record_access(model)
+
+    assert usage.last_access(model) == first
+    assert (tmp_path / "usage.json").stat().st_mtime_ns == mtime_ns
+
+    usage.pin("model.pt")
+    assert CacheUsageRecord(tmp_path / "usage.json").pinned() == {"model.pt"}
+    usage.unpin("model.pt")
+    assert usage.pinned() == set()
+
+
+def _cache_model(cache_dir, name, data, accessed):
+    sha256 = hashlib.sha256(data).hexdigest()
+    download = cache_dir / f"{name}.part"
+    download.write_bytes(data)
+    blobs = BlobStore(cache_dir)
+    blobs.add(download, sha256, move=True)
+    blobs.link(sha256, cache_dir / name)
+    get_catalog(cache_dir).add(CatalogEntry.from_file(cache_dir / name, source="cache", sha256=sha256))
+    _cache.get_usage_record(cache_dir).record_access(cache_dir / name)
+    _cache.get_usage_record(cache_dir)._update(
+        lambda data: data["accessed"].__setitem__(_cache._catalog_path(cache_dir / name), accessed)
+    )
+    return sha256
+
+
+def test_collect_garbage_evicts_least_recently_used(tmp_path):
+    an_hour_ago = time.time() - 3600
+    _cache_model(tmp_path, "oldest.pt", b"a" * 100, an_hour_ago)
+    _cache_model(tmp_path, "older.pt", b"b" * 100, an_hour_ago + 60)
+    _cache_model(tmp_path, "recent.pt", b"c" * 100, time.time())
+    # another name for the same blob only counts once
+    BlobStore(tmp_path).link(hashlib.sha256(b"b" * 100).hexdigest(), tmp_path / "older-alias.pt")
+    get_catalog(tmp_path).add(
+        CatalogEntry.from_file(tmp_path / "older-alias.pt", "cache", hashlib.sha256(b"b" * 100).hexdigest())
+    )
+
+    assert collect_garbage(tmp_path, max_size=None).size == 300
+
+    result = collect_garbage(tmp_path, max_size=150)
+
+    assert [pathlib.Path(path).name for path in result.evicted] == ["oldest.pt"]
+    # the only other candidate was used too recently
+    assert result.size == 200
+    assert not (tmp_path / "oldest.pt").exists()
+    assert not BlobStore(tmp_path).get(hashlib.sha256(b"a" * 100).hexdigest())
+    assert [entry.name for entry in get_catalog(tmp_path).find("oldest.pt")] == []
+
+    result = collect_garbage(tmp_path, max_size=150, min_age=0)
+    assert sorted(pathlib.Path(path).name for path in result.evicted) == ["older-alias.pt", "older.pt"]
+    assert result.freed == 100
+
+
+def test_collect_garbage_after_catalog_rebuild(tmp_path):
+    sha256 = _cache_model(tmp_path, "model.pt", b"a" * 1000, time.time() - 3600)
+    _cache.get_hash_record(tmp_path).record(tmp_path / "model.pt", sha256)
+    catalog = get_catalog(tmp_path)
+    catalog.rebuild()
+    assert [entry.sha256 for entry in catalog.entries()] == [sha256]
+
+    # the model and its blob are counted once, whether or not their hash is known
+    catalog._update(lambda data: [entry.__setitem__("sha256", None) for entry in data.values()])
+    result = collect_garbage(tmp_path, max_size=1500, min_age=0)
+
+    assert result.evicted == []
+    assert result.size == 1000
+    assert BlobStore(tmp_path).get(sha256) is not None
+
+
+def test_collect_garbage_skips_pinned_and_locked_models(tmp_path):
+    an_hour_ago = time.time() - 3600
+    pinned_hash = _cache_model(tmp_path, "pinned-by-hash.pt", b"a" * 100, an_hour_ago)
+    _cache_model(tmp_path, "pinned-by-name.pt", b"b" * 100, an_hour_ago)
+    _cache_model(tmp_path, "downloading.pt", b"c" * 100, an_hour_ago)
+    _cache_model(tmp_path, "user-pinned.pt", b"d" * 100, an_hour_ago)
+    _cache.get_usage_record(tmp_path).pin("user-pinned.pt")
+
+    with FileLock(tmp_path / "downloading.pt.lock"):
+        result = collect_garbage(
+            tmp_path,
+            max_size=0,
+            pinned_names=["pinned-by-name.pt"],
+            pinned_hashes=[pinned_hash],
+        )
+
+    assert result.evicted == []
+    assert result.size == 400
+
+
+def test_file_lock_is_exclusive(tmp_path):
+    lock_path = tmp_path / "model.pt.lock"
+    with FileLock(lock_path):
+        assert lock_path.exists()
+        with pytest.raises(CacheLockTimeoutError):
+            FileLock(lock_path, timeout=0.2, poll_interval=0.05).acquire()
+    assert not lock_path.exists()
+
+    # can be re-acquired once released
+    with FileLock(lock_path, timeout=0.2):
+        pass
+
+
+def test_file_lock_breaks_lock_of_dead_process(tmp_path):
+    finished = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True)
+    dead_pid = int(finished.stdout)
+    lock_path = tmp_path / "model.pt.lock"
+    lock_path.write_text(json.dumps({"host": socket.gethostname(), "pid": dead_pid, "token": "dead"}))
+
+    with FileLock(lock_path, timeout=1):
+        assert json.loads(lock_path.read_text())["pid"] == os.getpid()
+
+
+def test_file_lock_does_not_signal_owner_on_windows(tmp_path, monkeypatch):
+    lock_path = tmp_path / "model.pt.lock"
+    owner = {"host": socket.gethostname(), "pid": os.getpid(), "token": "alive"}
+    lock_path.write_text(json.dumps(owner))
+    lock = FileLock(lock_path)
+
+    def kill(pid, signal):
+        raise AssertionError("os.kill terminates the process on Windows")
+
+    monkeypatch.setattr(os, "kill", kill)
+    monkeypatch.setattr(os, "name", "nt")
+    assert not lock._is_stale(owner)
+
+    an_hour_ago = time.time() - 3600
+    os.utime(lock_path, (an_hour_ago, an_hour_ago))
+    assert lock._is_stale(owner)
+
+
+def test_file_lock_breaks_abandoned_lock(tmp_path):
+    lock_path = tmp_path / "model.pt.lock"
+    lock_path.write_text(json.dumps({"host": "another-node", "pid": 1, "token": "abandoned"}))
+    an_hour_ago = time.time() - 3600
+    os.utime(lock_path, (an_hour_ago, an_hour_ago))
+
+    with FileLock(lock_path, timeout=1):
+        assert json.loads(lock_path.read_text())["host"] == socket.gethostname()
+
+
+def test_file_lock_waits_for_fresh_lock_on_another_node(tmp_path):
+    lock_path = tmp_path / "model.pt.lock"
+    lock_path.write_text(json.dumps({"host": "another-node", "pid": 1, "token": "alive"}))
+
+    with pytest.raises(CacheLockTimeoutError, match="another-node"):
+        FileLock(lock_path, timeout=0.2, poll_interval=0.05).acquire()
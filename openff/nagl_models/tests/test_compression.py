@@ -0,0 +1,118 @@
+import gzip
+import hashlib
+import lzma
+import os
+
+import pytest
+
+from openff.nagl_models import _compression, _dynamic_fetch
+from openff.nagl_models._compression import get_compressed_suffixes, is_supported
+from openff.nagl_models._dynamic_fetch import get_model
+
+DOI = "10.5281/zenodo.1"
+
+
+def _zstd_compress(data):
+    try:
+        from compression import zstd  # type: ignore[import-not-found]
+    except ImportError:
+        zstandard = pytest.importorskip("zstandard")
+        return zstandard.ZstdCompressor().compress(data)
+    return zstd.compress(data)
+
+
+COMPRESSORS = {".xz": lzma.compress, ".gz": gzip.compress, ".zst": _zstd_compress}
+
+
+@pytest.fixture
+def compressed_suffixes(monkeypatch):
+    """Set the compressed variants to try, in order."""
+
+    def configure(*suffixes):
+        monkeypatch.setenv("OPENFF_NAGL_MODELS_COMPRESSED_SUFFIXES", " ".join(suffixes))
+
+    return configure
+
+
+def _requested_paths(server):
+    return [path for path, _ in server.requests]
+
+
+def test_get_compressed_suffixes(monkeypatch, compressed_suffixes):
+    monkeypatch.delenv("OPENFF_NAGL_MODELS_COMPRESSED_SUFFIXES", raising=False)
+    assert get_compressed_suffixes() == []
+
+    compressed_suffixes(".gz,", ".xz")
+    assert get_compressed_suffixes() == [".gz", ".xz"]
+
+    monkeypatch.setattr(_compression, "_has_zstd", lambda: False)
+    compressed_suffixes(".zst", ".xz")
+    assert not is_supported(".zst")
+    assert get_compressed_suffixes() == [".xz"]
+
+    compressed_suffixes(".bz2")
+    with pytest.raises(ValueError, match="Unknown compressed suffixes"):
+        get_compressed_suffixes()
+
+
+@pytest.mark.parametrize("suffix", COMPRESSORS)
+def test_download_compressed_variant(tmp_cache, zenodo_server, compressed_suffixes, suffix):
+    data = os.urandom(1024) * 64
+    zenodo_server.files[f"model.pt{suffix}"] = COMPRESSORS[suffix](data)
+    compressed_suffixes(suffix)
+
+    path = get_model("model.pt", doi=DOI, file_hash=hashlib.sha256(data).hexdigest())
+
+    assert open(path, "rb").read() == data
+    assert _requested_paths(zenodo_server) == [f"/files/model.pt{suffix}"]
+    assert not (tmp_cache / "model.pt.part").exists()
+
+
+@pytest.mark.parametrize("suffix", COMPRESSORS)
+@pytest.mark.parametrize("chunk_size", [7, 1 << 20])
+def test_download_concatenated_compressed_streams(
+    tmp_cache, zenodo_server, compressed_suffixes, monkeypatch, suffix, chunk_size
+):
+    parts = [os.urandom(1024), b"", os.urandom(4096)]
+    zenodo_server.files[f"model.pt{suffix}"] = b"".join(COMPRESSORS[suffix](part) for part in parts)
+    compressed_suffixes(suffix)
+    # also split streams across reads
+    monkeypatch.setattr(_dynamic_fetch, "_CHUNK_SIZE", chunk_size)
+
+    data = b"".join(parts)
+    path = get_model("model.pt", doi=DOI, file_hash=hashlib.sha256(data).hexdigest())
+
+    assert open(path, "rb").read() == data
+    assert _requested_paths(zenodo_server) == [f"/files/model.pt{suffix}"]
+
+
+def test_missing_compressed_variants_fall_back(tmp_cache, zenodo_server, compressed_suffixes):
+    zenodo_server.files["model.pt"] = b"weights"
+    compressed_suffixes(".xz", ".gz")
+
+    path = get_model("model.pt", doi=DOI)
+
+    assert open(path, "rb").read() == b"weights"
+    assert _requested_paths(zenodo_server) == ["/files/model.pt.xz", "/files/model.pt.gz", "/files/model.pt"]
+
+
+@pytest.mark.parametrize(
+    "compressed",
+    [
+        b"not compressed",
+        # cut short, without the end of the stream
+        lzma.compress(os.urandom(4096))[:100],
+        # decompresses to the wrong file
+        lzma.compress(b"other weights"),
+    ],
+)
+def test_broken_compressed_variant_falls_back(tmp_cache, zenodo_server, compressed_suffixes, compressed):
+    zenodo_server.files["model.pt.xz"] = compressed
+    zenodo_server.files["model.pt"] = b"weights"
+    compressed_suffixes(".xz")
+
+    path = get_model("model.pt", doi=DOI, file_hash=hashlib.sha256(b"weights").hexdigest())
+
+    assert open(path, "rb").read() == b"weights"
+    assert _requested_paths(zenodo_server) == ["/files/model.pt.xz", "/files/model.pt"]
+    assert not (tmp_cache / "model.pt.part").exists()
@@ -1,10 +1,30 @@
+import asyncio
+import gc
+import hashlib
+import json
+import multiprocessing
 import os
 import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import warnings
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from importlib.resources import files
 
 import platformdirs
 import pytest
 
 from openff.nagl_models import (
+    _cache,
+    _dynamic_fetch,
+    _http,
+    _mirrors,
     get_models_by_type,
     list_available_nagl_models,
     validate_nagl_model_path,
@@ -12,8 +32,19 @@ from openff.nagl_models import (
 from openff.nagl_models._dynamic_fetch import (
     BadFileSuffixError,
     HashComparisonFailedException,
+    ModelResolutionError,
     UnableToParseDOIException,
+    fetch_zenodo_record,
     get_model,
+    get_model_async,
+    get_model_buffer,
+    get_release_asset_index,
+    get_release_metadata,
+    get_release_metadata_async,
+    get_zenodo_record,
+    prefetch_models,
+    prefetch_models_async,
+    resolve_models,
 )
 
 
@@ -185,3 +216,848 @@ def test_list_models_without_path_works_with_get_model(model_name):
     assert isinstance(result, str)
     assert os.path.exists(result)
     assert os.path.basename(result) == model_name
+
+
+def test_prefetch_models_reports_each_model(tmp_cache):
+    tmp_cache.mkdir()
+    (tmp_cache / "cached.pt").write_bytes(b"weights")
+    (tmp_cache / "mismatched.pt").write_bytes(b"weights")
+    sha256 = hashlib.sha256(b"weights").hexdigest()
+
+    results = prefetch_models(
+        [
+            ("cached.pt", None, sha256),
+            "missing.pt",
+            {"filename": "mismatched.pt", "file_hash": "wrong_hash"},
+            "cached.pt",
+        ]
+    )
+
+    assert list(results) == ["cached.pt", "missing.pt", "mismatched.pt"]
+    assert results["cached.pt"].ok
+    assert results["cached.pt"].path == (tmp_cache / "cached.pt").as_posix()
+    assert isinstance(results["missing.pt"].error, FileNotFoundError)
+    assert isinstance(results["mismatched.pt"].error, HashComparisonFailedException)
+
+
+def test_prefetch_models_downloads_concurrently(tmp_cache, monkeypatch):
+    n_models = 3
+    # every download has to be in flight at once for the barrier to be passed
+    barrier = threading.Barrier(n_models, timeout=10)
+
+    def fake_download(url, cached_path, file_hash=None):
+        barrier.wait()
+        cached_path.write_bytes(url.encode())
+        return cached_path.as_posix()
+
+    monkeypatch.setattr(_dynamic_fetch, "_download_and_verify_file", fake_download)
+
+    specs = [(f"model-{i}.pt", "10.5072/zenodo.278300", None) for i in range(n_models)]
+    results = prefetch_models(specs, max_workers=n_models)
+
+    assert all(result.ok for result in results.values())
+    assert sorted(os.listdir(tmp_cache)) == [f"model-{i}.pt" for i in range(n_models)]
+
+
+def test_resolve_models(tmp_cache, zenodo_server):
+    tmp_cache.mkdir()
+    (tmp_cache / "cached.pt").write_bytes(b"weights")
+    zenodo_server.files["remote.pt"] = b"remote weights"
+
+    paths = resolve_models(
+        [
+            ("remote.pt", "10.5072/zenodo.278300", hashlib.sha256(b"remote weights").hexdigest()),
+            {"filename": "cached.pt", "file_hash": hashlib.sha256(b"weights").hexdigest()},
+            "cached.pt",
+        ]
+    )
+
+    assert paths == {
+        "remote.pt": (tmp_cache / "remote.pt").as_posix(),
+        "cached.pt": (tmp_cache / "cached.pt").as_posix(),
+    }
+    assert resolve_models([]) == {}
+
+
+def test_resolve_models_reports_every_failure(tmp_cache, zenodo_server):
+    tmp_cache.mkdir()
+    (tmp_cache / "cached.pt").write_bytes(b"weights")
+    (tmp_cache / "mismatched.pt").write_bytes(b"weights")
+    zenodo_server.files["remote.pt"] = b"remote weights"
+
+    with pytest.raises(ModelResolutionError) as exception_info:
+        resolve_models(
+            [
+                "cached.pt",
+                "missing.pt",
+                ("mismatched.pt", None, "wrong_hash"),
+                "am1bcc",
+                ("remote.pt", "10.5072/zenodo.278300", None),
+            ]
+        )
+
+    errors = exception_info.value.errors
+    assert set(errors) == {"missing.pt", "mismatched.pt", "am1bcc"}
+    assert isinstance(errors["missing.pt"], FileNotFoundError)
+    assert isinstance(errors["mismatched.pt"], HashComparisonFailedException)
+    assert isinstance(errors["am1bcc"], BadFileSuffixError)
+    assert "missing.pt" in str(exception_info.value)
+    # models that could be resolved are still fetched
+    assert (tmp_cache / "remote.pt").exists()
+
+
+def test_resolve_models_checks_model_directories_once(tmp_cache, monkeypatch):
+    from openff.nagl_models import openff_nagl_models
+
+    refreshes = []
+    resolver = openff_nagl_models._DEFAULT_RESOLVER
+    original = resolver.refresh
+
+    def counting_refresh():
+        refreshes.append(1)
+        original()
+
+    monkeypatch.setattr(resolver, "refresh", counting_refresh)
+    tmp_cache.mkdir()
+    for i in range(5):
+        (tmp_cache / f"model-{i}.pt").write_bytes(b"weights")
+
+    resolve_models([f"model-{i}.pt" for i in range(5)])
+
+    assert len(refreshes) == 1
+
+
+def test_identical_models_are_stored_once(tmp_cache, zenodo_server):
+    data = os.urandom(1024)
+    file_hash = hashlib.sha256(data).hexdigest()
+    zenodo_server.files["first.pt"] = data
+
+    get_model("first.pt", doi="10.5072/zenodo.278300", file_hash=file_hash)
+    # the same content under another name, and without a DOI to download it from
+    path = get_model("second.pt", file_hash=file_hash)
+
+    assert open(path, "rb").read() == data
+    assert len(zenodo_server.requests) == 1
+    assert os.path.samefile(tmp_cache / "first.pt", tmp_cache / "second.pt")
+    assert sorted(entry.name for entry in _cache.get_catalog(tmp_cache).find_by_hash(file_hash)) == [
+        "first.pt",
+        "second.pt",
+    ]
+
+
+def test_modified_blob_is_not_reused(tmp_cache, zenodo_server):
+    data = os.urandom(1024)
+    file_hash = hashlib.sha256(data).hexdigest()
+    zenodo_server.files["first.pt"] = data
+    get_model("first.pt", doi="10.5072/zenodo.278300", file_hash=file_hash)
+
+    # written in place, which also changes the blob it is a hard link to
+    with open(tmp_cache / "first.pt", "r+b") as f:
+        f.write(b"corrupt")
+
+    with pytest.raises(FileNotFoundError):
+        get_model("second.pt", file_hash=file_hash)
+    assert _cache.BlobStore(tmp_cache).get(file_hash) is None
+
+    # a fresh download replaces the blob
+    zenodo_server.files["third.pt"] = data
+    path = get_model("third.pt", doi="10.5072/zenodo.278300", file_hash=file_hash)
+    assert _dynamic_fetch._stream_sha256(path) == file_hash
+    assert _dynamic_fetch._stream_sha256(_cache.BlobStore(tmp_cache).get(file_hash)) == file_hash
+
+
+def test_model_is_linked_from_existing_copy(tmp_cache, tmp_path, monkeypatch):
+    from openff.nagl_models import openff_nagl_models
+
+    installed_dir = tmp_path / "installed"
+    installed_dir.mkdir()
+    monkeypatch.setattr(openff_nagl_models, "_DEFAULT_RESOLVER", openff_nagl_models.ModelResolver([installed_dir]))
+    monkeypatch.setitem(_dynamic_fetch.KNOWN_HASHES, "installed.pt", hashlib.sha256(b"weights").hexdigest())
+
+    # a file that doesn't match its recorded hash is not used
+    (installed_dir / "installed.pt").write_bytes(b"modified")
+    with pytest.raises(FileNotFoundError):
+        get_model("copy.pt", file_hash=hashlib.sha256(b"weights").hexdigest())
+
+    (installed_dir / "installed.pt").write_bytes(b"weights")
+    path = get_model("copy.pt", file_hash=hashlib.sha256(b"weights").hexdigest())
+
+    assert path == (tmp_cache / "copy.pt").as_posix()
+    assert open(path, "rb").read() == b"weights"
+
+
+def test_cache_size_is_enforced_after_downloads(tmp_cache, zenodo_server, monkeypatch):
+    monkeypatch.setattr(_dynamic_fetch, "MAX_CACHE_SIZE", 2048)
+    for name in ["first.pt", "second.pt", "third.pt"]:
+        zenodo_server.files[name] = os.urandom(1024)
+
+    get_model("first.pt", doi="10.5072/zenodo.278300")
+    get_model("second.pt", doi="10.5072/zenodo.278300")
+    usage = _cache.get_usage_record(tmp_cache)
+    assert usage.last_access(tmp_cache / "first.pt") is not None
+
+    # make the earlier downloads old enough to be evicted
+    for name in ["first.pt", "second.pt"]:
+        key = _cache._catalog_path(tmp_cache / name)
+        usage._update(lambda data: data["accessed"].__setitem__(key, time.time() - 3600))
+    _dynamic_fetch.pin_model("first.pt")
+
+    get_model("third.pt", doi="10.5072/zenodo.278300")
+
+    assert not (tmp_cache / "second.pt").exists()
+    assert (tmp_cache / "first.pt").exists()
+    assert (tmp_cache / "third.pt").exists()
+    assert _dynamic_fetch.gc().size == 2048
+
+    _dynamic_fetch.unpin_model("first.pt")
+    result = _dynamic_fetch.gc("1K", min_age=0)
+    assert result.evicted == [(tmp_cache / "first.pt").as_posix()]
+    assert result.size == 1024
+
+
+def test_parse_size():
+    assert _dynamic_fetch._parse_size("1024") == 1024
+    assert _dynamic_fetch._parse_size("500M") == 500 * 1024**2
+    assert _dynamic_fetch._parse_size("1.5GiB") == int(1.5 * 1024**3)
+    assert _dynamic_fetch._parse_size(None) is None
+    with pytest.raises(ValueError):
+        _dynamic_fetch._parse_size("lots")
+
+
+def test_settings_are_read_from_the_environment_when_used(monkeypatch):
+    monkeypatch.setenv("OPENFF_NAGL_MODELS_MAX_CACHE_SIZE", "")
+    assert _dynamic_fetch._max_cache_size() is None
+
+    monkeypatch.setenv("OPENFF_NAGL_MODELS_MAX_CACHE_SIZE", "10G")
+    assert _dynamic_fetch._max_cache_size() == 10 * 1024**3
+
+    monkeypatch.setenv("OPENFF_NAGL_MODELS_DOWNLOAD_SEGMENTS", "many")
+    with pytest.raises(ValueError, match="OPENFF_NAGL_MODELS_DOWNLOAD_SEGMENTS environment variable, 'many'"):
+        _dynamic_fetch._env_setting("OPENFF_NAGL_MODELS_DOWNLOAD_SEGMENTS", int, 4)
+
+
+def test_empty_settings_do_not_break_import():
+    script = "import openff.nagl_models._dynamic_fetch, openff.nagl_models._loading"
+    env = dict(os.environ)
+    for name in (
+        "OPENFF_NAGL_MODELS_MAX_CACHE_SIZE",
+        "OPENFF_NAGL_MODELS_RELEASE_METADATA_TTL",
+        "OPENFF_NAGL_MODELS_DOWNLOAD_SEGMENTS",
+        "OPENFF_NAGL_MODELS_MAX_LOADED_MODELS",
+        "OPENFF_NAGL_MODELS_MAX_LOADED_MODELS_SIZE",
+    ):
+        env[name] = ""
+    subprocess.run([sys.executable, "-c", script], env=env, check=True)
+
+
+def test_get_model_buffer(tmp_cache):
+    tmp_cache.mkdir()
+    data = os.urandom(4096)
+    (tmp_cache / "model.pt").write_bytes(data)
+
+    buffer = get_model_buffer("model.pt", file_hash=hashlib.sha256(data).hexdigest())
+
+    assert buffer.readonly
+    assert bytes(buffer) == data
+    with pytest.raises(TypeError):
+        buffer[0] = 0
+    # the same mapping is shared within the process
+    assert get_model_buffer("model.pt").obj is buffer.obj
+
+
+def test_get_model_buffer_remaps_changed_file(tmp_cache):
+    tmp_cache.mkdir()
+    (tmp_cache / "model.pt").write_bytes(b"weights")
+    first = get_model_buffer("model.pt")
+
+    replacement = tmp_cache / "replacement"
+    replacement.write_bytes(b"new weights")
+    os.replace(replacement, tmp_cache / "model.pt")
+
+    assert bytes(get_model_buffer("model.pt")) == b"new weights"
+    # views of the old file stay valid
+    assert bytes(first) == b"weights"
+
+
+def test_get_model_buffer_unmaps_unreferenced_files(tmp_cache):
+    tmp_cache.mkdir()
+    (tmp_cache / "model.pt").write_bytes(b"weights")
+    buffer = get_model_buffer("model.pt")
+    mapped = weakref.ref(buffer.obj)
+
+    del buffer
+    gc.collect()
+
+    assert mapped() is None
+    assert len(_dynamic_fetch._MAPPED_MODELS) == 0
+
+
+def test_get_model_buffer_verifies_hash(tmp_cache):
+    tmp_cache.mkdir()
+    (tmp_cache / "model.pt").write_bytes(b"weights")
+
+    with pytest.raises(HashComparisonFailedException):
+        get_model_buffer("model.pt", file_hash="wrong_hash")
+
+
+@pytest.fixture
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(_dynamic_fetch.time, "sleep", lambda seconds: None)
+
+
+def test_download_resumes_interrupted_transfer(tmp_cache, model_server, no_retry_delay):
+    data = os.urandom(3 * 1024 * 1024)
+    model_server.files["model.pt"] = data
+    model_server.truncate_once.add("model.pt")
+    tmp_cache.mkdir()
+
+    path = _dynamic_fetch._download_and_verify_file(
+        model_server.url("model.pt"),
+        tmp_cache / "model.pt",
+        hashlib.sha256(data).hexdigest(),
+    )
+
+    assert open(path, "rb").read() == data
+    assert not (tmp_cache / "model.pt.part").exists()
+    first, second = (headers for _, headers in model_server.requests)
+    assert "Range" not in first
+    assert second["Range"] == f"bytes={len(data) // 2}-"
+
+
+def test_download_restarts_if_ranges_unsupported(tmp_cache, model_server, no_retry_delay):
+    data = os.urandom(1024)
+    model_server.files["model.pt"] = data
+    model_server.support_ranges = False
+    tmp_cache.mkdir()
+    (tmp_cache / "model.pt.part").write_bytes(b"stale partial download")
+
+    path = _dynamic_fetch._download_and_verify_file(model_server.url("model.pt"), tmp_cache / "model.pt")
+
+    assert open(path, "rb").read() == data
+
+
+def test_download_does_not_resume_unknown_partial_file(tmp_cache, model_server):
+    data = os.urandom(10_000)
+    model_server.files["model.pt"] = data
+    tmp_cache.mkdir()
+    # left by an earlier process, without a record of what it was downloading
+    (tmp_cache / "model.pt.part").write_bytes(os.urandom(5000))
+
+    path = _dynamic_fetch._download_and_verify_file(model_server.url("model.pt"), tmp_cache / "model.pt")
+
+    assert open(path, "rb").read() == data
+    assert ["Range" in headers for _, headers in model_server.requests] == [False]
+    assert not (tmp_cache / "model.pt.part.json").exists()
+
+
+def _leave_partial_download(tmp_cache, url, data, etag=None):
+    (tmp_cache / "model.pt.part").write_bytes(data)
+    (tmp_cache / "model.pt.part.json").write_text(
+        json.dumps({"url": url, "etag": etag, "last_modified": None, "size": len(data) * 2})
+    )
+
+
+def test_download_restarts_if_file_changed(tmp_cache, model_server):
+    data = os.urandom(10_000)
+    model_server.files["model.pt"] = data
+    model_server.etags["model.pt"] = '"new"'
+    tmp_cache.mkdir()
+    _leave_partial_download(tmp_cache, model_server.url("model.pt"), os.urandom(5000), etag='"old"')
+
+    path = _dynamic_fetch._download_and_verify_file(model_server.url("model.pt"), tmp_cache / "model.pt")
+
+    assert open(path, "rb").read() == data
+    [(_, headers)] = model_server.requests
+    assert headers["If-Range"] == '"old"'
+    assert not (tmp_cache / "model.pt.part.json").exists()
+
+
+def test_download_restarts_if_resumed_file_fails_hash_check(tmp_cache, model_server):
+    data = os.urandom(10_000)
+    model_server.files["model.pt"] = data
+    tmp_cache.mkdir()
+    # the same size, but different contents and no validator to tell them apart
+    _leave_partial_download(tmp_cache, model_server.url("model.pt"), os.urandom(5000))
+
+    path = _dynamic_fetch._download_and_verify_file(
+        model_server.url("model.pt"), tmp_cache / "model.pt", hashlib.sha256(data).hexdigest()
+    )
+
+    assert open(path, "rb").read() == data
+    assert [headers.get("Range") for _, headers in model_server.requests] == ["bytes=5000-", None]
+
+
+@pytest.fixture
+def segmented_downloads(monkeypatch):
+    monkeypatch.setattr(_dynamic_fetch, "SEGMENTED_DOWNLOAD_MIN_SIZE", 1024)
+
+
+def test_download_in_segments(tmp_cache, model_server, segmented_downloads):
+    data = os.urandom(3 * 1024 * 1024 + 1)
+    model_server.files["model.pt"] = data
+    tmp_cache.mkdir()
+
+    path = _dynamic_fetch._download_and_verify_file(
+        model_server.url("model.pt"), tmp_cache / "model.pt", hashlib.sha256(data).hexdigest(), segments=4
+    )
+
+    assert open(path, "rb").read() == data
+    first, *segments = (headers for _, headers in model_server.requests)
+    assert "Range" not in first
+    bounds = [len(data) * i // 4 for i in range(5)]
+    assert {headers["Range"] for headers in segments} == {
+        f"bytes={bounds[i]}-{bounds[i + 1] - 1}" for i in range(1, 4)
+    }
+
+
+def test_segmented_download_falls_back_to_single_stream(tmp_cache, model_server, segmented_downloads, monkeypatch):
+    data = os.urandom(1024 * 1024)
+    model_server.files["model.pt"] = data
+    tmp_cache.mkdir()
+
+    def drop_segment_requests(url, headers=None):
+        if headers and "Range" in headers:
+            raise ConnectionResetError("connection reset by peer")
+        return request(url, headers)
+
+    request = _http.request
+    monkeypatch.setattr(_http, "request", drop_segment_requests)
+
+    path = _dynamic_fetch._download_and_verify_file(
+        model_server.url("model.pt"), tmp_cache / "model.pt", hashlib.sha256(data).hexdigest(), segments=4
+    )
+
+    assert open(path, "rb").read() == data
+    assert [headers for _, headers in model_server.requests if "Range" in headers] == []
+    assert len(model_server.requests) == 2
+
+
+def test_segmented_download_needs_range_support(tmp_cache, model_server, segmented_downloads):
+    data = os.urandom(1024 * 1024)
+    model_server.files["model.pt"] = data
+    model_server.support_ranges = False
+    tmp_cache.mkdir()
+
+    path = _dynamic_fetch._download_and_verify_file(model_server.url("model.pt"), tmp_cache / "model.pt", segments=4)
+
+    assert open(path, "rb").read() == data
+    assert len(model_server.requests) == 1
+
+
+def test_download_hash_mismatch_leaves_nothing_in_cache(tmp_cache, model_server):
+    model_server.files["model.pt"] = b"weights"
+    tmp_cache.mkdir()
+
+    with pytest.raises(HashComparisonFailedException):
+        _dynamic_fetch._download_and_verify_file(model_server.url("model.pt"), tmp_cache / "model.pt", "wrong_hash")
+
+    assert os.listdir(tmp_cache) == []
+
+
+def _fetch_in_subprocess(cache_dir, url, file_hash):
+    _dynamic_fetch.CACHE_DIR = cache_dir
+    return _dynamic_fetch._fetch_into_cache(url, cache_dir / "model.pt", file_hash)
+
+
+def test_concurrent_processes_download_once(tmp_cache, model_server):
+    data = os.urandom(1024 * 1024)
+    file_hash = hashlib.sha256(data).hexdigest()
+    model_server.files["model.pt"] = data
+    model_server.delay = 0.5
+
+    n_processes = 4
+    with multiprocessing.get_context().Pool(n_processes) as pool:
+        paths = pool.starmap(
+            _fetch_in_subprocess,
+            [(tmp_cache, model_server.url("model.pt"), file_hash)] * n_processes,
+        )
+
+    assert set(paths) == {(tmp_cache / "model.pt").as_posix()}
+    assert len(model_server.requests) == 1
+    assert not (tmp_cache / "model.pt.lock").exists()
+
+
+def test_concurrent_threads_share_one_lookup(tmp_cache, monkeypatch):
+    n_threads = 8
+    calls = []
+    started = threading.Barrier(n_threads + 1, timeout=10)
+    release = threading.Event()
+
+    def slow_get_model(filename, doi, file_hash):
+        calls.append(filename)
+        release.wait(10)
+        return f"/path/to/{filename}"
+
+    monkeypatch.setattr(_dynamic_fetch, "_get_model", slow_get_model)
+
+    def call():
+        started.wait()
+        return get_model("model.pt", doi="10.5072/zenodo.278300")
+
+    with ThreadPoolExecutor(n_threads) as executor:
+        futures = [executor.submit(call) for _ in range(n_threads)]
+        started.wait()
+        # give every thread time to join the in-flight lookup
+        time.sleep(0.2)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert calls == ["model.pt"]
+    assert results == ["/path/to/model.pt"] * n_threads
+
+
+def test_concurrent_threads_share_exceptions(tmp_cache, monkeypatch):
+    release = threading.Event()
+
+    def failing_get_model(filename, doi, file_hash):
+        release.wait(10)
+        raise FileNotFoundError(filename)
+
+    monkeypatch.setattr(_dynamic_fetch, "_get_model", failing_get_model)
+
+    with ThreadPoolExecutor(2) as executor:
+        futures = [executor.submit(get_model, "model.pt") for _ in range(2)]
+        time.sleep(0.2)
+        release.set()
+        for future in futures:
+            with pytest.raises(FileNotFoundError):
+                future.result()
+
+    # nothing is kept once the lookup has finished
+    assert _dynamic_fetch._GET_MODEL_CALLS._calls == {}
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+@pytest.mark.parametrize("redirect", [False, True])
+def test_async_download(tmp_cache, model_server, chunked, redirect):
+    data = os.urandom(100_000)
+    model_server.files["model.pt"] = data
+    model_server.chunked = chunked
+    tmp_cache.mkdir()
+
+    path = asyncio.run(
+        _dynamic_fetch._async_fetch_into_cache(
+            model_server.url("model.pt", redirect=redirect),
+            tmp_cache / "model.pt",
+            hashlib.sha256(data).hexdigest(),
+        )
+    )
+
+    assert open(path, "rb").read() == data
+    assert not (tmp_cache / "model.pt.part").exists()
+
+
+def test_async_download_errors(tmp_cache, model_server):
+    model_server.files["model.pt"] = b"weights"
+    tmp_cache.mkdir()
+
+    with pytest.raises(HashComparisonFailedException):
+        asyncio.run(
+            _dynamic_fetch._async_download_and_verify_file(
+                model_server.url("model.pt"), tmp_cache / "model.pt", "wrong_hash"
+            )
+        )
+    assert os.listdir(tmp_cache) == []
+
+    with pytest.raises(urllib.error.HTTPError):
+        asyncio.run(_dynamic_fetch._async_download_and_verify_file(model_server.url("missing.pt"), tmp_cache / "x.pt"))
+
+
+def test_async_download_through_proxy(tmp_cache, model_server, monkeypatch):
+    model_server.files["model.pt"] = b"weights"
+    for name in ("http_proxy", "HTTP_PROXY", "no_proxy", "NO_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("http_proxy", model_server.base_url)
+    # urlopen builds its opener, with the proxies of the time, on first use
+    monkeypatch.setattr(urllib.request, "_opener", None)
+    tmp_cache.mkdir()
+
+    path = asyncio.run(
+        _dynamic_fetch._async_download_and_verify_file("http://models.invalid/files/model.pt", tmp_cache / "model.pt")
+    )
+
+    assert open(path, "rb").read() == b"weights"
+    assert [path for path, _ in model_server.requests] == ["http://models.invalid/files/model.pt"]
+
+
+def test_async_download_times_out(tmp_cache, model_server, monkeypatch):
+    model_server.files["model.pt"] = b"weights"
+    model_server.delay = 1.0
+    monkeypatch.setattr(_http._CONNECTION_POOL, "timeout", 0.1)
+    tmp_cache.mkdir()
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(
+            _dynamic_fetch._async_download_and_verify_file(model_server.url("model.pt"), tmp_cache / "model.pt")
+        )
+
+
+def test_get_model_async_does_not_block_event_loop(tmp_cache, zenodo_server, monkeypatch):
+    zenodo_server.files["model.pt"] = b"weights"
+    threads = {}
+
+    def record_thread(function):
+        def wrapper(*args, **kwargs):
+            threads.setdefault(function.__name__, set()).add(threading.current_thread())
+            return function(*args, **kwargs)
+
+        return wrapper
+
+    for name in ["_find_installed_model", "_store_in_cache"]:
+        monkeypatch.setattr(_dynamic_fetch, name, record_thread(getattr(_dynamic_fetch, name)))
+    usage = _cache.get_usage_record(tmp_cache)
+    monkeypatch.setattr(usage, "record_access", record_thread(usage.record_access))
+
+    # downloaded, and then found in the cache
+    asyncio.run(get_model_async("model.pt", doi="10.5072/zenodo.278300"))
+    asyncio.run(get_model_async("model.pt", doi="10.5072/zenodo.278300"))
+
+    assert set(threads) == {"_find_installed_model", "_store_in_cache", "record_access"}
+    assert threading.current_thread() not in set().union(*threads.values())
+
+
+def test_get_model_async_matches_get_model(tmp_cache):
+    tmp_cache.mkdir()
+    (tmp_cache / "cached.pt").write_bytes(b"weights")
+
+    assert asyncio.run(get_model_async("cached.pt")) == get_model("cached.pt")
+
+    with pytest.raises(HashComparisonFailedException):
+        asyncio.run(get_model_async("cached.pt", file_hash="wrong_hash"))
+    with pytest.raises(FileNotFoundError, match="Could not find asset with name 'FOOBAR"):
+        asyncio.run(get_model_async("FOOBAR.pt"))
+    with pytest.raises(BadFileSuffixError):
+        asyncio.run(get_model_async("FOOBAR.txt"))
+    with pytest.raises(UnableToParseDOIException):
+        asyncio.run(get_model_async("nonexistent.pt", doi="zenodo.278300"))
+
+
+def test_prefetch_models_async(tmp_cache):
+    tmp_cache.mkdir()
+    (tmp_cache / "cached.pt").write_bytes(b"weights")
+
+    results = asyncio.run(prefetch_models_async(["cached.pt", "missing.pt"]))
+
+    assert results["cached.pt"].path == (tmp_cache / "cached.pt").as_posix()
+    assert isinstance(results["missing.pt"].error, FileNotFoundError)
+
+
+@pytest.fixture
+def releases_server(tmp_cache, model_server, monkeypatch):
+    """Serve the recorded GitHub release metadata from the local server."""
+    model_server.files["releases"] = (files("openff.nagl_models") / "tests/data/releases.json").read_bytes()
+    model_server.etags["releases"] = '"v1"'
+    monkeypatch.setattr(_dynamic_fetch, "RELEASES_URL", model_server.url("releases"))
+    monkeypatch.delenv("OPENFF_NAGL_MODELS_OFFLINE", raising=False)
+    return model_server
+
+
+def test_release_metadata_is_cached(releases_server):
+    releases = get_release_metadata()
+    assert releases[0]["tag_name"] == "v0.3.0"
+
+    assert get_release_metadata() == releases
+    assert len(releases_server.requests) == 1
+
+
+def test_release_metadata_conditional_refresh(releases_server):
+    releases = get_release_metadata()
+    assert get_release_metadata(ttl=0) == releases
+    assert asyncio.run(get_release_metadata_async(ttl=0)) == releases
+
+    _, first_headers = releases_server.requests[0]
+    assert "If-None-Match" not in first_headers
+    for _, headers in releases_server.requests[1:]:
+        assert headers["If-None-Match"] == '"v1"'
+
+
+def test_async_release_metadata_not_modified_through_proxy(releases_server, monkeypatch):
+    releases = get_release_metadata()
+    for name in ("http_proxy", "HTTP_PROXY", "no_proxy", "NO_PROXY"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("http_proxy", releases_server.base_url)
+    monkeypatch.setattr(urllib.request, "_opener", None)
+    monkeypatch.setattr(_dynamic_fetch, "RELEASES_URL", "http://releases.invalid/files/releases")
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert asyncio.run(get_release_metadata_async(ttl=0)) == releases
+
+    # the cached copy is current again, so isn't refreshed
+    n_requests = len(releases_server.requests)
+    assert asyncio.run(get_release_metadata_async()) == releases
+    assert len(releases_server.requests) == n_requests
+
+
+def test_release_metadata_offline(releases_server, monkeypatch):
+    with pytest.raises(FileNotFoundError, match="offline mode"):
+        get_release_metadata(offline=True)
+
+    releases = get_release_metadata()
+    monkeypatch.setenv("OPENFF_NAGL_MODELS_OFFLINE", "1")
+    assert get_release_metadata(ttl=0) == releases
+    assert len(releases_server.requests) == 1
+
+
+def test_release_metadata_falls_back_to_stale_copy(releases_server):
+    releases = get_release_metadata()
+    del releases_server.files["releases"]
+
+    with pytest.warns(UserWarning, match="Could not refresh release metadata"):
+        assert get_release_metadata(ttl=0) == releases
+
+
+def test_release_asset_index(releases_server):
+    index = get_release_asset_index()
+
+    asset = index["openff-gnn-am1bcc-0.1.0-rc.3.pt"]
+    assert asset.release == "v0.3.0"
+    assert asset.size == 16805851
+    assert asset.url.endswith("/v0.3.0/openff-gnn-am1bcc-0.1.0-rc.3.pt")
+    assert set(index) == {
+        "openff-gnn-am1bcc-0.0.1-alpha.1.pt",
+        "openff-gnn-am1bcc-0.1.0-rc.1.pt",
+        "openff-gnn-am1bcc-0.1.0-rc.2.pt",
+        "openff-gnn-am1bcc-0.1.0-rc.3.pt",
+    }
+
+    # built once, until the metadata changes
+    assert get_release_asset_index() is index
+    assert get_release_asset_index(ttl=0) is index
+
+
+@pytest.fixture
+def zenodo_record(tmp_cache, model_server, monkeypatch):
+    """Serve a Zenodo record from the local server, returning a function that adds files to it."""
+    record = {"id": 1, "files": []}
+    monkeypatch.setattr(_dynamic_fetch, "_zenodo_record_url", lambda doi: model_server.url("record"))
+    monkeypatch.setattr(_dynamic_fetch, "_ZENODO_RECORDS", {})
+    monkeypatch.delenv("OPENFF_NAGL_MODELS_OFFLINE", raising=False)
+    tmp_cache.mkdir()
+
+    def publish(name, data, checksum=None):
+        model_server.files[name] = data
+        record["files"].append(
+            {
+                "key": name,
+                "size": len(data),
+                "checksum": checksum or f"md5:{hashlib.md5(data).hexdigest()}",
+                "links": {"self": model_server.url(name)},
+            }
+        )
+        model_server.files["record"] = json.dumps(record).encode()
+
+    return publish
+
+
+def test_get_zenodo_record(zenodo_record, model_server):
+    zenodo_record("model.pt", b"weights")
+
+    record = get_zenodo_record("10.5281/zenodo.1")
+    assert record.files["model.pt"].size == len(b"weights")
+    assert record.files["model.pt"].checksum == f"md5:{hashlib.md5(b'weights').hexdigest()}"
+    assert record.files["model.pt"].url == model_server.url("model.pt")
+
+    assert get_zenodo_record("10.5281/zenodo.1") is record
+    assert len(model_server.requests) == 1
+
+
+def test_get_zenodo_record_from_mirror(zenodo_record, model_server, mirror_server, monkeypatch):
+    zenodo_record("model.pt", b"weights")
+    mirror_server.files["record"] = model_server.files.pop("record")
+    monkeypatch.setenv("OPENFF_NAGL_MODELS_MIRRORS", mirror_server.base_url)
+    monkeypatch.setattr(_mirrors, "_HOST_HEALTH", _mirrors.HostHealth())
+
+    record = get_zenodo_record("10.5281/zenodo.1")
+
+    assert record.url == model_server.url("record")
+    assert record.files["model.pt"].size == len(b"weights")
+    assert [path for path, _ in mirror_server.requests] == ["/files/record"]
+    assert model_server.requests == []
+
+
+def test_fetch_zenodo_record(zenodo_record, model_server, tmp_cache):
+    zenodo_record("first.pt", b"first")
+    zenodo_record("second.pt", b"second")
+
+    results = fetch_zenodo_record("10.5281/zenodo.1")
+    assert {filename: result.path for filename, result in results.items()} == {
+        "first.pt": (tmp_cache / "first.pt").as_posix(),
+        "second.pt": (tmp_cache / "second.pt").as_posix(),
+    }
+    assert (tmp_cache / "second.pt").read_bytes() == b"second"
+
+    # files that match the record aren't downloaded again
+    n_requests = len(model_server.requests)
+    results = fetch_zenodo_record("10.5281/zenodo.1", ["second.pt", "missing.pt"])
+    assert results["second.pt"].ok
+    assert isinstance(results["missing.pt"].error, FileNotFoundError)
+    assert len(model_server.requests) == n_requests
+
+
+def test_fetch_zenodo_record_checks_files(zenodo_record, tmp_cache):
+    zenodo_record("stale.pt", b"new weights")
+    zenodo_record("corrupt.pt", b"weights", checksum="md5:0123456789abcdef0123456789abcdef")
+    (tmp_cache / "stale.pt").write_bytes(b"old weights")
+
+    results = fetch_zenodo_record("10.5281/zenodo.1")
+
+    assert (tmp_cache / "stale.pt").read_bytes() == b"new weights"
+    assert isinstance(results["corrupt.pt"].error, HashComparisonFailedException)
+    assert not (tmp_cache / "corrupt.pt").exists()
+
+
+def test_get_model_checks_freshness(zenodo_record, model_server, tmp_cache):
+    zenodo_record("model.pt", b"new weights")
+    (tmp_cache / "model.pt").write_bytes(b"old weights")
+
+    path = get_model("model.pt", doi="10.5281/zenodo.1")
+    assert open(path, "rb").read() == b"old weights"
+    assert model_server.requests == []
+
+    path = get_model("model.pt", doi="10.5281/zenodo.1", check_freshness=True)
+    assert open(path, "rb").read() == b"new weights"
+
+    # only the record is fetched once the cached copy is up to date
+    n_requests = len(model_server.requests)
+    get_model("model.pt", doi="10.5281/zenodo.1", check_freshness=True)
+    assert len(model_server.requests) == n_requests
+
+
+def test_freshness_check_falls_back_to_cached_copy(zenodo_record, tmp_cache, monkeypatch):
+    (tmp_cache / "model.pt").write_bytes(b"weights")
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        dead_url = f"http://127.0.0.1:{sock.getsockname()[1]}/record"
+    monkeypatch.setattr(_dynamic_fetch, "_zenodo_record_url", lambda doi: dead_url)
+    monkeypatch.setattr(_mirrors, "_HOST_HEALTH", _mirrors.HostHealth())
+
+    with pytest.warns(UserWarning, match="Could not check whether model.pt is up to date"):
+        path = get_model("model.pt", doi="10.5281/zenodo.1", check_freshness=True)
+    assert open(path, "rb").read() == b"weights"
+
+
+def test_freshness_check_waits_for_download(zenodo_record, tmp_cache, monkeypatch):
+    zenodo_record("model.pt", b"new weights")
+    (tmp_cache / "model.pt").write_bytes(b"old weights")
+    monkeypatch.setattr(_dynamic_fetch, "LOCK_TIMEOUT", 0.2)
+
+    # another process is replacing the file
+    with _cache.FileLock(tmp_cache / "model.pt.lock"):
+        with pytest.raises(_cache.CacheLockTimeoutError):
+            get_model("model.pt", doi="10.5281/zenodo.1", check_freshness=True)
+    assert (tmp_cache / "model.pt").read_bytes() == b"old weights"
+
+
+def test_freshness_checksum_is_recorded(zenodo_record, tmp_cache, monkeypatch):
+    zenodo_record("model.pt", b"weights")
+    (tmp_cache / "model.pt").write_bytes(b"weights")
+    get_model("model.pt", doi="10.5281/zenodo.1", check_freshness=True)
+
+    def fail(*args):
+        raise AssertionError("the checksum of an unchanged file was computed again")
+
+    monkeypatch.setattr(_cache, "_stream_digests", fail)
+    monkeypatch.setattr(_cache, "_stream_sha256", fail)
+    path = get_model("model.pt", doi="10.5281/zenodo.1", check_freshness=True)
+    assert open(path, "rb").read() == b"weights"
@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from openff.nagl_models import _instrumentation
+from openff.nagl_models._dynamic_fetch import (
+    FetchStatsCollector,
+    HashComparisonFailedException,
+    UnableToParseDOIException,
+    add_fetch_hook,
+    get_fetch_stats,
+    get_model,
+    get_model_async,
+    remove_fetch_hook,
+)
+from openff.nagl_models._instrumentation import LATENCY_BUCKETS, FetchEvent, LatencyHistogram
+
+
+@pytest.fixture
+def events():
+    collected: list[FetchEvent] = []
+    add_fetch_hook(collected.append)
+    yield collected
+    remove_fetch_hook(collected.append)
+
+
+def _stages(events):
+    return [(event.stage, event.outcome) for event in events]
+
+
+def test_cache_hit_events(tmp_cache, events):
+    tmp_cache.mkdir()
+    (tmp_cache / "model.pt").write_bytes(b"weights")
+
+    get_model("model.pt", file_hash=hashlib.sha256(b"weights").hexdigest())
+
+    assert _stages(events) == [
+        ("package_lookup", "miss"),
+        ("cache_lookup", "hit"),
+        ("hash_verification", "ok"),
+    ]
+    assert all(event.filename == "model.pt" and event.duration >= 0 for event in events)
+
+
+def test_hash_mismatch_event(tmp_cache, events):
+    tmp_cache.mkdir()
+    (tmp_cache / "model.pt").write_bytes(b"weights")
+
+    with pytest.raises(HashComparisonFailedException):
+        get_model("model.pt", file_hash="wrong_hash")
+
+    assert events[-1].stage == "hash_verification"
+    assert events[-1].outcome == "mismatch"
+    assert isinstance(events[-1].error, HashComparisonFailedException)
+
+
+def test_download_events(tmp_cache, zenodo_server, events):
+    data = b"weights" * 1000
+    zenodo_server.files["model.pt"] = data
+
+    get_model("model.pt", doi="10.5072/zenodo.278300", file_hash=hashlib.sha256(data).hexdigest())
+
+    assert _stages(events) == [
+        ("package_lookup", "miss"),
+        ("cache_lookup", "miss"),
+        ("blob_lookup", "miss"),
+        ("doi_parse", "ok"),
+        ("lock_wait", "ok"),
+        ("download", "ok"),
+    ]
+    assert events[-1].n_bytes == len(data)
+
+
+def test_async_download_events(tmp_cache, zenodo_server, events):
+    data = b"weights" * 1000
+    zenodo_server.files["model.pt"] = data
+
+    asyncio.run(get_model_async("model.pt", doi="10.5072/zenodo.278300"))
+
+    assert _stages(events)[-1] == ("download", "ok")
+    assert events[-1].n_bytes == len(data)
+
+
+def test_doi_parse_error_event(tmp_cache, events):
+    with pytest.raises(UnableToParseDOIException):
+        get_model("model.pt", doi="not-a-doi")
+
+    assert _stages(events)[-1] == ("doi_parse", "error")
+
+
+def test_failing_hook_warns(tmp_cache):
+    def broken_hook(event):
+        raise RuntimeError("broken")
+
+    add_fetch_hook(broken_hook)
+    try:
+        with pytest.warns(UserWarning, match="broken"):
+            with pytest.raises(FileNotFoundError):
+                get_model("model.pt")
+    finally:
+        remove_fetch_hook(broken_hook)
+
+
+def test_collector_aggregates_events(tmp_cache, zenodo_server):
+    zenodo_server.files["model.pt"] = b"weights"
+    stats = FetchStatsCollector()
+    add_fetch_hook(stats)
+    try:
+        for _ in range(3):
+            get_model("model.pt", doi="10.5072/zenodo.278300")
+    finally:
+        remove_fetch_hook(stats)
+
+    assert stats.counts[("cache_lookup", "miss")] == 1
+    assert stats.counts[("cache_lookup", "hit")] == 2
+    assert stats.counts[("download", "ok")] == 1
+    assert stats.bytes_downloaded == len(b"weights")
+
+    summary = stats.summary()
+    assert summary["package_lookup"]["count"] == 3
+    assert summary["cache_lookup"]["outcomes"] == {"hit": 2, "miss": 1}
+    assert 0 < summary["download"]["p50"] <= summary["download"]["max"]
+
+    stats.reset()
+    assert stats.summary() == {}
+
+
+def test_latency_histogram_quantiles():
+    histogram = LatencyHistogram()
+    for duration in [1e-5] * 90 + [1.0] * 10:
+        histogram.add(duration)
+
+    assert histogram.count == 100
+    assert histogram.min == 1e-5
+    assert histogram.quantile(0.5) == 1e-5
+    assert histogram.quantile(0.99) == 1.0
+    assert sum(histogram.counts) == 100
+    assert len(histogram.counts) == len(LATENCY_BUCKETS) + 1
+
+
+def test_get_fetch_stats_is_per_process(monkeypatch):
+    monkeypatch.setattr(_instrumentation, "_FETCH_STATS", None)
+    monkeypatch.setattr(_instrumentation, "_FETCH_HOOKS", [])
+
+    stats = get_fetch_stats()
+    assert get_fetch_stats() is stats
+    assert _instrumentation._FETCH_HOOKS == [stats]
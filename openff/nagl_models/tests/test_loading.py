@@ -0,0 +1,102 @@
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from openff.nagl_models import _loading, load_model
+from openff.nagl_models._loading import clear_loaded_model_cache
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Stand in for OpenFF NAGL, recording which files are loaded."""
+    loaded = []
+
+    def fake_load(path):
+        loaded.append(path)
+        return object()
+
+    monkeypatch.setattr(_loading, "_load_gnn_model", fake_load)
+    clear_loaded_model_cache()
+    yield loaded
+    clear_loaded_model_cache()
+
+
+@pytest.fixture
+def cached_models(tmp_cache):
+    tmp_cache.mkdir()
+    for name, data in [("first.pt", b"first"), ("second.pt", b"second"), ("copy.pt", b"first")]:
+        (tmp_cache / name).write_bytes(data)
+    return tmp_cache
+
+
+def test_load_model_is_reused(cached_models, loads):
+    model = load_model("first.pt", file_hash=hashlib.sha256(b"first").hexdigest())
+
+    assert load_model("first.pt") is model
+    # an identical file with another name shares the loaded model
+    assert load_model("copy.pt") is model
+    assert load_model("second.pt") is not model
+    assert len(loads) == 2
+
+
+def test_load_model_reloads_changed_file(cached_models, loads):
+    model = load_model("first.pt")
+    (cached_models / "first.pt").write_bytes(b"retrained")
+
+    assert load_model("first.pt") is not model
+    assert len(loads) == 2
+
+
+def test_load_model_evicts_least_recently_used(cached_models, loads, monkeypatch):
+    monkeypatch.setattr(_loading, "MAX_LOADED_MODELS", 1)
+
+    first = load_model("first.pt")
+    load_model("second.pt")
+    assert load_model("first.pt") is not first
+    assert len(loads) == 3
+
+    monkeypatch.setattr(_loading, "MAX_LOADED_MODELS", 8)
+    monkeypatch.setattr(_loading, "MAX_LOADED_MODELS_SIZE", len(b"first") + len(b"second"))
+    load_model("second.pt")
+    first = load_model("first.pt")
+    (cached_models / "third.pt").write_bytes(b"third")
+    load_model("third.pt")
+
+    # second.pt was used least recently
+    assert hashlib.sha256(b"second").hexdigest() not in _loading._LOADED_MODELS
+    assert load_model("first.pt") is first
+
+
+def test_load_model_loads_once_concurrently(cached_models, monkeypatch):
+    loaded = []
+    barrier = threading.Barrier(4, timeout=10)
+
+    def slow_load(path):
+        loaded.append(path)
+        time.sleep(0.1)
+        return object()
+
+    monkeypatch.setattr(_loading, "_load_gnn_model", slow_load)
+    clear_loaded_model_cache()
+
+    def load():
+        barrier.wait()
+        return load_model("first.pt")
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        models = list(executor.map(lambda _: load(), range(4)))
+
+    assert len(loaded) == 1
+    assert all(model is models[0] for model in models)
+    clear_loaded_model_cache()
+
+
+def test_load_model_with_nagl(tmp_cache):
+    pytest.importorskip("openff.nagl")
+
+    model = load_model("openff-gnn-am1bcc-1.0.0.pt")
+    assert not model.training
+    assert load_model("openff-gnn-am1bcc-1.0.0.pt") is model
@@ -0,0 +1,201 @@
+import hashlib
+import socket
+import urllib.error
+
+import pytest
+
+from openff.nagl_models import _http, _mirrors
+from openff.nagl_models._dynamic_fetch import HashComparisonFailedException, _fetch_into_cache
+from openff.nagl_models._mirrors import HostHealth, candidate_urls, get_mirrors, mirror_url
+
+
+@pytest.fixture(autouse=True)
+def host_health(monkeypatch):
+    health = HostHealth()
+    monkeypatch.setattr(_mirrors, "_HOST_HEALTH", health)
+    return health
+
+
+@pytest.fixture
+def mirrors(monkeypatch):
+    """Configure the mirrors, in order."""
+
+    def configure(*urls):
+        monkeypatch.setenv("OPENFF_NAGL_MODELS_MIRRORS", ",".join(urls))
+
+    configure()
+    return configure
+
+
+@pytest.fixture
+def dead_url():
+    """The URL of a port that nothing is listening on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def test_get_mirrors(monkeypatch, tmp_path):
+    mirrors_file = tmp_path / "mirrors.txt"
+    mirrors_file.write_text("# internal mirrors\nhttps://first.example.com\n\n  https://second.example.com/{host}\n")
+    monkeypatch.delenv("OPENFF_NAGL_MODELS_MIRRORS", raising=False)
+    monkeypatch.setenv("OPENFF_NAGL_MODELS_MIRRORS_FILE", str(mirrors_file))
+    assert get_mirrors() == ["https://first.example.com", "https://second.example.com/{host}"]
+
+    # the environment variable takes precedence over the file
+    monkeypatch.setenv("OPENFF_NAGL_MODELS_MIRRORS", "https://a.example.com, https://b.example.com")
+    assert get_mirrors() == ["https://a.example.com", "https://b.example.com"]
+
+    monkeypatch.setenv("OPENFF_NAGL_MODELS_MIRRORS", "")
+    assert get_mirrors() == []
+
+    monkeypatch.delenv("OPENFF_NAGL_MODELS_MIRRORS")
+    monkeypatch.setenv("OPENFF_NAGL_MODELS_MIRRORS_FILE", str(tmp_path / "missing.txt"))
+    assert get_mirrors() == []
+
+
+def test_mirror_url():
+    url = "https://zenodo.org/api/records/1/files/model.pt"
+    assert mirror_url("https://mirror.example.com/zenodo/", url) == (
+        "https://mirror.example.com/zenodo/api/records/1/files/model.pt"
+    )
+    assert mirror_url("https://mirror.example.com/{host}", url) == (
+        "https://mirror.example.com/zenodo.org/api/records/1/files/model.pt"
+    )
+
+
+def test_candidate_urls_prefer_healthy_hosts(mirrors, host_health):
+    mirrors("https://first.example.com", "https://second.example.com")
+    url = "https://zenodo.org/files/model.pt"
+    assert candidate_urls(url) == [
+        "https://first.example.com/files/model.pt",
+        "https://second.example.com/files/model.pt",
+        url,
+    ]
+
+    host_health.record_failure("first.example.com")
+    assert candidate_urls(url)[0] == "https://second.example.com/files/model.pt"
+    assert candidate_urls(url)[-1] == "https://first.example.com/files/model.pt"
+
+    host_health.record_success("first.example.com")
+    assert candidate_urls(url)[0] == "https://first.example.com/files/model.pt"
+
+
+def test_host_cooldown_doubles(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(_mirrors.time, "monotonic", lambda: now[0])
+    health = HostHealth(cooldown=10, max_cooldown=15)
+
+    health.record_failure("host")
+    assert not health.is_healthy("host")
+    now[0] += 10
+    assert health.is_healthy("host")
+
+    health.record_failure("host")
+    now[0] += 10
+    assert not health.is_healthy("host")
+    now[0] += 5
+    assert health.is_healthy("host")
+
+
+def test_download_from_mirror(tmp_cache, mirrors, model_server, mirror_server, dead_url):
+    mirror_server.files["model.pt"] = b"weights"
+    mirrors(mirror_server.base_url)
+    tmp_cache.mkdir()
+
+    path = _fetch_into_cache(f"{dead_url}/files/model.pt", tmp_cache / "model.pt")
+
+    assert (tmp_cache / "model.pt").read_bytes() == b"weights"
+    assert path == (tmp_cache / "model.pt").as_posix()
+    assert [request[0] for request in mirror_server.requests] == ["/files/model.pt"]
+
+
+def test_failover_to_next_mirror(tmp_cache, mirrors, mirror_server, dead_url, host_health):
+    mirror_server.files["model.pt"] = b"weights"
+    mirrors(dead_url, mirror_server.base_url)
+    tmp_cache.mkdir()
+
+    _fetch_into_cache("https://zenodo.invalid/files/model.pt", tmp_cache / "model.pt")
+
+    assert (tmp_cache / "model.pt").read_bytes() == b"weights"
+    assert not host_health.is_healthy(dead_url.removeprefix("http://"))
+    assert host_health.is_healthy(mirror_server.base_url.removeprefix("http://"))
+    # the failed mirror is tried last until it recovers
+    assert candidate_urls("https://zenodo.invalid/files/other.pt")[0].startswith(mirror_server.base_url)
+
+
+def test_missing_file_on_mirror_falls_back(tmp_cache, mirrors, model_server, mirror_server, host_health):
+    model_server.files["model.pt"] = b"weights"
+    mirrors(mirror_server.base_url)
+    tmp_cache.mkdir()
+
+    _fetch_into_cache(model_server.url("model.pt"), tmp_cache / "model.pt")
+
+    assert (tmp_cache / "model.pt").read_bytes() == b"weights"
+    assert [request[0] for request in mirror_server.requests] == ["/files/model.pt"]
+    # the mirror responded, so it is still healthy
+    assert host_health.is_healthy(mirror_server.base_url.removeprefix("http://"))
+
+
+def test_corrupt_file_on_mirror_falls_back(tmp_cache, mirrors, model_server, mirror_server):
+    model_server.files["model.pt"] = b"weights"
+    mirror_server.files["model.pt"] = b"corrupt"
+    mirrors(mirror_server.base_url)
+    tmp_cache.mkdir()
+
+    _fetch_into_cache(model_server.url("model.pt"), tmp_cache / "model.pt", hashlib.sha256(b"weights").hexdigest())
+
+    assert (tmp_cache / "model.pt").read_bytes() == b"weights"
+
+
+def test_every_mirror_failing_raises_last_error(tmp_cache, mirrors, model_server, mirror_server):
+    mirror_server.files["model.pt"] = b"corrupt"
+    mirrors(mirror_server.base_url)
+    tmp_cache.mkdir()
+
+    with pytest.raises(urllib.error.HTTPError):
+        _fetch_into_cache(model_server.url("model.pt"), tmp_cache / "model.pt", hashlib.sha256(b"weights").hexdigest())
+
+    mirrors(model_server.base_url)
+    with pytest.raises(HashComparisonFailedException):
+        _fetch_into_cache(
+            mirror_server.url("model.pt"), tmp_cache / "model.pt", hashlib.sha256(b"weights").hexdigest()
+        )
+    assert not (tmp_cache / "model.pt").exists()
+
+
+def test_connections_are_reused(tmp_cache, model_server):
+    tmp_cache.mkdir()
+    for i in range(3):
+        model_server.files[f"model-{i}.pt"] = b"weights" * i
+        _fetch_into_cache(model_server.url(f"model-{i}.pt", redirect=True), tmp_cache / f"model-{i}.pt")
+
+    assert len(model_server.requests) == 6
+    assert len(model_server.connections) == 1
+
+
+def test_stale_connection_is_replaced(model_server):
+    model_server.files["model.pt"] = b"weights"
+    pool = _http.ConnectionPool()
+
+    with pool.request(model_server.url("model.pt")) as response:
+        assert response.read() == b"weights"
+
+    # the server closes the idle connection
+    (connection,) = [connection for idle in pool._idle.values() for connection in idle]
+    connection.sock.shutdown(socket.SHUT_RDWR)
+
+    with pool.request(model_server.url("model.pt")) as response:
+        assert response.read() == b"weights"
+    assert len(model_server.connections) == 2
+
+
+def test_unread_response_is_not_reused(model_server):
+    model_server.files["model.pt"] = b"weights" * 1000
+    pool = _http.ConnectionPool()
+
+    with pool.request(model_server.url("model.pt")) as response:
+        response.read(10)
+
+    assert pool._idle == {}
@@ -2,14 +2,30 @@
 Unit and regression test for the openff_nagl_models package.
 """
 
+import importlib.metadata
 import importlib.resources
 import os
+import subprocess
+import sys
 from importlib.metadata import entry_points
 
 import pytest
 
-from openff.nagl_models import list_available_nagl_models, validate_nagl_model_path
-from openff.nagl_models.openff_nagl_models import get_models_by_type
+from openff.nagl_models import (
+    ModelResolver,
+    clear_nagl_model_directory_cache,
+    list_available_nagl_models,
+    load_nagl_model_directory_entry_points,
+    validate_nagl_model_path,
+)
+from openff.nagl_models._cache import CatalogEntry, get_catalog
+from openff.nagl_models.openff_nagl_models import (
+    ModelVersionIndex,
+    get_latest_model,
+    get_model_version_index,
+    get_models_by_type,
+    search_file_path,
+)
 
 
 def find_model_files():
@@ -65,6 +81,100 @@ def test_entry_points():
             assert os.path.exists(path)
 
 
+@pytest.fixture
+def count_entry_point_scans(monkeypatch):
+    calls = []
+    original = importlib.metadata.entry_points
+
+    def counting_entry_points(**kwargs):
+        calls.append(kwargs)
+        return original(**kwargs)
+
+    monkeypatch.setattr(importlib.metadata, "entry_points", counting_entry_points)
+    clear_nagl_model_directory_cache()
+    yield calls
+    clear_nagl_model_directory_cache()
+
+
+def test_entry_point_directories_are_cached(count_entry_point_scans):
+    first = load_nagl_model_directory_entry_points()
+    second = load_nagl_model_directory_entry_points()
+    validate_nagl_model_path("openff-gnn-am1bcc-1.0.0.pt")
+
+    assert first == second
+    assert len(count_entry_point_scans) == 1
+
+    # callers mutating the returned list must not affect the cache
+    first.clear()
+    assert load_nagl_model_directory_entry_points() == second
+
+
+def test_entry_point_cache_invalidation(count_entry_point_scans, monkeypatch, tmp_path):
+    load_nagl_model_directory_entry_points()
+    clear_nagl_model_directory_cache()
+    load_nagl_model_directory_entry_points()
+    assert len(count_entry_point_scans) == 2
+
+    monkeypatch.syspath_prepend(tmp_path)
+    load_nagl_model_directory_entry_points()
+    assert len(count_entry_point_scans) == 3
+
+
+def test_search_file_path_does_not_modify_search_paths(tmp_path):
+    search_paths = [str(tmp_path)]
+    search_file_path("does-not-exist.pt", search_paths)
+    search_file_path("does-not-exist.pt", search_paths)
+    assert search_paths == [str(tmp_path)]
+
+
+def test_model_resolver_precedence(tmp_path):
+    first, second = tmp_path / "first", tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+    (first / "shared.pt").write_text("first")
+    (second / "shared.pt").write_text("second")
+    (second / "only-second.pt").write_text("second")
+
+    resolver = ModelResolver([first, second])
+    assert resolver.resolve("shared.pt") == (first / "shared.pt").resolve()
+    assert resolver.resolve("only-second.pt") == (second / "only-second.pt").resolve()
+    assert resolver.resolve("missing.pt") is None
+
+
+def test_model_resolver_resolve_many(tmp_path):
+    (tmp_path / "subdirectory").mkdir()
+    (tmp_path / "model.pt").write_text("model")
+    (tmp_path / "subdirectory" / "nested.pt").write_text("nested")
+
+    resolver = ModelResolver([tmp_path])
+    assert resolver.resolve_many(["model.pt", "subdirectory/nested.pt", "missing.pt"]) == {
+        "model.pt": (tmp_path / "model.pt").resolve(),
+        "subdirectory/nested.pt": (tmp_path / "subdirectory" / "nested.pt").resolve(),
+        "missing.pt": None,
+    }
+
+
+def test_model_resolver_refreshes_modified_directories(tmp_path):
+    resolver = ModelResolver([tmp_path])
+    assert resolver.resolve("new.pt") is None
+
+    (tmp_path / "new.pt").write_text("new")
+    # guarantee a different directory mtime on filesystems with coarse timestamps
+    os.utime(tmp_path, ns=(0, 0))
+    assert resolver.resolve("new.pt") == (tmp_path / "new.pt").resolve()
+
+    (tmp_path / "new.pt").unlink()
+    os.utime(tmp_path, ns=(1, 1))
+    assert resolver.resolve("new.pt") is None
+
+
+def test_model_resolver_defaults_to_entry_points():
+    resolver = ModelResolver()
+    assert resolver.directories == load_nagl_model_directory_entry_points()
+    for model_name in find_model_files():
+        assert resolver.resolve(model_name.name) == validate_nagl_model_path(model_name.name)
+
+
 def test_get_models_by_type():
     all_model_stems = [path.stem for path in get_models_by_type(model_type="am1bcc")]
     expected_stems = [
@@ -88,3 +198,149 @@ def test_test_get_models_by_type_production():
     latest_models = get_models_by_type(model_type="am1bcc", production_only=True)
     assert len(latest_models) == 1
     assert latest_models[0].stem == "openff-gnn-am1bcc-1.0.0"
+
+
+def test_get_models_by_type_specifier():
+    models = get_models_by_type(model_type="am1bcc", specifier=">0.0.1,<1")
+    assert [path.stem for path in models] == [
+        "openff-gnn-am1bcc-0.1.0-rc.1",
+        "openff-gnn-am1bcc-0.1.0-rc.2",
+        "openff-gnn-am1bcc-0.1.0-rc.3",
+    ]
+
+
+def test_get_models_by_type_does_not_touch_cache(tmp_cache):
+    assert get_models_by_type(model_type="am1bcc")
+    assert not tmp_cache.exists()
+
+
+def _cache_model(cache_dir, name):
+    cache_dir.mkdir(exist_ok=True)
+    path = cache_dir / name
+    path.write_bytes(b"weights")
+    get_catalog(cache_dir).add(CatalogEntry.from_file(path, source="cache"))
+    return path
+
+
+def test_model_version_index_query(tmp_cache):
+    cached = _cache_model(tmp_cache, "openff-gnn-am1bcc-2.0.0-rc.1.pt")
+    # the installed copy takes precedence
+    _cache_model(tmp_cache, "openff-gnn-am1bcc-1.0.0.pt")
+    index = get_model_version_index()
+
+    assert "am1bcc" in index.model_types
+    assert [str(model.version) for model in index.query("am1bcc", ">=0.1,<3", prereleases=None)] == ["1.0.0"]
+    assert [str(model.version) for model in index.query("am1bcc", ">=1")] == ["1.0.0", "2.0.0rc1"]
+    assert [model.path for model in index.query("am1bcc", source="cache")] == [cached]
+    assert index.query("am1bcc", ">=1", prereleases=False)[0].source == "installed"
+    assert index.query("does-not-exist") == []
+
+
+def test_model_version_index_follows_directory_precedence(tmp_path):
+    # listed out of alphabetical order, so that sorting on the paths would pick the wrong copy
+    directories = [tmp_path / "b", tmp_path / "a"]
+    entries = []
+    for directory in directories:
+        directory.mkdir()
+        path = directory / "openff-gnn-am1bcc-9.0.0.pt"
+        path.write_bytes(b"weights")
+        entries.append(CatalogEntry.from_file(path.resolve(), source="installed"))
+    resolver = ModelResolver(directories)
+
+    index = ModelVersionIndex(reversed(entries), resolver=resolver)
+
+    assert index.latest("am1bcc").path == resolver.resolve("openff-gnn-am1bcc-9.0.0.pt")
+
+
+def test_get_latest_model(tmp_cache):
+    assert get_latest_model("am1bcc").name == "openff-gnn-am1bcc-1.0.0.pt"
+
+    cached = _cache_model(tmp_cache, "openff-gnn-am1bcc-2.0.0-rc.1.pt")
+    assert get_latest_model("am1bcc") == cached
+    assert get_latest_model("am1bcc", production_only=True).name == "openff-gnn-am1bcc-1.0.0.pt"
+
+    _cache_model(tmp_cache, "openff-gnn-espaloma-0.1.0-rc.1.pt")
+    with pytest.raises(ValueError, match="No production models of type espaloma"):
+        get_latest_model("espaloma", production_only=True)
+    with pytest.raises(ValueError, match="No models of type does-not-exist"):
+        get_latest_model("does-not-exist")
+
+
+def test_model_version_index_is_reused_until_models_change(tmp_cache):
+    index = get_model_version_index()
+    assert get_model_version_index() is index
+
+    _cache_model(tmp_cache, "openff-gnn-am1bcc-2.0.0.pt")
+    assert get_model_version_index() is not index
+    assert get_model_version_index().latest("am1bcc").path.name == "openff-gnn-am1bcc-2.0.0.pt"
+
+
+# Importing the package happens in every process that discovers NAGL models through the
+# entry point, so it should stay cheap
+IMPORT_TIME_BUDGET_US = 50_000
+
+HEAVY_MODULES = {
+    "asyncio",
+    "hashlib",
+    "importlib.metadata",
+    "json",
+    "openff.nagl_models._async_http",
+    "openff.nagl_models._cache",
+    "openff.nagl_models._dynamic_fetch",
+    "openff.nagl_models._http",
+    "packaging",
+    "platformdirs",
+    "urllib.request",
+}
+
+
+def _modules_imported_by(code):
+    script = f"import sys; before = set(sys.modules); {code}; print(*sorted(set(sys.modules) - before))"
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import openff.nagl_models",
+        "import openff.nagl_models; openff.nagl_models.get_nagl_model_dirs_paths()",
+    ],
+)
+def test_import_is_lazy(code):
+    assert _modules_imported_by(code).isdisjoint(HEAVY_MODULES)
+
+
+def test_synchronous_fetching_does_not_import_asyncio():
+    assert _modules_imported_by("import openff.nagl_models._dynamic_fetch").isdisjoint(
+        {"asyncio", "openff.nagl_models._async_http"}
+    )
+
+
+def test_lazy_attributes():
+    assert _modules_imported_by("from openff.nagl_models import get_model") >= {"openff.nagl_models._dynamic_fetch"}
+    assert _modules_imported_by("import openff.nagl_models; openff.nagl_models.__version__") >= {"importlib.metadata"}
+
+    import openff.nagl_models
+
+    for name in openff.nagl_models.__all__:
+        assert name in dir(openff.nagl_models)
+        assert callable(getattr(openff.nagl_models, name))
+    with pytest.raises(AttributeError, match="does_not_exist"):
+        openff.nagl_models.does_not_exist
+
+
+def test_import_time_budget():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import openff.nagl_models"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # lines look like "import time:  self [us] | cumulative | imported package"
+    cumulative = {
+        line.split("|")[2].strip(): int(line.split("|")[1])
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and line.split("|")[1].strip().isdigit()
+    }
+    assert cumulative["openff.nagl_models"] < IMPORT_TIME_BUDGET_US